@@ -1,7 +1,70 @@
 import numpy as np
-from datetime import datetime, timedelta
 import random
 
+# Returning to a room within this many minutes of the previous visit is flagged as frequent
+FREQUENT_VISIT_MINUTES = 30
+# A gap between consecutive location events longer than this is flagged as extended inactivity
+STILLNESS_MINUTES = 180
+
+SECONDS_PER_DAY = 86400
+
+def _parse_event_times(times, first):
+    """
+    Parse event times once into int64 seconds. Full timestamps are absolute;
+    bare "HH:MM" times roll over to the next day whenever they go backwards
+    within a resident's events (first marks each resident's first event).
+    """
+    text = np.asarray(times, dtype=str)
+    if len(text) == 0:
+        return np.zeros(0, dtype=np.int64)
+    if text.dtype.itemsize // 4 > 5:
+        try:
+            return np.asarray(text, dtype="datetime64[s]").astype(np.int64)
+        except ValueError as e:
+            raise ValueError("Event times must be all HH:MM or all full timestamps") from e
+    
+    # Read the digits of zero-padded "HH:MM" straight from the UTF-32 buffer
+    codes = text.view(np.uint32).reshape(len(text), -1).astype(np.int64) - ord("0")
+    digits = codes[:, [0, 1, 3, 4]] if codes.shape[1] == 5 else None
+    if digits is not None and np.all(codes[:, 2] == ord(":") - ord("0")) and np.all((digits >= 0) & (digits <= 9)):
+        hours = digits[:, 0] * 10 + digits[:, 1]
+        minutes = digits[:, 2] * 10 + digits[:, 3]
+    else:
+        # Unpadded times such as "8:05"
+        try:
+            hours, minutes = np.array([t.split(":") for t in text.tolist()], dtype=np.int64).T
+        except ValueError as e:
+            raise ValueError("Event times must be all HH:MM or all full timestamps") from e
+    if np.any(hours > 23) or np.any(minutes > 59):
+        raise ValueError("Event times must be valid HH:MM")
+    
+    seconds = hours * 3600 + minutes * 60
+    rollover = np.zeros(len(seconds), dtype=np.int64)
+    rollover[1:] = (np.diff(seconds) < 0) & ~first[1:]
+    # Day numbers only ever get compared within one resident's events
+    return seconds + np.cumsum(rollover) * SECONDS_PER_DAY
+
+def _find_patterns(seconds, rooms, first):
+    """
+    Find frequent room visits and long gaps over events in time order per
+    resident, in one vectorized pass. A visit is an event in a different
+    room from the resident's previous event, so repeated samples of the
+    same room count once. Returns the indices of visits followed by
+    another visit to the same room within FREQUENT_VISIT_MINUTES, and of
+    the consecutive events starting and ending gaps over STILLNESS_MINUTES.
+    """
+    resident = np.cumsum(first)
+    arrivals = np.flatnonzero(first | np.concatenate([[True], rooms[1:] != rooms[:-1]]))
+    
+    # Group visits by (resident, room); the stable sort keeps each group in time order
+    visits = arrivals[np.lexsort((rooms[arrivals], resident[arrivals]))]
+    same_room = (resident[visits[1:]] == resident[visits[:-1]]) & (rooms[visits[1:]] == rooms[visits[:-1]])
+    frequent = same_room & (np.diff(seconds[visits]) < FREQUENT_VISIT_MINUTES * 60)
+    
+    still = np.flatnonzero(~first[1:] & (np.diff(seconds) > STILLNESS_MINUTES * 60))
+    
+    return np.sort(visits[:-1][frequent]), still, still + 1
+
 class ActivityMonitorAgent:
     """
     Agent responsible for monitoring and analyzing activity data
@@ -12,8 +75,8 @@ class ActivityMonitorAgent:
         self.description = "Monitors movement patterns and activity levels"
         
     def analyze_activity(self, activity_data):
-        """Analyze activity level data and provide insights"""
-        if not activity_data:
+        """Analyze activity level data (a list or NumPy array) and provide insights"""
+        if len(activity_data) == 0:
             return "No activity data available for analysis."
         
         avg_activity = np.mean(activity_data)
@@ -32,45 +95,55 @@ class ActivityMonitorAgent:
         else:
             analysis += "✅ Activity level is good. Maintaining this level of activity is beneficial for overall health.\n"
         
-        if max(activity_data) - min(activity_data) > 40:
+        if max_activity - min_activity > 40:
             analysis += "⚠️ There is significant variation in activity levels across days. A more consistent routine may be beneficial.\n"
         
         return analysis
     
     def detect_unusual_patterns(self, location_data):
-        """Detect unusual patterns in location data"""
-        # In a real implementation, this would use more sophisticated pattern recognition
-        # For demo purposes, we're using simple rules
-        
-        unusual_patterns = []
-        
-        # Check for extended time in bathroom
-        bathroom_visits = [entry for entry in location_data if entry['location'] == 'Bathroom']
-        for i in range(len(bathroom_visits) - 1):
-            current = bathroom_visits[i]
-            next_visit = bathroom_visits[i + 1]
-            
-            # Convert time strings to datetime for comparison
-            current_time = datetime.strptime(current['time'], '%H:%M')
-            next_time = datetime.strptime(next_visit['time'], '%H:%M')
-            
-            # If next bathroom visit is within 30 minutes, might indicate an issue
-            if (next_time - current_time).total_seconds() / 60 < 30:
-                unusual_patterns.append(f"Frequent bathroom visits detected around {current['time']}")
-        
-        # Check for extended inactivity (no location change for long period)
-        for i in range(len(location_data) - 1):
-            current = location_data[i]
-            next_loc = location_data[i + 1]
-            
-            current_time = datetime.strptime(current['time'], '%H:%M')
-            next_time = datetime.strptime(next_loc['time'], '%H:%M')
-            
-            # If more than 3 hours between location changes, might indicate inactivity
-            if (next_time - current_time).total_seconds() / 3600 > 3:
-                unusual_patterns.append(f"Extended period with no movement detected between {current['time']} and {next_loc['time']}")
-        
-        return unusual_patterns
+        """Detect unusual patterns in location data (entries with 'time' and 'location')"""
+        return self.find_unusual_patterns(
+            [entry['time'] for entry in location_data],
+            [entry['location'] for entry in location_data]
+        )[0]
+    
+    def find_unusual_patterns(self, times, locations, offsets=None):
+        """
+        Detect frequent room visits and extended inactivity for many residents at once.
+
+        times and locations are flat per-event sequences in time order for
+        each resident; offsets (length residents + 1) marks where each
+        resident's events start (one resident when None). Times are either
+        all full timestamps or all "HH:MM", which move on to the next day
+        whenever they go backwards. Returns one list of findings per resident.
+        """
+        n = len(times)
+        if len(locations) != n:
+            raise ValueError("times and locations must have the same length")
+        offsets = np.array([0, n] if offsets is None else offsets, dtype=np.int64)
+        if offsets[0] != 0 or offsets[-1] != n or np.any(np.diff(offsets) < 0):
+            raise ValueError("offsets must run from 0 to len(times) without decreasing")
+        
+        findings = [[] for _ in range(len(offsets) - 1)]
+        if n == 0:
+            return findings
+        
+        first = np.zeros(n, dtype=bool)
+        first[offsets[:-1][offsets[:-1] < n]] = True
+        seconds = _parse_event_times(times, first)
+        room_codes = {}
+        rooms = np.array([room_codes.setdefault(room, len(room_codes)) for room in locations], dtype=np.int64)
+        
+        frequent, still_starts, still_ends = _find_patterns(seconds, rooms, first)
+        
+        # Only the flagged events are rendered
+        for i, resident in zip(frequent.tolist(), (np.searchsorted(offsets, frequent, side='right') - 1).tolist()):
+            findings[resident].append(f"Frequent {str(locations[i]).lower()} visits detected around {times[i]}")
+        for i, j, resident in zip(still_starts.tolist(), still_ends.tolist(),
+                                  (np.searchsorted(offsets, still_starts, side='right') - 1).tolist()):
+            findings[resident].append(f"Extended period with no movement detected between {times[i]} and {times[j]}")
+        
+        return findings
     
     def get_recommendations(self):
         """Generate activity recommendations based on analysis"""
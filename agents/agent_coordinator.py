@@ -3,10 +3,21 @@ from agents.activity_agent import ActivityMonitorAgent
 from agents.reminder_agent import ReminderAgent
 from agents.alert_agent import AlertAgent
 from agents.social_agent import SocialAgent
-import json
+from agents.agent_log import AgentLog
+from agents.query_router import QueryRouter, ResponseCache, normalize_query, AGENT_DATA
+from database.db_manager import data_version
+from database.metrics import registry as metrics
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import os
+import threading
 import time
 from datetime import datetime
 
+# Seconds each agent gets in run_all_agents before its result is given up on
+AGENT_TIMEOUT = 5.0
+# Threads shared by concurrent agent runs
+MAX_AGENT_WORKERS = 8
+
 class AgentCoordinator:
     """
     Coordinates the activities of all agents in the system
@@ -27,6 +38,11 @@ class AgentCoordinator:
             'social': self.social_agent
         }
         
+        # Count and time every public agent method for /api/agents/metrics
+        metrics.describe('eldercare_agent', 'Agent methods')
+        for agent_type, agent in self.agents.items():
+            metrics.instrument(agent, 'eldercare_agent', agent=agent_type)
+        
         self.agent_status = {
             'health': {'status': 'idle', 'last_run': None},
             'activity': {'status': 'idle', 'last_run': None},
@@ -35,7 +51,15 @@ class AgentCoordinator:
             'social': {'status': 'idle', 'last_run': None}
         }
         
-        self.log = []
+        self.router = QueryRouter()
+        self.response_cache = ResponseCache()
+        
+        self.log = AgentLog(
+            sample_rate=float(os.environ.get('ELDERCARE_AGENT_LOG_SAMPLE', 1.0)),
+            spill_path=os.environ.get('ELDERCARE_AGENT_LOG')
+        )
+        self._executor = None
+        self._executor_lock = threading.Lock()
     
     def run_agent(self, agent_type, data=None):
         """Run a specific agent with provided data"""
@@ -43,18 +67,18 @@ class AgentCoordinator:
             return {'error': f'Agent type {agent_type} not found'}
         
         self.agent_status[agent_type]['status'] = 'running'
-        self.log.append({
-            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            'action': f'Started {agent_type} agent',
-            'details': f'Running with data: {json.dumps(data) if data else "None"}'
-        })
+        self.log.record(agent_type, 'start', data)
         
         try:
             result = None
             
             # Execute agent-specific logic
             if agent_type == 'health':
-                if data and 'heart_rate' in data:
+                if data and 'summary' in data:
+                    result = self.health_agent.analyze_health_summary(data['summary'])
+                elif data and 'current' in data:
+                    result = self.health_agent.analyze_current_vitals(data['current'])
+                elif data and 'heart_rate' in data:
                     result = self.health_agent.analyze_heart_rate([data['heart_rate']])
                 elif data and 'systolic' in data and 'diastolic' in data:
                     result = self.health_agent.analyze_blood_pressure([data['systolic']], [data['diastolic']])
@@ -103,11 +127,7 @@ class AgentCoordinator:
             self.agent_status[agent_type]['status'] = 'idle'
             self.agent_status[agent_type]['last_run'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
             
-            self.log.append({
-                'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                'action': f'Completed {agent_type} agent',
-                'details': f'Result: {json.dumps(result) if isinstance(result, dict) else str(result)}'
-            })
+            self.log.record(agent_type, 'complete', result)
             
             return {
                 'status': 'success',
@@ -120,11 +140,7 @@ class AgentCoordinator:
             self.agent_status[agent_type]['status'] = 'error'
             
             error_details = str(e)
-            self.log.append({
-                'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                'action': f'Error in {agent_type} agent',
-                'details': error_details
-            })
+            self.log.record(agent_type, 'error', error_details)
             
             return {
                 'status': 'error',
@@ -133,42 +149,115 @@ class AgentCoordinator:
                 'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
             }
     
-    def run_all_agents(self, data=None):
-        """Run all agents in sequence"""
-        results = {}
+    def run_all_agents(self, data=None, timeout=AGENT_TIMEOUT, concurrent=True):
+        """
+        Run all agents on the same data. By default they run concurrently on
+        a shared thread pool, each with `timeout` seconds (a number, or a dict
+        by agent type); an agent that overruns gets a 'timeout' result and
+        the others are not held up.
+        """
+        if not concurrent:
+            return {agent_type: self.run_agent(agent_type, data) for agent_type in self.agents}
+        
+        return self.run_all_agents_batch([data], timeout)[0]
+    
+    def run_all_agents_batch(self, data_list, timeout=AGENT_TIMEOUT):
+        """
+        Run all agents for each item of data_list (e.g. one per resident) in
+        one concurrent sweep; returns one run_all_agents result per item.
+        Each agent works through the batch on its own thread. When it runs
+        out of time it stops after the current item, and the items it did
+        not reach get a 'timeout' result.
+        """
+        executor = self._get_executor()
         
+        start = time.monotonic()
+        pending = {}
         for agent_type in self.agents:
-            results[agent_type] = self.run_agent(agent_type, data)
-            time.sleep(0.1)  # Small delay between agent runs
+            limit = timeout.get(agent_type, AGENT_TIMEOUT) if isinstance(timeout, dict) else timeout
+            done_list, cancel = [], threading.Event()
+            future = executor.submit(self._run_agent_over, agent_type, data_list, done_list, cancel)
+            pending[future] = (agent_type, start + limit, done_list, cancel)
+        
+        # Merge each agent's results as it completes, waking at the next deadline
+        by_agent = {}
+        while pending:
+            next_deadline = min(deadline for _, deadline, _, _ in pending.values())
+            done, _ = wait(pending, timeout=max(0.0, next_deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+            for future in done:
+                agent_type, _, done_list, _ = pending.pop(future)
+                by_agent[agent_type] = done_list
+            
+            now = time.monotonic()
+            for future, (agent_type, deadline, done_list, cancel) in list(pending.items()):
+                if deadline <= now:
+                    del pending[future]
+                    cancel.set()
+                    future.cancel()
+                    finished = done_list[:]
+                    by_agent[agent_type] = finished + [self._timed_out(agent_type, deadline - start)] * (len(data_list) - len(finished))
+        
+        return [{agent_type: by_agent[agent_type][i] for agent_type in self.agents} for i in range(len(data_list))]
+    
+    def _get_executor(self):
+        # Callers racing on the first batch must share one pool
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(MAX_AGENT_WORKERS, thread_name_prefix="agent")
+            return self._executor
+    
+    def _run_agent_over(self, agent_type, data_list, results, cancel):
+        for data in data_list:
+            if cancel.is_set():
+                return
+            results.append(self.run_agent(agent_type, data))
+    
+    def _timed_out(self, agent_type, limit):
+        self.agent_status[agent_type]['status'] = 'timeout'
+        
+        error_details = f'Timed out after {limit:g}s'
+        self.log.record(agent_type, 'timeout', error_details)
         
-        return results
+        return {
+            'status': 'timeout',
+            'agent': agent_type,
+            'error': error_details,
+            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        }
+    
+    def close(self):
+        """Shut down the thread pool used by concurrent runs and flush the log"""
+        self.log.flush()
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
     
     def get_agent_status(self):
         """Get the current status of all agents"""
         return self.agent_status
     
     def get_log(self, limit=10):
-        """Get the recent log entries"""
-        return self.log[-limit:] if limit > 0 else self.log
+        """Get the recent log entries, formatted as they are read"""
+        return self.log.entries(limit)
     
     def process_query(self, query):
         """Process a user query and route to appropriate agent"""
-        # Simple keyword-based routing
-        if any(keyword in query.lower() for keyword in ['heart', 'blood', 'health', 'glucose']):
-            return self.health_agent.respond_to_query(query)
+        agents = self.router.route(normalize_query(query))
+        agent_type = agents[0] if agents else None
         
-        elif any(keyword in query.lower() for keyword in ['activity', 'movement', 'walk', 'step']):
-            return self.activity_agent.respond_to_query(query)
-        
-        elif any(keyword in query.lower() for keyword in ['reminder', 'medication', 'appointment']):
-            return self.reminder_agent.respond_to_query(query)
-        
-        elif any(keyword in query.lower() for keyword in ['alert', 'emergency', 'fall', 'help']):
-            return self.alert_agent.respond_to_query(query)
-        
-        elif any(keyword in query.lower() for keyword in ['social', 'family', 'friend', 'call']):
-            return self.social_agent.respond_to_query(query)
+        # Answers are reused until the data they depend on changes. The agent
+        # sees the query as asked, so the answer is cached under that exact text.
+        version = data_version(*AGENT_DATA[agent_type]) if agent_type else data_version()
+        response = self.response_cache.get(query, version)
+        if response is not None:
+            return response
         
+        if agent_type:
+            response = self.agents[agent_type].respond_to_query(query)
         else:
             # General response when no specific agent matches
-            return "I'm monitoring all aspects of elderly care. The system is functioning normally with all agents active. Health metrics are within normal ranges, there are no missed reminders, and no alerts requiring attention. How can I assist you today?"
+            response = "I'm monitoring all aspects of elderly care. The system is functioning normally with all agents active. Health metrics are within normal ranges, there are no missed reminders, and no alerts requiring attention. How can I assist you today?"
+        
+        self.response_cache.put(query, version, response)
+        return response
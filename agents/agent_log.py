@@ -0,0 +1,107 @@
+import atexit
+import json
+import logging
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+
+# Records kept in memory; older ones are dropped (or spilled to disk)
+LOG_CAPACITY = 1000
+# Size of each spill file before it is rotated, and rotated files kept
+SPILL_MAX_BYTES = 10 * 1024 * 1024
+SPILL_BACKUPS = 5
+# Evicted records written to the spill file in one go
+SPILL_BATCH = 256
+# Events always recorded whatever the sample rate
+ALWAYS_LOGGED = ('error', 'timeout')
+
+_ACTIONS = {
+    'start': 'Started {} agent',
+    'complete': 'Completed {} agent',
+    'error': 'Error in {} agent',
+    'timeout': 'Timeout in {} agent',
+}
+
+def _details(event, payload):
+    if event == 'start':
+        return f'Running with data: {json.dumps(payload, default=str) if payload else "None"}'
+    if event == 'complete':
+        return f'Result: {json.dumps(payload, default=str) if isinstance(payload, dict) else str(payload)}'
+    return str(payload)
+
+class AgentLog:
+    """
+    Fixed-capacity log of agent runs.
+
+    Each record is a compact (time, agent, event, payload) tuple that keeps
+    a reference to the run's input or result instead of a formatted copy,
+    so appending is cheap; records are formatted only when read. Routine
+    'start' and 'complete' records can be sampled with sample_rate, while
+    errors and timeouts are always kept. With spill_path set, records
+    pushed out of the ring are written as JSON lines to a rotating file in
+    batches of SPILL_BATCH, so memory stays constant however long the
+    process runs.
+    """
+
+    def __init__(self, capacity=LOG_CAPACITY, sample_rate=1.0, spill_path=None):
+        self.sample_rate = sample_rate
+        self._records = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._spill = None
+        self._evicted = []
+        if spill_path:
+            self._spill = logging.getLogger(f"{__name__}.{spill_path}")
+            self._spill.propagate = False
+            self._spill.setLevel(logging.INFO)
+            if not self._spill.handlers:
+                self._spill.addHandler(RotatingFileHandler(spill_path, maxBytes=SPILL_MAX_BYTES, backupCount=SPILL_BACKUPS))
+            atexit.register(self.flush)
+
+    def record(self, agent_type, event, payload=None):
+        """Log an agent event ('start', 'complete', 'error' or 'timeout')"""
+        if self.sample_rate < 1.0 and event not in ALWAYS_LOGGED and random.random() >= self.sample_rate:
+            return
+        record = (time.time(), agent_type, event, payload)
+        with self._lock:
+            if self._spill and len(self._records) == self._records.maxlen:
+                self._evicted.append(self._records[0])
+            self._records.append(record)
+            if len(self._evicted) < SPILL_BATCH:
+                return
+            evicted, self._evicted = self._evicted, []
+        self._write_spill(evicted)
+
+    def flush(self):
+        """Write evicted records still waiting for a full spill batch"""
+        with self._lock:
+            evicted, self._evicted = self._evicted, []
+        if evicted:
+            self._write_spill(evicted)
+
+    def _write_spill(self, records):
+        # One log call per batch: a rotated file always ends on a whole batch
+        self._spill.info("\n".join(json.dumps(self.format(record), default=str) for record in records))
+
+    @staticmethod
+    def format(record):
+        """Render a record as a {'timestamp', 'action', 'details'} entry"""
+        ts, agent_type, event, payload = record
+        return {
+            'timestamp': datetime.fromtimestamp(ts).strftime('%Y-%m-%d %H:%M:%S'),
+            'action': _ACTIONS[event].format(agent_type),
+            'details': _details(event, payload)
+        }
+
+    def entries(self, limit=10):
+        """The most recent `limit` records formatted, oldest first (all if limit <= 0)"""
+        with self._lock:
+            records = list(self._records)
+        if limit > 0:
+            records = records[-limit:]
+        return [self.format(record) for record in records]
+
+    def __len__(self):
+        return len(self._records)
@@ -1,6 +1,8 @@
 from datetime import datetime
 import random
 
+from agents.alert_rules import AlertRules
+
 class AlertAgent:
     """
     Agent responsible for managing alerts and emergency situations
@@ -9,132 +11,77 @@ class AlertAgent:
     def __init__(self):
         self.name = "Alert Agent"
         self.description = "Detects unusual behavior and triggers appropriate alerts"
+        # Thresholds and rules live in agents/alert_rules.json
+        self.rules = AlertRules()
         
     def evaluate_health_alert(self, health_data):
         """Evaluate health data for potential alerts"""
-        alerts = []
-        
-        # Heart rate checks
-        if 'heart_rate' in health_data:
-            hr = health_data['heart_rate']
-            if hr > 120:
-                alerts.append({
-                    'message': f'Critical heart rate detected: {hr} BPM',
-                    'type': 'health',
-                    'priority': 'critical'
-                })
-            elif hr > 100:
-                alerts.append({
-                    'message': f'Elevated heart rate detected: {hr} BPM',
-                    'type': 'health',
-                    'priority': 'high'
-                })
-            elif hr < 50:
-                alerts.append({
-                    'message': f'Low heart rate detected: {hr} BPM',
-                    'type': 'health',
-                    'priority': 'high'
-                })
-        
-        # Blood pressure checks
-        if 'bp' in health_data:
+        # Numeric fields, falling back to the legacy "120/80" text
+        systolic = health_data.get('systolic')
+        diastolic = health_data.get('diastolic')
+        if (systolic is None or diastolic is None) and 'bp' in health_data:
             try:
                 systolic, diastolic = map(int, health_data['bp'].split('/'))
-                
-                if systolic > 180 or diastolic > 120:
-                    alerts.append({
-                        'message': f'Hypertensive crisis detected: {health_data["bp"]} mmHg',
-                        'type': 'health',
-                        'priority': 'critical'
-                    })
-                elif systolic > 140 or diastolic > 90:
-                    alerts.append({
-                        'message': f'High blood pressure detected: {health_data["bp"]} mmHg',
-                        'type': 'health',
-                        'priority': 'high'
-                    })
             except:
-                pass
-        
-        # Glucose checks
-        if 'glucose' in health_data:
-            glucose = health_data['glucose']
-            if glucose > 250:
-                alerts.append({
-                    'message': f'Critical glucose level detected: {glucose} mg/dL',
-                    'type': 'health',
-                    'priority': 'critical'
-                })
-            elif glucose > 180:
-                alerts.append({
-                    'message': f'High glucose level detected: {glucose} mg/dL',
-                    'type': 'health',
-                    'priority': 'high'
-                })
-            elif glucose < 70:
-                alerts.append({
-                    'message': f'Low glucose level detected: {glucose} mg/dL',
-                    'type': 'health',
-                    'priority': 'high'
-                })
+                systolic = diastolic = None
         
-        return alerts
+        return self.evaluate_health_alerts_batch(
+            [health_data.get('heart_rate')], [systolic], [diastolic], [health_data.get('glucose')],
+            user_ids=self._user_ids(health_data)
+        )[0]
+    
+    def evaluate_health_alerts_batch(self, heart_rate, systolic, diastolic, glucose, user_ids=None):
+        """
+        Evaluate a batch of health readings in one vectorized pass.
+
+        Takes equal-length sequences (use NaN for a missing value) and returns
+        one list of alerts per reading, matching evaluate_health_alert.
+        user_ids, one per reading, applies per-resident threshold overrides.
+        """
+        return self.rules.alerts('health', {
+            'heart_rate': heart_rate,
+            'systolic': systolic,
+            'diastolic': diastolic,
+            'glucose': glucose
+        }, user_ids)
     
     def evaluate_activity_alert(self, activity_data):
         """Evaluate activity data for potential alerts"""
-        alerts = []
+        columns = self._activity_columns(activity_data)
+        if not columns:
+            return []
         
-        # Check for extended inactivity
+        return self.rules.alerts('activity', columns, self._user_ids(activity_data))[0]
+    
+    def is_emergency(self, category, data):
+        """Whether a single health or activity reading crosses a critical alert rule"""
+        if category == 'activity':
+            data = {'user_id': data.get('user_id'),
+                    **{field: values[0] for field, values in self._activity_columns(data).items()}}
+        return self.rules.crosses(category, data)
+    
+    def _activity_columns(self, activity_data):
+        columns = {}
+        
+        # Time since the last movement, for the inactivity rules
         if 'last_movement' in activity_data:
-            last_movement = activity_data['last_movement']
-            current_time = datetime.now()
-            
             try:
-                last_movement_time = datetime.strptime(last_movement, '%Y-%m-%d %H:%M:%S')
-                time_diff = (current_time - last_movement_time).total_seconds() / 60  # minutes
-                
-                if time_diff > 180:  # 3 hours
-                    alerts.append({
-                        'message': f'No movement detected for {int(time_diff/60)} hours',
-                        'type': 'activity',
-                        'priority': '  hours',
-                        'type': 'activity',
-                        'priority': 'critical'
-                    })
-                elif time_diff > 120:  # 2 hours
-                    alerts.append({
-                        'message': f'No movement detected for {int(time_diff/60)} hours',
-                        'type': 'activity',
-                        'priority': 'high'
-                    })
-                elif time_diff > 60:  # 1 hour
-                    alerts.append({
-                        'message': f'No movement detected for {int(time_diff/60)} hour',
-                        'type': 'activity',
-                        'priority': 'medium'
-                    })
+                last_movement_time = datetime.strptime(activity_data['last_movement'], '%Y-%m-%d %H:%M:%S')
+                time_diff = (datetime.now() - last_movement_time).total_seconds() / 60  # minutes
+                columns['inactive_minutes'] = [time_diff]
+                columns['inactive_hours'] = [int(time_diff / 60)]
             except:
                 pass
         
-        # Check for unusual location patterns
+        # Time spent at the current location, for the safety rules
         if 'location' in activity_data and 'duration' in activity_data:
-            location = activity_data['location']
-            duration = activity_data['duration']  # in minutes
-            
-            if location == 'Bathroom' and duration > 30:
-                alerts.append({
-                    'message': f'Extended time in bathroom: {duration} minutes',
-                    'type': 'safety',
-                    'priority': 'high'
-                })
-            elif location == 'Floor' and duration > 1:
-                alerts.append({
-                    'message': f'Possible fall detected: {duration} minutes on floor',
-                    'type': 'safety',
-                    'priority': 'critical'
-                })
+            columns['location'] = [activity_data['location']]
+            columns['duration'] = [activity_data['duration']]  # in minutes
         
-        return alerts
+        return columns
+    
+    def _user_ids(self, data):
+        return [data['user_id']] if data.get('user_id') is not None else None
     
     def send_emergency_alert(self, alert, contacts):
         """Send emergency alert to contacts"""
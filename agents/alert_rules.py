@@ -0,0 +1,273 @@
+import json
+import operator
+import os
+import string
+import threading
+import time
+
+import numpy as np
+
+# Rule file shared with the dashboard's monitoring code (lib/setup-monitoring.ts)
+RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "alert_rules.json")
+# Optional per-resident threshold overrides: {"<user_id>": {"<threshold name>": value}}
+OVERRIDES_PATH = os.environ.get("ELDERCARE_ALERT_OVERRIDES")
+# Minimum seconds between checks of the rule and override files for edits
+RELOAD_INTERVAL = 1.0
+
+_OPERATORS = {
+    ">": operator.gt, ">=": operator.ge, "<": operator.lt, "<=": operator.le,
+    "==": operator.eq, "!=": operator.ne,
+}
+
+class _RuleSet:
+    """Rules and overrides compiled from the files at one point in time"""
+
+    def __init__(self, spec, overrides):
+        self.threshold_names = list(spec["thresholds"])
+        self.threshold_index = {name: i for i, name in enumerate(self.threshold_names)}
+        self.defaults = [float(spec["thresholds"][name]) for name in self.threshold_names]
+
+        self.rules = {}
+        self.numeric_fields = {}
+        self.text_fields = {}
+        for category, rules in spec["rules"].items():
+            compiled, numeric, text = [], set(), set()
+            for rule in rules:
+                compiled.append(self._compile(rule, compiled, numeric, text))
+            # Message fields are read as columns too, to tell which readings lack them
+            for rule in compiled:
+                numeric.update(set(rule["message_fields"]) - text)
+            self.rules[category] = compiled
+            self.numeric_fields[category] = sorted(numeric)
+            self.text_fields[category] = sorted(text)
+
+        # Overrides as a sorted id array and a (residents x thresholds) table, NaN where unset
+        self.override_ids = np.array(sorted(overrides), dtype=np.int64)
+        self.override_table = np.full((len(self.override_ids), len(self.threshold_names)), np.nan)
+        for row, user_id in enumerate(self.override_ids.tolist()):
+            for name, value in overrides[user_id].items():
+                if name not in self.threshold_index:
+                    raise ValueError(f"Override for resident {user_id} names unknown threshold {name}")
+                self.override_table[row, self.threshold_index[name]] = float(value)
+        self.overridden = np.flatnonzero(~np.isnan(self.override_table).all(axis=0))
+
+    def _compile(self, rule, earlier, numeric, text):
+        mode = "all" if "all" in rule else "any"
+        conditions = []
+        for field, op, value in rule[mode]:
+            if op not in _OPERATORS:
+                raise ValueError(f"Rule {rule['name']}: unknown operator {op}")
+            if isinstance(value, str) and op not in ("==", "!="):
+                # Ordered comparisons refer to a named (overridable) threshold
+                if value not in self.threshold_index:
+                    raise ValueError(f"Rule {rule['name']}: unknown threshold {value}")
+                conditions.append((field, _OPERATORS[op], self.threshold_index[value], None))
+                numeric.add(field)
+            else:
+                conditions.append((field, _OPERATORS[op], None, value))
+                (text if isinstance(value, str) else numeric).add(field)
+
+        # unless lists earlier rules whose match suppresses this one (an elif chain)
+        names = [r["name"] for r in earlier]
+        unless = []
+        for name in rule.get("unless", []):
+            if name not in names:
+                raise ValueError(f"Rule {rule['name']}: unless must name an earlier rule, not {name}")
+            unless.append(names.index(name))
+
+        message_fields = {field for _, field, _, _ in string.Formatter().parse(rule["message"]) if field}
+        # A missing value never passes a comparison the rule requires, so only check the others
+        if mode == "all" or len(conditions) == 1:
+            message_fields -= {field for field, compare, _, _ in conditions if compare is not operator.ne}
+
+        return {
+            "name": rule["name"],
+            "combine": np.logical_and if mode == "all" else np.logical_or,
+            "conditions": conditions,
+            "unless": unless,
+            "type": rule["type"],
+            "priority": rule["priority"],
+            "message": rule["message"],
+            "message_fields": sorted(message_fields),
+        }
+
+    def thresholds_for(self, user_ids):
+        """Threshold values, as arrays per reading where a resident overrides them"""
+        values = list(self.defaults)
+        if user_ids is None or not len(self.override_ids):
+            return values
+
+        user_ids = np.asarray(user_ids, dtype=np.int64)
+        pos = np.searchsorted(self.override_ids, user_ids).clip(max=len(self.override_ids) - 1)
+        hit = self.override_ids[pos] == user_ids
+        if hit.any():
+            for t in self.overridden:
+                override = self.override_table[pos, t]
+                values[t] = np.where(hit & ~np.isnan(override), override, values[t])
+        return values
+
+class _Row:
+    """Message formatting view of reading i"""
+
+    def __init__(self, columns, i):
+        self.columns = columns
+        self.i = i
+
+    def __getitem__(self, name):
+        value = self.columns[name][self.i]
+        return value.item() if isinstance(value, np.generic) else value
+
+class AlertRules:
+    """
+    Alert rules compiled from a JSON rule file into vectorized checks.
+
+    The file holds named thresholds and, per category, an ordered list of
+    rules: conditions over reading fields combined with "any" or "all", an
+    optional "unless" list of earlier rules, and the alert type, priority
+    and message template. Readings are evaluated as NumPy columns, with
+    missing values (None/NaN) never matching, and a rule never applies to
+    a reading missing a field its message shows. Per-resident threshold
+    overrides come from a second JSON file; both files are reloaded when
+    they change, without a restart.
+    """
+
+    def __init__(self, rules_path=RULES_PATH, overrides_path=OVERRIDES_PATH):
+        self.rules_path = rules_path
+        self.overrides_path = overrides_path
+        self.reload_error = None
+        self._lock = threading.Lock()
+        self._mtimes = self._file_mtimes()
+        self._checked = time.monotonic()
+        self._ruleset = self._load()
+
+    def _file_mtimes(self):
+        mtimes = []
+        for path in (self.rules_path, self.overrides_path):
+            try:
+                mtimes.append(os.stat(path).st_mtime_ns if path else None)
+            except FileNotFoundError:
+                mtimes.append(None)
+        return mtimes
+
+    def _load(self):
+        with open(self.rules_path) as f:
+            spec = json.load(f)
+
+        overrides = {}
+        if self.overrides_path and os.path.exists(self.overrides_path):
+            with open(self.overrides_path) as f:
+                overrides = {int(user_id): thresholds for user_id, thresholds in json.load(f).items()}
+
+        return _RuleSet(spec, overrides)
+
+    def reload(self):
+        """Recompile the rule and override files now"""
+        with self._lock:
+            self._mtimes = self._file_mtimes()
+            self._ruleset = self._load()
+            self.reload_error = None
+
+    def _current(self):
+        now = time.monotonic()
+        if now - self._checked >= RELOAD_INTERVAL:
+            self._checked = now
+            if self._file_mtimes() != self._mtimes:
+                try:
+                    self.reload()
+                except (OSError, ValueError, KeyError, TypeError) as e:
+                    # Keep alerting with the last good rules until the file is fixed
+                    self.reload_error = e
+        return self._ruleset
+
+    def thresholds(self, user_id=None):
+        """Threshold values by name, with the resident's overrides applied"""
+        ruleset = self._current()
+        values = ruleset.thresholds_for(None if user_id is None else [user_id])
+        return {name: float(np.asarray(value).ravel()[0]) for name, value in zip(ruleset.threshold_names, values)}
+
+    def evaluate(self, category, columns, user_ids=None):
+        """
+        Evaluate a category's rules over columns of readings (a dict of
+        equal-length sequences keyed by field). user_ids, one per reading,
+        applies per-resident overrides. Returns the rules and a boolean
+        (rules x readings) array of matches.
+        """
+        ruleset = self._current()
+        rules = ruleset.rules[category]
+
+        lengths = {len(values) for values in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError("All columns must have the same length")
+        n = lengths.pop() if lengths else 0
+
+        values = {}
+        for field in ruleset.numeric_fields[category]:
+            values[field] = np.asarray(columns[field], dtype=float) if field in columns else np.full(n, np.nan)
+        for field in ruleset.text_fields[category]:
+            values[field] = np.asarray(columns[field], dtype=object) if field in columns else np.full(n, None, dtype=object)
+
+        thresholds = ruleset.thresholds_for(user_ids)
+        present = {}
+        matched = np.zeros((len(rules), n), dtype=bool)
+        for r, rule in enumerate(rules):
+            mask = None
+            for field, compare, threshold, literal in rule["conditions"]:
+                result = compare(values[field], thresholds[threshold] if threshold is not None else literal)
+                mask = result if mask is None else rule["combine"](mask, result)
+            for field in rule["message_fields"]:
+                if field not in present:
+                    column = values[field]
+                    present[field] = ~np.isnan(column) if column.dtype == float else np.not_equal(column, None)
+                mask = mask & present[field]
+            for earlier in rule["unless"]:
+                mask = mask & ~matched[earlier]
+            matched[r] = mask
+
+        return rules, matched
+
+    def crosses(self, category, reading, priority="critical"):
+        """
+        Whether one reading (a dict of fields, with 'user_id' for overrides)
+        matches a rule of the given priority. Plain Python comparisons, so
+        a single reading is screened in microseconds, without building columns.
+        """
+        ruleset = self._current()
+        user_id = reading.get('user_id')
+        thresholds = ruleset.thresholds_for(None if user_id is None else [user_id])
+
+        matched = []
+        for rule in ruleset.rules[category]:
+            results = []
+            for field, compare, threshold, literal in rule["conditions"]:
+                value = reading.get(field)
+                if value is None or value != value:
+                    results.append(False)
+                    continue
+                limit = literal if threshold is None else thresholds[threshold]
+                if isinstance(limit, np.ndarray):
+                    limit = float(limit[0])
+                results.append(bool(compare(value, limit)))
+            hit = all(results) if rule["combine"] is np.logical_and else any(results)
+            hit = hit and not any(matched[earlier] for earlier in rule["unless"])
+            hit = hit and all(reading.get(field) is not None and reading.get(field) == reading.get(field)
+                              for field in rule["message_fields"])
+            if hit and rule["priority"] == priority:
+                return True
+            matched.append(hit)
+        return False
+
+    def alerts(self, category, columns, user_ids=None):
+        """Like evaluate, but returns one list of alert dicts per reading"""
+        rules, matched = self.evaluate(category, columns, user_ids)
+
+        alerts = [[] for _ in range(matched.shape[1])]
+        # Scanning readings-major keeps each reading's alerts in rule order
+        readings, rule_index = np.nonzero(matched.T)
+        for i, r in zip(readings.tolist(), rule_index.tolist()):
+            rule = rules[r]
+            alerts[i].append({
+                'message': rule["message"].format_map(_Row(columns, i)),
+                'type': rule["type"],
+                'priority': rule["priority"]
+            })
+        return alerts
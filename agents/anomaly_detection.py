@@ -0,0 +1,216 @@
+import math
+import threading
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from agents.vitals_state import VITALS_METRICS
+
+# Earlier readings each new reading is compared with
+ANOMALY_WINDOW = 60
+# Readings needed before a metric is scored at all
+MIN_HISTORY = 10
+# |z| above this flags a reading, for the rolling mean/std and EWMA scores
+ZSCORE_THRESHOLD = 4.0
+# |modified z| (deviation from the median in robust standard deviations) above this flags a reading
+ROBUST_THRESHOLD = 4.0
+# Readings are flagged as anomalous when at least this many of the three scores agree.
+# With these settings Gaussian noise gives well under one false flag per metric per
+# day of per-minute readings (see benchmarks/bench_anomaly_detection.py)
+MIN_VOTES = 2
+# Weight of the newest reading in the EWMA mean and variance
+EWMA_ALPHA = 0.05
+# Spreads are floored at the readings' resolution (1 BPM, mmHg or mg/dL), so a
+# perfectly steady window does not make every small change infinitely unusual
+MIN_SPREAD = 1.0
+# MAD of a normal distribution is 0.6745 standard deviations
+MAD_SCALE = 0.6745
+# Windows scored per chunk by the batch detectors, bounding their memory
+WINDOW_CHUNK = 16384
+
+# Per-reading scores; NaN where a reading is missing or has too little history
+SCORES_DTYPE = np.dtype([("zscore", "f8"), ("ewma_zscore", "f8"), ("robust_zscore", "f8")])
+
+def _sorted_median(ordered):
+    mid = len(ordered) // 2
+    return float(ordered[mid]) if len(ordered) % 2 else float(ordered[mid - 1] + ordered[mid]) / 2
+
+def _window_scores(value, history):
+    """Rolling z-score, robust z-score and median of one value against earlier readings"""
+    # One sort serves both medians; for windows this small it beats np.median/np.std call overhead
+    ordered = np.sort(history)
+    mean = float(ordered.sum()) / len(ordered)
+    deviations = ordered - mean
+    std = math.sqrt(float(deviations.dot(deviations)) / (len(ordered) - 1))
+    median = _sorted_median(ordered)
+    mad = _sorted_median(np.sort(np.abs(ordered - median)))
+    zscore = (value - mean) / max(std, MIN_SPREAD)
+    robust = (value - median) / max(mad / MAD_SCALE, MIN_SPREAD)
+    return zscore, robust, median
+
+def _votes(scores):
+    """How many of the three detectors flag each scored reading"""
+    return ((np.abs(scores["zscore"]) > ZSCORE_THRESHOLD).astype(int)
+            + (np.abs(scores["ewma_zscore"]) > ZSCORE_THRESHOLD)
+            + (np.abs(scores["robust_zscore"]) > ROBUST_THRESHOLD))
+
+def rolling_scores(values, window=ANOMALY_WINDOW):
+    """
+    Score each reading of one resident's series against the `window`
+    readings before it: z-score from their mean and standard deviation,
+    and robust z-score from their median and MAD. Missing readings (NaN)
+    are skipped. Returns (zscore, robust_zscore) arrays.
+    """
+    values = np.asarray(values, dtype=float)
+    present = np.flatnonzero(~np.isnan(values))
+    x = values[present]
+    n = len(x)
+    zscore = np.full(n, np.nan)
+    robust = np.full(n, np.nan)
+
+    # Warm-up: score against every earlier reading until a full window exists
+    for i in range(MIN_HISTORY, min(window, n)):
+        zscore[i], robust[i], _ = _window_scores(x[i], x[:i])
+
+    if n > window:
+        # windows[k] is x[k:k + window], the history of x[k + window]; a view, not a copy
+        windows = sliding_window_view(x[:-1], window)
+        for start in range(0, len(windows), WINDOW_CHUNK):
+            w = windows[start:start + WINDOW_CHUNK]
+            current = x[window + start:window + start + len(w)]
+
+            std = np.maximum(w.std(axis=1, ddof=1), MIN_SPREAD)
+            zscore[window + start:window + start + len(w)] = (current - w.mean(axis=1)) / std
+
+            median = np.median(w, axis=1)
+            mad = np.median(np.abs(w - median[:, None]), axis=1)
+            spread = np.maximum(mad / MAD_SCALE, MIN_SPREAD)
+            robust[window + start:window + start + len(w)] = (current - median) / spread
+
+    full_z = np.full(len(values), np.nan)
+    full_robust = np.full(len(values), np.nan)
+    full_z[present] = zscore
+    full_robust[present] = robust
+    return full_z, full_robust
+
+def ewma_zscores(values, alpha=EWMA_ALPHA):
+    """
+    z-score of each reading against an exponentially weighted mean and
+    variance of the readings before it; missing readings (NaN) are skipped
+    """
+    values = np.asarray(values, dtype=float)
+    zscore = np.full(len(values), np.nan)
+
+    mean = var = None
+    seen = 0
+    # The recursion is inherently sequential; plain floats keep each step cheap
+    for i, x in enumerate(values.tolist()):
+        if x != x:
+            continue
+        if seen == 0:
+            mean, var = x, 0.0
+        else:
+            if seen >= MIN_HISTORY:
+                zscore[i] = (x - mean) / max(math.sqrt(var), MIN_SPREAD)
+            delta = x - mean
+            mean += alpha * delta
+            var = (1 - alpha) * (var + alpha * delta * delta)
+        seen += 1
+
+    return zscore
+
+def score_series(values, window=ANOMALY_WINDOW):
+    """All three anomaly scores for one resident's series, as a SCORES_DTYPE array"""
+    scores = np.zeros(len(values), dtype=SCORES_DTYPE)
+    scores["zscore"], scores["robust_zscore"] = rolling_scores(values, window)
+    scores["ewma_zscore"] = ewma_zscores(values)
+    return scores
+
+def anomaly_mask(scores):
+    """Readings flagged by at least MIN_VOTES of the detectors"""
+    return _votes(scores) >= MIN_VOTES
+
+class StreamingAnomalyDetector:
+    """
+    Live per-resident anomaly scoring of vitals.
+
+    For each resident and metric it keeps a ring buffer of the last
+    `window` readings (float32) and an EWMA mean and variance, so a new
+    reading is scored against its own history in O(window) without
+    touching the database: about 1 KB per resident with the default window.
+    """
+
+    def __init__(self, window=ANOMALY_WINDOW, capacity=1024):
+        self.window = window
+        self._rows = {}
+        self._buffers = np.zeros((capacity, len(VITALS_METRICS), window), dtype=np.float32)
+        self._counts = np.zeros((capacity, len(VITALS_METRICS)), dtype=np.int64)
+        self._ewma = np.zeros((capacity, len(VITALS_METRICS), 2), dtype=np.float64)
+        self._lock = threading.Lock()
+
+    def _row(self, user_id):
+        row = self._rows.get(user_id)
+        if row is None:
+            row = len(self._rows)
+            if row == len(self._counts):
+                self._buffers = np.concatenate([self._buffers, np.zeros_like(self._buffers)])
+                self._counts = np.concatenate([self._counts, np.zeros_like(self._counts)])
+                self._ewma = np.concatenate([self._ewma, np.zeros_like(self._ewma)])
+            self._rows[user_id] = row
+        return row
+
+    def score(self, user_id, heart_rate=None, systolic=None, diastolic=None, glucose=None):
+        """
+        Score a reading against the resident's history without recording it.
+        Returns {metric: {'value', 'zscore', 'ewma_zscore', 'robust_zscore',
+        'median', 'anomalous'}} for the metrics with enough history.
+        """
+        readings = (heart_rate, systolic, diastolic, glucose)
+
+        with self._lock:
+            row = self._rows.get(user_id)
+            if row is None:
+                return {}
+            counts = self._counts[row].copy()
+            histories = [self._buffers[row, m, :min(counts[m], self.window)].astype(np.float64)
+                         if value is not None else None for m, value in enumerate(readings)]
+            ewma = self._ewma[row].copy()
+
+        results = {}
+        for m, value in enumerate(readings):
+            if value is None or counts[m] < MIN_HISTORY:
+                continue
+            zscore, robust, median = _window_scores(float(value), histories[m])
+            mean, var = ewma[m]
+            scores = np.array([(zscore, (value - mean) / max(math.sqrt(var), MIN_SPREAD), robust)], dtype=SCORES_DTYPE)
+            results[VITALS_METRICS[m]] = {
+                'value': value,
+                'zscore': float(scores["zscore"][0]),
+                'ewma_zscore': float(scores["ewma_zscore"][0]),
+                'robust_zscore': float(scores["robust_zscore"][0]),
+                'median': float(median),
+                'anomalous': bool(anomaly_mask(scores)[0]),
+            }
+        return results
+
+    def update(self, user_id, heart_rate=None, systolic=None, diastolic=None, glucose=None):
+        """Add a reading to the resident's history; missing (None) metrics are skipped"""
+        readings = (heart_rate, systolic, diastolic, glucose)
+
+        with self._lock:
+            row = self._row(user_id)
+            for m, value in enumerate(readings):
+                if value is None:
+                    continue
+                value = float(value)
+                n = self._counts[row, m]
+                self._buffers[row, m, n % self.window] = value
+                self._counts[row, m] = n + 1
+
+                ewma = self._ewma[row, m]
+                if n == 0:
+                    ewma[:] = (value, 0.0)
+                else:
+                    delta = value - ewma[0]
+                    ewma[0] += EWMA_ALPHA * delta
+                    ewma[1] = (1 - EWMA_ALPHA) * (ewma[1] + EWMA_ALPHA * delta * delta)
@@ -0,0 +1,259 @@
+import atexit
+import queue
+import threading
+from collections import defaultdict
+from concurrent.futures import Future
+
+from database.db_manager import create_alert
+
+# Events a topic's queue holds before publishers are pushed back
+EVENT_QUEUE_SIZE = 10000
+# Most events a worker hands to its handler at once
+EVENT_BATCH_SIZE = 256
+# Seconds publish() waits for room in a full queue before raising Backpressure
+PUBLISH_TIMEOUT = 0.5
+
+# Queued to stop a worker
+_STOP = object()
+
+class Backpressure(RuntimeError):
+    """A topic's queue stayed full for the whole publish timeout"""
+
+class EventBus:
+    """
+    In-process publish/subscribe with a bounded queue per topic.
+
+    Each subscribed topic has worker threads that take the queued events in
+    batches of up to batch_size and pass them to the topic's handler.
+    publish() returns as soon as the event is queued; when the queue is
+    full it waits up to PUBLISH_TIMEOUT and then raises Backpressure, so a
+    burst slows publishers down instead of growing memory.
+    """
+
+    def __init__(self, maxsize=EVENT_QUEUE_SIZE):
+        self.maxsize = maxsize
+        self._topics = {}
+        self._closed = False
+        atexit.register(self.close)
+
+    def subscribe(self, topic, handler, batch_size=EVENT_BATCH_SIZE, workers=1, on_error=None):
+        """
+        Start workers that call handler(events) with batches from topic.
+        Use one worker where events must be handled in order.
+        """
+        if topic in self._topics:
+            raise ValueError(f"Topic {topic} already has a subscriber")
+        events = queue.Queue(self.maxsize)
+        threads = [threading.Thread(target=self._run, args=(events, handler, batch_size, on_error),
+                                    name=f"event-{topic}-{i}", daemon=True) for i in range(workers)]
+        self._topics[topic] = (events, threads)
+        for thread in threads:
+            thread.start()
+
+    def publish(self, topic, event, timeout=PUBLISH_TIMEOUT):
+        """Queue an event for the topic's workers"""
+        if self._closed:
+            raise RuntimeError("Event bus is closed")
+        try:
+            self._topics[topic][0].put(event, timeout=timeout)
+        except queue.Full:
+            raise Backpressure(f"{topic} queue is full ({self.maxsize} events)") from None
+
+    def depth(self, topic):
+        """Events queued for a topic and not yet taken by a worker"""
+        return self._topics[topic][0].qsize()
+
+    def join(self):
+        """Block until every event published so far has been handled"""
+        for events, _ in self._topics.values():
+            events.join()
+
+    def close(self):
+        """Handle what is queued, then stop the workers"""
+        if self._closed:
+            return
+        self._closed = True
+        for events, threads in self._topics.values():
+            for _ in threads:
+                events.put(_STOP)
+        for _, threads in self._topics.values():
+            for thread in threads:
+                thread.join()
+
+    def _run(self, events, handler, batch_size, on_error):
+        while True:
+            batch = [events.get()]
+            # Take whatever else is already queued, up to a batch
+            while len(batch) < batch_size and batch[-1] is not _STOP:
+                try:
+                    batch.append(events.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = batch[-1] is _STOP
+            work = batch[:-1] if stop else batch
+            try:
+                if work:
+                    handler(work)
+            except Exception as e:
+                if on_error is not None:
+                    on_error(e, work)
+            finally:
+                for _ in batch:
+                    events.task_done()
+            if stop:
+                return
+
+class ReadingPipeline:
+    """
+    Evaluates health and activity readings from the ingestion endpoints off
+    the request path.
+
+    Readings are published to the 'health' and 'activity' topics. One
+    worker per topic scores, evaluates and stores alerts for a whole batch
+    at a time. Each resident's readings are evaluated in the order they
+    were published, for the streaming vitals and anomaly state and the
+    order of their alerts.
+
+    A reading that crosses a critical alert rule is not queued behind
+    other residents' readings: if its resident has nothing queued, it is
+    evaluated on the publisher's thread; otherwise it is queued behind that
+    resident's readings and the publisher waits for it. Either way its
+    result is returned, so the caller can wait for the alert to be written.
+    When a queue is full the reading is handled the same way, so overload
+    slows ingestion down to the agents' pace rather than dropping
+    evaluations.
+    """
+
+    def __init__(self, coordinator, bus=None, batch_size=EVENT_BATCH_SIZE):
+        self.coordinator = coordinator
+        self.bus = bus or EventBus()
+        # (topic, user_id) -> readings queued or being evaluated, and the
+        # residents with one being evaluated on a publisher's thread
+        self._pending = defaultdict(int)
+        self._inline = set()
+        self._order = threading.Condition()
+        self.bus.subscribe('health', self._handler('health', self.evaluate_health), batch_size,
+                           on_error=self._log_error('health'))
+        self.bus.subscribe('activity', self._handler('activity', self.evaluate_activity), batch_size,
+                           on_error=self._log_error('activity'))
+
+    def publish_health(self, reading):
+        """
+        Hand a health reading (with numeric systolic/diastolic) to the
+        workers. Returns None once queued, or the evaluation result
+        ({'alerts', 'anomalies'}) of a reading evaluated right away.
+        """
+        return self._publish('health', reading, self.evaluate_health)
+
+    def publish_activity(self, activity):
+        """Like publish_health, for activity entries; results have 'alerts'"""
+        return self._publish('activity', activity, self.evaluate_activity)
+
+    def _publish(self, topic, event, evaluate):
+        key = (topic, event['user_id'])
+        urgent = self.coordinator.alert_agent.is_emergency(topic, event)
+        with self._order:
+            if not urgent and self._queue(topic, key, event, None, timeout=0):
+                return None
+            if not self._pending[key]:
+                # Nothing of this resident's is waiting, so it can go first
+                self._pending[key] += 1
+                self._inline.add(key)
+                inline = True
+            else:
+                inline = False
+        
+        if inline:
+            try:
+                return evaluate([event])[0]
+            finally:
+                with self._order:
+                    self._inline.discard(key)
+                    self._finished([key])
+        
+        # Behind the resident's queued readings, waiting for room if need be
+        future = Future()
+        self._queue(topic, key, event, future, timeout=None)
+        return future.result()
+
+    def _queue(self, topic, key, event, future, timeout):
+        # Counted before it is queued, so the worker can never finish it first
+        with self._order:
+            self._pending[key] += 1
+        try:
+            self.bus.publish(topic, (event, future), timeout=timeout)
+            return True
+        except Backpressure:
+            with self._order:
+                self._finished([key])
+            return False
+
+    def _finished(self, keys):
+        for key in keys:
+            self._pending[key] -= 1
+            if not self._pending[key]:
+                del self._pending[key]
+        self._order.notify_all()
+
+    def _handler(self, topic, evaluate):
+        def handle(events):
+            keys = [(topic, event['user_id']) for event, _ in events]
+            try:
+                with self._order:
+                    # A reading published earlier is being evaluated on its publisher's thread
+                    self._order.wait_for(lambda: self._inline.isdisjoint(keys))
+                results = evaluate([event for event, _ in events])
+            except Exception as e:
+                for _, future in events:
+                    if future is not None:
+                        future.set_exception(e)
+                raise
+            finally:
+                with self._order:
+                    self._finished(keys)
+            for (_, future), result in zip(events, results):
+                if future is not None:
+                    future.set_result(result)
+        return handle
+
+    def evaluate_health(self, readings):
+        """Score, evaluate and store the alerts of a batch of health readings"""
+        health_agent = self.coordinator.health_agent
+        anomalies = []
+        for reading in readings:
+            # Score against the resident's history before adding the reading to it
+            anomalies.append(health_agent.detect_anomalies(reading))
+            health_agent.record_vitals(reading['user_id'], reading['heart_rate'], reading['systolic'],
+                                       reading['diastolic'], reading['glucose'])
+
+        alerts = self.coordinator.alert_agent.evaluate_health_alerts_batch(
+            [reading['heart_rate'] for reading in readings],
+            [reading['systolic'] for reading in readings],
+            [reading['diastolic'] for reading in readings],
+            [reading['glucose'] for reading in readings],
+            user_ids=[reading['user_id'] for reading in readings]
+        )
+        self._store_alerts(readings, alerts)
+        return [{'alerts': reading_alerts, 'anomalies': reading_anomalies}
+                for reading_alerts, reading_anomalies in zip(alerts, anomalies)]
+
+    def evaluate_activity(self, activities):
+        """Evaluate and store the alerts of a batch of activity entries"""
+        alerts = [self.coordinator.alert_agent.evaluate_activity_alert(activity) for activity in activities]
+        self._store_alerts(activities, alerts)
+        return [{'alerts': activity_alerts} for activity_alerts in alerts]
+
+    def _store_alerts(self, readings, alerts):
+        for reading, reading_alerts in zip(readings, alerts):
+            for alert in reading_alerts:
+                alert['id'] = create_alert(reading['user_id'], alert['message'], alert['type'], alert['priority'])
+
+    def _log_error(self, topic):
+        def on_error(error, events):
+            self.coordinator.log.record(topic, 'error', f'{len(events)} queued events failed: {error}')
+        return on_error
+
+    def close(self):
+        """Evaluate what is queued and stop the workers"""
+        self.bus.close()
@@ -2,6 +2,116 @@ import numpy as np
 from datetime import datetime
 import random
 
+from agents.vitals_state import VitalsStreamState
+from agents.anomaly_detection import StreamingAnomalyDetector, score_series, anomaly_mask
+
+# Display names and units of the vitals metrics
+METRIC_LABELS = {
+    "heart_rate": ("heart rate", "BPM"),
+    "systolic": ("systolic blood pressure", "mmHg"),
+    "diastolic": ("diastolic blood pressure", "mmHg"),
+    "glucose": ("glucose", "mg/dL"),
+}
+
+# Per-resident statistics computed by HealthMonitorAgent.analyze_residents
+STATS_DTYPE = np.dtype([("count", "i8"), ("mean", "f8"), ("min", "f8"), ("max", "f8")])
+
+def _segment_offsets(values, offsets):
+    """Flatten stacked (residents x samples) values, or check ragged values against offsets"""
+    values = np.asarray(values, dtype=float)
+    if offsets is None:
+        if values.ndim != 2:
+            raise ValueError("Expected a 2-D (residents x samples) array or flat values with offsets")
+        residents, samples = values.shape
+        return values.ravel(), np.arange(residents + 1) * samples
+    
+    offsets = np.asarray(offsets, dtype=np.int64)
+    if values.ndim != 1 or offsets.ndim != 1 or offsets[0] != 0 or offsets[-1] != len(values) or np.any(np.diff(offsets) < 0):
+        raise ValueError("offsets must run from 0 to len(values) without decreasing")
+    return values, offsets
+
+def _segment_stats(values, offsets):
+    """
+    Count, mean, min and max of each values[offsets[i]:offsets[i + 1]] in one
+    pass, ignoring NaN (missing readings or padding); empty segments give NaN
+    """
+    stats = np.zeros(len(offsets) - 1, dtype=STATS_DTYPE)
+    stats[["mean", "min", "max"]] = (np.nan, np.nan, np.nan)
+    if len(values) == 0:
+        return stats
+    
+    valid = ~np.isnan(values)
+    # reduceat runs each start to the next one, so only non-empty segments are reduced
+    non_empty = np.flatnonzero(np.diff(offsets) > 0)
+    starts = offsets[non_empty]
+    
+    count = np.add.reduceat(valid.astype(np.int64), starts)
+    total = np.add.reduceat(np.where(valid, values, 0.0), starts)
+    minimum = np.minimum.reduceat(np.where(valid, values, np.inf), starts)
+    maximum = np.maximum.reduceat(np.where(valid, values, -np.inf), starts)
+    
+    has_data = count > 0
+    rows = non_empty[has_data]
+    stats["count"][non_empty] = count
+    stats["mean"][rows] = total[has_data] / count[has_data]
+    stats["min"][rows] = minimum[has_data]
+    stats["max"][rows] = maximum[has_data]
+    return stats
+
+class HealthBatchResult:
+    """
+    Per-resident vitals statistics and threshold flags from
+    HealthMonitorAgent.analyze_residents.
+
+    heart_rate, systolic, diastolic and glucose are STATS_DTYPE arrays (None
+    for metrics that were not given) and flags maps each flag name to a
+    boolean array, all indexed by resident. Text is only rendered on
+    request, by render(i) or by iterating.
+    """
+    
+    def __init__(self, agent, user_ids, heart_rate, systolic, diastolic, glucose, flags):
+        self.agent = agent
+        self.user_ids = user_ids
+        self.heart_rate = heart_rate
+        self.systolic = systolic
+        self.diastolic = diastolic
+        self.glucose = glucose
+        self.flags = flags
+    
+    def __len__(self):
+        return len(self.user_ids)
+    
+    def __iter__(self):
+        return (self.render(i) for i in range(len(self)))
+    
+    def needs_attention(self):
+        """Indices of residents with any warning flag set"""
+        warnings = [mask for name, mask in self.flags.items() if not name.endswith("normal")]
+        if not warnings:
+            return np.array([], dtype=np.int64)
+        return np.flatnonzero(np.logical_or.reduce(warnings))
+    
+    def render(self, i):
+        """Render resident i's analysis as the per-resident analyze_* methods would"""
+        sections = []
+        
+        if self.heart_rate is not None and self.heart_rate["count"][i]:
+            hr = self.heart_rate[i]
+            sections.append(self.agent._render_heart_rate(hr["mean"], hr["max"], hr["min"]))
+        
+        if self.systolic is not None and self.systolic["count"][i] and self.diastolic["count"][i]:
+            sys, dia = self.systolic[i], self.diastolic[i]
+            sections.append(self.agent._render_blood_pressure(sys["mean"], dia["mean"], sys["max"], dia["max"]))
+        
+        if self.glucose is not None and self.glucose["count"][i]:
+            glucose = self.glucose[i]
+            sections.append(self.agent._render_glucose(glucose["mean"], glucose["max"], glucose["min"]))
+        
+        if not sections:
+            return "No health data available for analysis."
+        
+        return "\n".join(sections)
+
 class HealthMonitorAgent:
     """
     Agent responsible for monitoring and analyzing health data
@@ -10,16 +120,18 @@ class HealthMonitorAgent:
     def __init__(self):
         self.name = "Health Monitor Agent"
         self.description = "Monitors vital signs and provides health insights"
+        # Running per-resident stats and recent history, updated as readings arrive
+        self.vitals = VitalsStreamState()
+        self.anomaly_detector = StreamingAnomalyDetector()
         
     def analyze_heart_rate(self, heart_rate_data):
-        """Analyze heart rate data and provide insights"""
-        if not heart_rate_data:
+        """Analyze heart rate data (a list or NumPy array) and provide insights"""
+        if len(heart_rate_data) == 0:
             return "No heart rate data available for analysis."
         
-        avg_hr = np.mean(heart_rate_data)
-        max_hr = np.max(heart_rate_data)
-        min_hr = np.min(heart_rate_data)
-        
+        return self._render_heart_rate(np.mean(heart_rate_data), np.max(heart_rate_data), np.min(heart_rate_data))
+    
+    def _render_heart_rate(self, avg_hr, max_hr, min_hr):
         analysis = f"Heart Rate Analysis:\n"
         analysis += f"- Average: {avg_hr:.1f} BPM\n"
         analysis += f"- Maximum: {max_hr:.1f} BPM\n"
@@ -36,15 +148,15 @@ class HealthMonitorAgent:
         return analysis
     
     def analyze_blood_pressure(self, systolic_data, diastolic_data):
-        """Analyze blood pressure data and provide insights"""
-        if not systolic_data or not diastolic_data:
+        """Analyze blood pressure data (lists or NumPy arrays) and provide insights"""
+        if len(systolic_data) == 0 or len(diastolic_data) == 0:
             return "No blood pressure data available for analysis."
         
-        avg_sys = np.mean(systolic_data)
-        avg_dia = np.mean(diastolic_data)
-        max_sys = np.max(systolic_data)
-        max_dia = np.max(diastolic_data)
-        
+        return self._render_blood_pressure(
+            np.mean(systolic_data), np.mean(diastolic_data), np.max(systolic_data), np.max(diastolic_data)
+        )
+    
+    def _render_blood_pressure(self, avg_sys, avg_dia, max_sys, max_dia):
         analysis = f"Blood Pressure Analysis:\n"
         analysis += f"- Average: {avg_sys:.1f}/{avg_dia:.1f} mmHg\n"
         analysis += f"- Maximum: {max_sys:.1f}/{max_dia:.1f} mmHg\n\n"
@@ -62,14 +174,13 @@ class HealthMonitorAgent:
         return analysis
     
     def analyze_glucose(self, glucose_data):
-        """Analyze glucose data and provide insights"""
-        if not glucose_data:
+        """Analyze glucose data (a list or NumPy array) and provide insights"""
+        if len(glucose_data) == 0:
             return "No glucose data available for analysis."
         
-        avg_glucose = np.mean(glucose_data)
-        max_glucose = np.max(glucose_data)
-        min_glucose = np.min(glucose_data)
-        
+        return self._render_glucose(np.mean(glucose_data), np.max(glucose_data), np.min(glucose_data))
+    
+    def _render_glucose(self, avg_glucose, max_glucose, min_glucose):
         analysis = f"Glucose Analysis:\n"
         analysis += f"- Average: {avg_glucose:.1f} mg/dL\n"
         analysis += f"- Maximum: {max_glucose:.1f} mg/dL\n"
@@ -85,6 +196,112 @@ class HealthMonitorAgent:
         
         return analysis
     
+    def analyze_health_summary(self, summary):
+        """
+        Analyze precomputed per-metric statistics (as returned by
+        get_health_rollup_summary) without reading the raw samples
+        """
+        sections = []
+        
+        if 'heart_rate' in summary:
+            hr = summary['heart_rate']
+            sections.append(self._render_heart_rate(hr['mean'], hr['max'], hr['min']))
+        
+        if 'systolic' in summary and 'diastolic' in summary:
+            sys, dia = summary['systolic'], summary['diastolic']
+            sections.append(self._render_blood_pressure(sys['mean'], dia['mean'], sys['max'], dia['max']))
+        
+        if 'glucose' in summary:
+            glucose = summary['glucose']
+            sections.append(self._render_glucose(glucose['mean'], glucose['max'], glucose['min']))
+        
+        if not sections:
+            return "No health data available for analysis."
+        
+        return "\n".join(sections)
+    
+    def record_vitals(self, user_id, heart_rate=None, systolic=None, diastolic=None, glucose=None):
+        """Fold a new reading into the resident's streaming vitals state and anomaly history"""
+        self.vitals.update(user_id, heart_rate, systolic, diastolic, glucose)
+        self.anomaly_detector.update(user_id, heart_rate, systolic, diastolic, glucose)
+    
+    def analyze_current_vitals(self, user_id):
+        """
+        Analyze a resident's current average, spread and trend from the
+        streaming vitals state, without rereading their history
+        """
+        snapshot = self.vitals.snapshot(user_id)
+        if not snapshot:
+            return "No health data available for analysis."
+        
+        analysis = self.analyze_health_summary(snapshot)
+        
+        analysis += "\nCurrent Trends:\n"
+        for name, label, unit in (("heart_rate", "Heart rate", "BPM"), ("systolic", "Systolic", "mmHg"),
+                                  ("diastolic", "Diastolic", "mmHg"), ("glucose", "Glucose", "mg/dL")):
+            if name in snapshot:
+                stats = snapshot[name]
+                analysis += (f"- {label}: {stats['mean']:.1f} ± {stats['std']:.1f} {unit} over {stats['count']} readings, "
+                             f"recently {stats['ewma']:.1f} ({stats['trend']})\n")
+        
+        return analysis
+    
+    def analyze_residents(self, heart_rate=None, systolic=None, diastolic=None, glucose=None,
+                          offsets=None, user_ids=None):
+        """
+        Analyze many residents' vitals at once.
+
+        Each metric is either a stacked (residents x samples) array, padded
+        with NaN, or flat values for all residents with offsets (length
+        residents + 1) marking where each resident's samples start. Stats
+        and the same threshold checks as analyze_heart_rate,
+        analyze_blood_pressure and analyze_glucose are computed for everyone
+        in one vectorized pass; returns a HealthBatchResult.
+        """
+        stats = {}
+        residents = None
+        for name, values in (("heart_rate", heart_rate), ("systolic", systolic),
+                             ("diastolic", diastolic), ("glucose", glucose)):
+            if values is None:
+                stats[name] = None
+                continue
+            stats[name] = _segment_stats(*_segment_offsets(values, offsets))
+            if residents is not None and len(stats[name]) != residents:
+                raise ValueError("All metrics must cover the same residents")
+            residents = len(stats[name])
+        
+        if residents is None:
+            raise ValueError("No health data given for analysis")
+        
+        # NaN compares False, so residents without data never raise a flag
+        flags = {}
+        hr = stats["heart_rate"]
+        if hr is not None:
+            flags["heart_rate_high"] = hr["max"] > 100
+            flags["heart_rate_low"] = hr["min"] < 60
+            flags["heart_rate_normal"] = (hr["min"] >= 60) & (hr["max"] <= 100)
+        
+        sys, dia = stats["systolic"], stats["diastolic"]
+        if sys is not None and dia is not None:
+            elevated = (sys["mean"] > 140) | (dia["mean"] > 90)
+            flags["blood_pressure_elevated"] = elevated
+            flags["blood_pressure_prehypertension"] = ~elevated & ((sys["mean"] > 120) | (dia["mean"] > 80))
+            flags["blood_pressure_peak_high"] = (sys["max"] > 140) | (dia["max"] > 90)
+            flags["blood_pressure_normal"] = (sys["mean"] <= 120) & (dia["mean"] <= 80)
+        
+        glu = stats["glucose"]
+        if glu is not None:
+            flags["glucose_high"] = glu["max"] > 140
+            flags["glucose_low"] = glu["min"] < 70
+            flags["glucose_normal"] = (glu["min"] >= 70) & (glu["max"] <= 140)
+        
+        if user_ids is None:
+            user_ids = np.arange(residents)
+        elif len(user_ids) != residents:
+            raise ValueError("user_ids must have one entry per resident")
+        
+        return HealthBatchResult(self, np.asarray(user_ids), stats["heart_rate"], sys, dia, glu, flags)
+    
     def get_recommendations(self):
         """Generate health recommendations based on analysis"""
         # In a real implementation, this would be based on actual health data analysis
@@ -100,24 +317,66 @@ class HealthMonitorAgent:
         return recommendations
     
     def detect_anomalies(self, health_data):
-        """Detect anomalies in health data"""
+        """
+        Detect anomalies in a reading: fixed thresholds, plus (when it has a
+        user_id) values that are unusual for that resident's recent history
+        """
         anomalies = []
         
-        # In a real implementation, this would use statistical methods or ML
-        # For demo purposes, we're using simple thresholds
         if 'heart_rate' in health_data and health_data['heart_rate'] > 100:
             anomalies.append(f"Elevated heart rate: {health_data['heart_rate']} BPM")
         
-        if 'bp' in health_data:
+        systolic = health_data.get('systolic')
+        diastolic = health_data.get('diastolic')
+        if (systolic is None or diastolic is None) and 'bp' in health_data:
             systolic, diastolic = map(int, health_data['bp'].split('/'))
+        
+        if systolic is not None and diastolic is not None:
             if systolic > 140 or diastolic > 90:
-                anomalies.append(f"Elevated blood pressure: {health_data['bp']} mmHg")
+                anomalies.append(f"Elevated blood pressure: {systolic}/{diastolic} mmHg")
         
         if 'glucose' in health_data and health_data['glucose'] > 140:
             anomalies.append(f"Elevated glucose: {health_data['glucose']} mg/dL")
         
+        if health_data.get('user_id') is not None:
+            scores = self.anomaly_detector.score(
+                health_data['user_id'], health_data.get('heart_rate'), systolic, diastolic, health_data.get('glucose')
+            )
+            for metric, score in scores.items():
+                if score['anomalous']:
+                    label, unit = METRIC_LABELS[metric]
+                    anomalies.append(
+                        f"Unusual {label} for this resident: {score['value']} {unit} "
+                        f"(recent median {score['median']:.0f}, z-score {score['zscore']:.1f})"
+                    )
+        
         return anomalies
     
+    def find_vitals_anomalies(self, columns):
+        """
+        Find statistical anomalies in a resident's historical vitals, given
+        as columns (see get_health_data_columns), with the same rolling
+        z-score, EWMA and median/MAD detectors as the live stream. Returns
+        the flagged readings in time order.
+        """
+        findings = []
+        for metric in METRIC_LABELS:
+            if metric not in columns:
+                continue
+            scores = score_series(columns[metric])
+            for i in np.flatnonzero(anomaly_mask(scores)):
+                findings.append({
+                    'timestamp': str(columns['timestamp'][i]).replace('T', ' '),
+                    'metric': metric,
+                    'value': float(columns[metric][i]),
+                    'zscore': float(scores['zscore'][i]),
+                    'ewma_zscore': float(scores['ewma_zscore'][i]),
+                    'robust_zscore': float(scores['robust_zscore'][i]),
+                })
+        
+        findings.sort(key=lambda finding: finding['timestamp'])
+        return findings
+    
     def respond_to_query(self, query):
         """Respond to a user query about health"""
         # In a real implementation, this would use NLP to understand the query
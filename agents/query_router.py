@@ -0,0 +1,103 @@
+import functools
+import re
+import threading
+import time
+from collections import OrderedDict
+
+# Keywords that route a chat query to each agent; agents earlier in the
+# table win ties. Shared by AgentCoordinator.process_query and the dashboard.
+AGENT_KEYWORDS = {
+    'health': ('heart', 'blood pressure', 'blood', 'health', 'glucose'),
+    'activity': ('activity', 'movement', 'exercise', 'walk', 'step'),
+    'reminder': ('reminder', 'medication', 'appointment'),
+    'alert': ('alert', 'emergency', 'fall', 'help'),
+    'social': ('social', 'family', 'friend', 'call'),
+}
+# Kinds of resident data (see db_manager.DATA_KINDS) each agent's answers depend on
+AGENT_DATA = {
+    'health': ('health',),
+    'activity': ('activity',),
+    'reminder': ('reminders',),
+    'alert': ('alerts',),
+    'social': ('social',),
+}
+# Cached query responses, and how long (seconds) one may be served
+QUERY_CACHE_SIZE = 1024
+QUERY_CACHE_TTL = 60.0
+
+def normalize_query(query):
+    """Lowercase a query and collapse its whitespace, for routing and cache keys"""
+    return ' '.join(query.lower().split())
+
+class QueryRouter:
+    """
+    Routes chat queries to agents by keyword with one compiled regex.
+
+    All keywords are matched in a single pass over the normalized query
+    (like the old substring checks, so "steps" matches "step"). route()
+    returns the agents with a match, the most keyword hits first; routes
+    of recent queries are memoized, since chat clients repeat a few.
+    """
+
+    def __init__(self, keywords=AGENT_KEYWORDS):
+        self._rank = {agent: i for i, agent in enumerate(keywords)}
+        self._agent_of = {}
+        for agent, words in keywords.items():
+            for word in words:
+                self._agent_of.setdefault(word, agent)
+        # Longest first, so "blood pressure" is matched whole rather than as "blood"
+        self._pattern = re.compile('|'.join(map(re.escape, sorted(self._agent_of, key=len, reverse=True))))
+        self._cached_route = functools.lru_cache(QUERY_CACHE_SIZE)(self._route)
+
+    def route(self, query):
+        """Agents whose keywords appear in a normalized query, best match first"""
+        return self._cached_route(query)
+
+    def _route(self, query):
+        hits = {}
+        for match in self._pattern.finditer(query):
+            agent = self._agent_of[match.group()]
+            hits[agent] = hits.get(agent, 0) + 1
+        return tuple(sorted(hits, key=lambda agent: (-hits[agent], self._rank[agent])))
+
+class ResponseCache:
+    """
+    LRU cache of query responses with a TTL.
+
+    Each entry records the version of the data it was computed from (e.g.
+    db_manager.data_version(...)); a lookup with a different current
+    version is a miss, so answers are dropped as soon as the data changes.
+    """
+
+    def __init__(self, maxsize=QUERY_CACHE_SIZE, ttl=QUERY_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, version):
+        """The cached response for key at this data version, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, cached_version, response = entry
+            if expires <= time.monotonic() or cached_version != version:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return response
+
+    def put(self, key, version, response):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, version, response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
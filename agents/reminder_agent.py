@@ -2,6 +2,11 @@ from datetime import datetime, timedelta
 import random
 import json
 
+def _minutes(time_text):
+    """Minutes since midnight of an "HH:MM" time"""
+    hours, minutes = time_text.split(':')
+    return int(hours) * 60 + int(minutes)
+
 class ReminderAgent:
     """
     Agent responsible for managing reminders and schedules
@@ -12,7 +17,11 @@ class ReminderAgent:
         self.description = "Manages medication schedules, appointments, and daily activities"
         
     def check_due_reminders(self, reminders, current_time=None, current_day=None):
-        """Check for reminders that are due at the current time and day"""
+        """
+        Check a list of reminders for ones due at the current time and day.
+        For the whole facility, ReminderScheduler fires reminders as they
+        come due instead of scanning them.
+        """
         if current_time is None:
             current_time = datetime.now().strftime('%H:%M')
         
@@ -22,17 +31,15 @@ class ReminderAgent:
         
         due_reminders = []
         
+        # Parse the current time once; reminder times are plain "HH:MM"
+        current_minutes = _minutes(current_time)
+        
         for reminder in reminders:
-            # Check if reminder is due at current time and day
-            reminder_time = reminder['time']
-            reminder_days = reminder['days']
+            if reminder['status'] != 'pending' or current_day not in reminder['days']:
+                continue
             
             # Time comparison - allow for 5 minute buffer
-            current_dt = datetime.strptime(current_time, '%H:%M')
-            reminder_dt = datetime.strptime(reminder_time, '%H:%M')
-            time_diff = abs((current_dt - reminder_dt).total_seconds() / 60)
-            
-            if time_diff <= 5 and current_day in reminder_days and reminder['status'] == 'pending':
+            if abs(current_minutes - _minutes(reminder['time'])) <= 5:
                 due_reminders.append(reminder)
         
         return due_reminders
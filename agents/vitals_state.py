@@ -0,0 +1,180 @@
+import os
+import threading
+
+import numpy as np
+
+# Metrics tracked per resident, in column order
+VITALS_METRICS = ["heart_rate", "systolic", "diastolic", "glucose"]
+
+# Weight of the newest reading in the exponentially weighted moving average
+EWMA_ALPHA = 0.3
+# How far (in standard deviations) the EWMA must sit from the mean to count as a trend
+TREND_THRESHOLD = 0.5
+# Readings needed before a trend is reported
+MIN_TREND_READINGS = 5
+
+# Per-metric float fields, the last axis of VitalsStreamState._values.
+# The EWMA starts from zero and is bias-corrected when read, so it weights
+# recent readings more than the mean even for short histories.
+_MEAN, _M2, _MIN, _MAX, _EWMA = range(5)
+
+class VitalsStreamState:
+    """
+    Running statistics of each resident's vitals, updated in O(1) per reading.
+
+    Per resident and metric it keeps a count, Welford mean and M2 (for the
+    variance), min, max and an EWMA in preallocated NumPy arrays (about 200
+    bytes a resident, ~2 MB for 10k), so current average, spread and trend
+    never need the reading history.
+    """
+
+    def __init__(self, capacity=1024):
+        self._rows = {}
+        self._user_ids = np.zeros(capacity, dtype=np.int64)
+        self._counts = np.zeros((capacity, len(VITALS_METRICS)), dtype=np.int64)
+        self._values = np.zeros((capacity, len(VITALS_METRICS), 5), dtype=np.float64)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._rows)
+
+    def nbytes(self):
+        """Memory held by the state arrays"""
+        return self._user_ids.nbytes + self._counts.nbytes + self._values.nbytes
+
+    def _row(self, user_id):
+        row = self._rows.get(user_id)
+        if row is None:
+            row = len(self._rows)
+            if row == len(self._user_ids):
+                # Grow by doubling so appends stay amortized O(1)
+                self._user_ids = np.concatenate([self._user_ids, np.zeros_like(self._user_ids)])
+                self._counts = np.concatenate([self._counts, np.zeros_like(self._counts)])
+                self._values = np.concatenate([self._values, np.zeros_like(self._values)])
+            self._rows[user_id] = row
+            self._user_ids[row] = user_id
+        return row
+
+    def update(self, user_id, heart_rate=None, systolic=None, diastolic=None, glucose=None):
+        """Fold one reading into a resident's state; missing (None) metrics are skipped"""
+        readings = (heart_rate, systolic, diastolic, glucose)
+
+        with self._lock:
+            row = self._row(user_id)
+            counts = self._counts[row]
+            values = self._values[row]
+
+            for metric, x in enumerate(readings):
+                if x is None:
+                    continue
+                x = float(x)
+                stats = values[metric]
+                n = counts[metric] + 1
+                counts[metric] = n
+
+                if n == 1:
+                    stats[:] = (x, 0.0, x, x, EWMA_ALPHA * x)
+                    continue
+
+                # Welford's update keeps the variance numerically stable
+                delta = x - stats[_MEAN]
+                stats[_MEAN] += delta / n
+                stats[_M2] += delta * (x - stats[_MEAN])
+                stats[_MIN] = min(stats[_MIN], x)
+                stats[_MAX] = max(stats[_MAX], x)
+                stats[_EWMA] += EWMA_ALPHA * (x - stats[_EWMA])
+
+    def snapshot(self, user_id):
+        """
+        Get a resident's current stats per metric: count, mean, std, min,
+        max, ewma and trend ('rising', 'falling' or 'stable'), or None if
+        nothing has been recorded for them.
+        """
+        with self._lock:
+            row = self._rows.get(user_id)
+            if row is None:
+                return None
+            counts = self._counts[row].copy()
+            values = self._values[row].copy()
+
+        snapshot = {}
+        for metric, name in enumerate(VITALS_METRICS):
+            n = counts[metric]
+            if not n:
+                continue
+            mean, m2, minimum, maximum, ewma = values[metric]
+            std = float(np.sqrt(m2 / (n - 1))) if n > 1 else 0.0
+            ewma /= 1 - (1 - EWMA_ALPHA) ** n
+            snapshot[name] = {
+                'count': int(n),
+                'mean': float(mean),
+                'std': std,
+                'min': float(minimum),
+                'max': float(maximum),
+                'ewma': float(ewma),
+                'trend': _trend(n, ewma - mean, std),
+            }
+        return snapshot
+
+    def metric_arrays(self, metric):
+        """
+        Get one metric for every tracked resident as arrays: user_id, count,
+        mean, std, min, max and ewma (NaN where a resident has no readings)
+        """
+        column = VITALS_METRICS.index(metric)
+        with self._lock:
+            rows = len(self._rows)
+            user_ids = self._user_ids[:rows].copy()
+            counts = self._counts[:rows, column].copy()
+            values = self._values[:rows, column].copy()
+
+        values[counts == 0] = np.nan
+        with np.errstate(invalid='ignore', divide='ignore'):
+            std = np.where(counts > 1, np.sqrt(values[:, _M2] / (counts - 1)), 0.0)
+            ewma = values[:, _EWMA] / (1 - (1 - EWMA_ALPHA) ** counts)
+
+        return {
+            'user_id': user_ids,
+            'count': counts,
+            'mean': values[:, _MEAN],
+            'std': np.where(counts > 0, std, np.nan),
+            'min': values[:, _MIN],
+            'max': values[:, _MAX],
+            'ewma': ewma,
+        }
+
+    def save(self, path):
+        """Write the state to a .npz file, replacing it atomically"""
+        with self._lock:
+            rows = len(self._rows)
+            arrays = {
+                'user_ids': self._user_ids[:rows].copy(),
+                'counts': self._counts[:rows].copy(),
+                'values': self._values[:rows].copy(),
+            }
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, metrics=np.array(VITALS_METRICS), **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Create a state from a file written by save()"""
+        with np.load(path) as data:
+            if list(data['metrics']) != VITALS_METRICS:
+                raise ValueError(f"{path} was saved with different metrics")
+            user_ids, counts, values = data['user_ids'], data['counts'], data['values']
+
+        state = cls(capacity=max(len(user_ids), 1))
+        rows = len(user_ids)
+        state._user_ids[:rows] = user_ids
+        state._counts[:rows] = counts
+        state._values[:rows] = values
+        state._rows = {int(user_id): row for row, user_id in enumerate(user_ids)}
+        return state
+
+def _trend(count, deviation, std):
+    if count < MIN_TREND_READINGS or std == 0 or abs(deviation) < TREND_THRESHOLD * std:
+        return 'stable'
+    return 'rising' if deviation > 0 else 'falling'
@@ -1,15 +1,27 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from database.db_manager import (
-    record_health_data, get_latest_health_data, get_health_data_range,
-    record_activity, get_daily_activity_summary, get_activity_data_range,
-    add_reminder, get_due_reminders, update_reminder_status, delete_reminder,
-    create_alert, get_active_alerts, resolve_alert,
+    record_health_data, record_health_data_bulk, get_latest_health_data,
+    iter_health_data_range, get_health_data_page, get_health_data_columns,
+    parse_health_reading, parse_activity_entry, get_health_rollups, get_health_rollup_summary,
+    record_activity, get_daily_activity_summary, iter_activity_data_range, get_activity_data_page,
+    add_reminder, get_due_reminders, get_due_reminders_all, update_reminder_status, delete_reminder,
+    create_alert, get_active_alerts, get_all_active_alerts, resolve_alert,
     record_social_interaction, get_weekly_social_summary, add_social_event, get_upcoming_social_events,
+    get_resident_timezone, set_resident_timezone,
+    ALERT_PRIORITY_RANKS, LOWEST_PRIORITY_RANK,
     create_tables
 )
-from agents.agent_coordinator import AgentCoordinator
-from datetime import datetime
+from database.write_buffer import WriteBehindBuffer
+from database.reminder_scheduler import ReminderScheduler
+from database.metrics import registry as metrics
+from agents.agent_coordinator import AgentCoordinator, AGENT_TIMEOUT
+from agents.vitals_state import VitalsStreamState
+from agents.event_pipeline import ReadingPipeline
+from datetime import datetime, timedelta
+import atexit
+import base64
 import json
+import os
 
 # Initialize Flask app
 app = Flask(__name__)
@@ -20,6 +32,100 @@ agent_coordinator = AgentCoordinator()
 # Ensure database tables exist
 create_tables()
 
+# Fires pending reminders at their scheduled time; clients poll
+# /api/reminders/fired for the ones that fired
+reminder_scheduler = ReminderScheduler().start()
+
+# Optional write-behind buffer that group-commits sensor inserts
+# (enable with ELDERCARE_WRITE_BEHIND=1)
+write_buffer = WriteBehindBuffer() if os.environ.get('ELDERCARE_WRITE_BEHIND') == '1' else None
+
+# Optional pipeline that evaluates readings on background agent workers, so
+# ingestion returns after the write (enable with ELDERCARE_EVENT_PIPELINE=1)
+event_pipeline = ReadingPipeline(agent_coordinator) if os.environ.get('ELDERCARE_EVENT_PIPELINE') == '1' else None
+
+# Optional file the streaming vitals state is loaded from at startup and
+# saved to at exit (set ELDERCARE_VITALS_STATE to a .npz path)
+VITALS_STATE_PATH = os.environ.get('ELDERCARE_VITALS_STATE')
+if VITALS_STATE_PATH:
+    if os.path.exists(VITALS_STATE_PATH):
+        agent_coordinator.health_agent.vitals = VitalsStreamState.load(VITALS_STATE_PATH)
+    atexit.register(lambda: agent_coordinator.health_agent.vitals.save(VITALS_STATE_PATH))
+
+# Seconds an ingestion request that raised an alert waits for its buffered
+# write to commit before answering 503 (the write stays queued)
+WRITE_WAIT_TIMEOUT = 10.0
+
+# Maximum number of readings accepted by /api/health/batch
+MAX_HEALTH_BATCH = 10000
+
+# Maximum page size for paginated range queries
+MAX_PAGE_SIZE = 10000
+
+def encode_cursor(key):
+    """Encode a (ts, id) keyset as an opaque cursor string"""
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+def decode_cursor(cursor):
+    """Decode a cursor from encode_cursor back into a (ts, id) keyset"""
+    ts, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    return int(ts), int(row_id)
+
+def range_response(iter_range, get_page, user_id, start_date, end_date):
+    """
+    Respond with the rows of a range query.
+
+    Dates are ISO strings; plain dates are the resident's calendar days. With
+    ?limit= a single page is returned along with next_cursor; pass it back
+    as ?cursor= to continue. Otherwise rows are streamed, as NDJSON if
+    requested (?format=ndjson or Accept: application/x-ndjson) or as a JSON
+    array, so memory stays flat regardless of the range size.
+    """
+    try:
+        after = decode_cursor(request.args['cursor']) if 'cursor' in request.args else None
+    except (ValueError, TypeError):
+        return jsonify({'error': 'Invalid cursor'}), 400
+    
+    try:
+        limit = request.args.get('limit', type=int)
+        if limit is not None:
+            rows, next_key = get_page(user_id, start_date, end_date, max(1, min(limit, MAX_PAGE_SIZE)), after)
+            return jsonify({
+                'data': rows,
+                'next_cursor': encode_cursor(next_key) if next_key else None
+            })
+        
+        rows = iter_range(user_id, start_date, end_date, after=after)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    if request.args.get('format') == 'ndjson' or 'application/x-ndjson' in request.headers.get('Accept', ''):
+        return Response((json.dumps(row) + '\n' for row in rows), mimetype='application/x-ndjson')
+    
+    def json_array():
+        yield '['
+        for i, row in enumerate(rows):
+            yield (',' if i else '') + json.dumps(row)
+        yield ']'
+    
+    return Response(json_array(), mimetype='application/json')
+
+def committed_response(write_seq, body):
+    """
+    Respond with body once a buffered write has committed. A write still
+    queued after WRITE_WAIT_TIMEOUT gets a 503 with 'queued' instead, never
+    a success, so an alerting reading is only acknowledged once it is durable.
+    """
+    try:
+        write_buffer.wait_for(write_seq, WRITE_WAIT_TIMEOUT)
+    except TimeoutError:
+        return jsonify({**body, 'success': False, 'error': 'Reading not committed yet', 'queued': True}), 503
+    return jsonify(body)
+
+def priority_rank(priority):
+    """Urgency rank of an alert priority (lower is more urgent)"""
+    return ALERT_PRIORITY_RANKS.get(priority, LOWEST_PRIORITY_RANK)
+
 # Health endpoints
 @app.route('/api/health', methods=['GET'])
 def get_health():
@@ -28,8 +134,7 @@ def get_health():
     if 'start_date' in request.args and 'end_date' in request.args:
         start_date = request.args.get('start_date')
         end_date = request.args.get('end_date')
-        health_data = get_health_data_range(user_id, start_date, end_date)
-        return jsonify(health_data)
+        return range_response(iter_health_data_range, get_health_data_page, user_id, start_date, end_date)
     else:
         health_data = get_latest_health_data(user_id)
         return jsonify(health_data if health_data else {'error': 'No health data found'})
@@ -42,47 +147,186 @@ def post_health():
         return jsonify({'error': 'Missing required fields'}), 400
     
     try:
-        record_health_data(data['user_id'], data['heart_rate'], data['bp'], data['glucose'])
+        reading = parse_health_reading(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        if write_buffer:
+            write_seq = write_buffer.record_health_data(
+                reading['user_id'], reading['heart_rate'], reading['bp'], reading['glucose'], reading['timestamp']
+            )
+        else:
+            record_health_data(reading['user_id'], reading['heart_rate'], reading['bp'], reading['glucose'], reading['timestamp'])
+        
+        if event_pipeline:
+            # Queued for the workers, unless it is critical (or the queue is full) and was evaluated here
+            result = event_pipeline.publish_health({**data, **reading})
+            if result is None:
+                return jsonify({'success': True, 'queued': True}), 202
+            if write_buffer and result['alerts']:
+                return committed_response(write_seq, {'success': True, **result})
+            return jsonify({'success': True, **result})
+        
+        # Score the reading against the resident's recent history before adding it
+        anomalies = agent_coordinator.health_agent.detect_anomalies({**data, **reading})
+        agent_coordinator.health_agent.record_vitals(
+            reading['user_id'], reading['heart_rate'], reading['systolic'], reading['diastolic'], reading['glucose']
+        )
         
         # Run health agent to analyze the data
         agent_result = agent_coordinator.run_agent('health', {
-            'heart_rate': data['heart_rate'],
-            'systolic': int(data['bp'].split('/')[0]),
-            'diastolic': int(data['bp'].split('/')[1]),
-            'glucose': data['glucose']
+            'heart_rate': reading['heart_rate'],
+            'systolic': reading['systolic'],
+            'diastolic': reading['diastolic'],
+            'glucose': reading['glucose']
         })
         
         # Check for potential health alerts
         alert_result = agent_coordinator.run_agent('alert', {
-            'health_data': data
+            'health_data': {**data, **reading}
         })
         
-        return jsonify({
+        body = {
             'success': True,
             'analysis': agent_result.get('result', ''),
-            'alerts': alert_result.get('result', [])
+            'alerts': alert_result.get('result', []),
+            'anomalies': anomalies
+        }
+        # Readings that trigger alert rules must be durable before we answer
+        if write_buffer and alert_result.get('result'):
+            return committed_response(write_seq, body)
+        return jsonify(body)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/health/batch', methods=['POST'])
+def post_health_batch():
+    data = request.json
+    readings = data.get('readings') if isinstance(data, dict) else data
+    
+    if not isinstance(readings, list) or not readings:
+        return jsonify({'error': 'Expected a non-empty list of readings'}), 400
+    
+    if len(readings) > MAX_HEALTH_BATCH:
+        return jsonify({'error': f'Batch exceeds {MAX_HEALTH_BATCH} readings'}), 413
+    
+    # Per-reading result: 'ok', the highest alert priority, or 'invalid'
+    status = ['invalid'] * len(readings)
+    valid_index = []
+    valid = []
+    
+    for i, reading in enumerate(readings):
+        try:
+            valid.append(parse_health_reading(reading))
+        except (KeyError, TypeError, ValueError):
+            continue
+        valid_index.append(i)
+    
+    try:
+        stored = record_health_data_bulk(valid)
+        
+        for r in valid:
+            agent_coordinator.health_agent.record_vitals(r['user_id'], r['heart_rate'], r['systolic'], r['diastolic'], r['glucose'])
+        
+        # Evaluate alerts for the whole batch at once
+        batch_alerts = agent_coordinator.alert_agent.evaluate_health_alerts_batch(
+            [r['heart_rate'] for r in valid],
+            [r['systolic'] for r in valid],
+            [r['diastolic'] for r in valid],
+            [r['glucose'] for r in valid],
+            user_ids=[r['user_id'] for r in valid]
+        )
+        
+        alerts = []
+        for i, reading_alerts in zip(valid_index, batch_alerts):
+            status[i] = 'ok'
+            for alert in reading_alerts:
+                alerts.append({'index': i, **alert})
+                # Keep the most urgent priority
+                if status[i] == 'ok' or priority_rank(alert['priority']) < priority_rank(status[i]):
+                    status[i] = alert['priority']
+        
+        return jsonify({
+            'success': True,
+            'received': len(readings),
+            'stored': stored,
+            'status': status,
+            'alerts': alerts
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/health/current', methods=['GET'])
+def get_current_health():
+    user_id = request.args.get('user_id', 1, type=int)
+    
+    try:
+        # Served from the streaming state, so no history is read
+        snapshot = agent_coordinator.health_agent.vitals.snapshot(user_id)
+        if not snapshot:
+            return jsonify({'error': 'No health data found'}), 404
+        
+        agent_result = agent_coordinator.run_agent('health', {'current': user_id})
+        return jsonify({
+            'stats': snapshot,
+            'analysis': agent_result.get('result', '')
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/health/anomalies', methods=['GET'])
+def get_health_anomalies():
+    user_id = request.args.get('user_id', 1, type=int)
+    end_date = request.args.get('end_date', datetime.now().strftime('%Y-%m-%d'))
+    start_date = request.args.get('start_date', (datetime.now() - timedelta(days=28)).strftime('%Y-%m-%d'))
+    
+    try:
+        columns = get_health_data_columns(user_id, start_date, end_date)
+        return jsonify(agent_coordinator.health_agent.find_vitals_anomalies(columns))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/health/trends', methods=['GET'])
+def get_health_trends():
+    user_id = request.args.get('user_id', 1, type=int)
+    period = request.args.get('period', 'day')
+    end_date = request.args.get('end_date', datetime.now().strftime('%Y-%m-%d 23:59:59'))
+    start_date = request.args.get('start_date', (datetime.now() - timedelta(days=28)).strftime('%Y-%m-%d'))
+    
+    try:
+        if 'metric' in request.args:
+            return jsonify(get_health_rollups(user_id, request.args['metric'], period, start_date, end_date))
+        
+        summary = get_health_rollup_summary(user_id, start_date, end_date)
+        agent_result = agent_coordinator.run_agent('health', {'summary': summary})
+        return jsonify({
+            'summary': summary,
+            'analysis': agent_result.get('result', '')
+        })
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 # Activity endpoints
 @app.route('/api/activity', methods=['GET'])
 def get_activity():
     user_id = request.args.get('user_id', 1, type=int)
     
-    if 'date' in request.args:
-        date = request.args.get('date')
-        activity_data = get_daily_activity_summary(user_id, date)
-        return jsonify(activity_data)
-    elif 'start_date' in request.args and 'end_date' in request.args:
+    if 'start_date' in request.args and 'end_date' in request.args:
         start_date = request.args.get('start_date')
         end_date = request.args.get('end_date')
-        activity_data = get_activity_data_range(user_id, start_date, end_date)
-        return jsonify(activity_data)
-    else:
-        today = datetime.now().strftime('%Y-%m-%d')
-        activity_data = get_daily_activity_summary(user_id, today)
-        return jsonify(activity_data)
+        return range_response(iter_activity_data_range, get_activity_data_page, user_id, start_date, end_date)
+    
+    # A calendar day in the resident's timezone, today by default
+    try:
+        activity_data = get_daily_activity_summary(user_id, request.args.get('date'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(activity_data)
 
 @app.route('/api/activity', methods=['POST'])
 def post_activity():
@@ -92,8 +336,23 @@ def post_activity():
         return jsonify({'error': 'Missing required fields'}), 400
     
     try:
-        status = data.get('status', 'active')
-        record_activity(data['user_id'], data['activity'], status)
+        entry = parse_activity_entry(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        if write_buffer:
+            write_seq = write_buffer.record_activity(entry['user_id'], entry['activity'], entry['status'], entry['timestamp'])
+        else:
+            record_activity(entry['user_id'], entry['activity'], entry['status'], entry['timestamp'])
+        
+        if event_pipeline:
+            result = event_pipeline.publish_activity({**data, **entry})
+            if result is None:
+                return jsonify({'success': True, 'queued': True}), 202
+            if write_buffer and result['alerts']:
+                return committed_response(write_seq, {'success': True, **result})
+            return jsonify({'success': True, **result})
         
         # Run activity agent to analyze the data
         agent_result = agent_coordinator.run_agent('activity', {
@@ -103,14 +362,37 @@ def post_activity():
         
         # Check for potential activity alerts
         alert_result = agent_coordinator.run_agent('alert', {
-            'activity_data': data
+            'activity_data': {**data, **entry}
         })
         
-        return jsonify({
+        body = {
             'success': True,
             'analysis': agent_result.get('result', ''),
             'alerts': alert_result.get('result', [])
-        })
+        }
+        if write_buffer and alert_result.get('result'):
+            return committed_response(write_seq, body)
+        return jsonify(body)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# Resident endpoints
+@app.route('/api/residents/<int:user_id>/timezone', methods=['GET'])
+def get_timezone(user_id):
+    return jsonify({'user_id': user_id, 'timezone': get_resident_timezone(user_id)})
+
+@app.route('/api/residents/<int:user_id>/timezone', methods=['PUT'])
+def put_timezone(user_id):
+    data = request.json
+    
+    if not data or 'timezone' not in data:
+        return jsonify({'error': 'Missing timezone field'}), 400
+    
+    try:
+        set_resident_timezone(user_id, data['timezone'])
+        return jsonify({'success': True})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -128,6 +410,32 @@ def get_reminders():
         # In a real app, you would have an endpoint to get all reminders
         return jsonify({'error': 'Time parameter required'}), 400
 
+@app.route('/api/reminders/due', methods=['GET'])
+def get_all_due_reminders():
+    time = request.args.get('time', datetime.now().strftime('%H:%M'))
+    day = request.args.get('day', datetime.now().strftime('%a'))
+    window = request.args.get('window', 5, type=int)
+    
+    try:
+        reminders = get_due_reminders_all(time, day, window)
+        return jsonify(reminders)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/reminders/fired', methods=['GET'])
+def get_fired_reminders():
+    # Pass the returned 'seq' back as 'after' to get only newer reminders
+    after = request.args.get('after', 0, type=int)
+    user_id = request.args.get('user_id', type=int)
+    
+    try:
+        reminders, seq = reminder_scheduler.fired_after(after, user_id)
+        return jsonify({'reminders': reminders, 'seq': seq})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/reminders', methods=['POST'])
 def post_reminder():
     data = request.json
@@ -136,8 +444,8 @@ def post_reminder():
         return jsonify({'error': 'Missing required fields'}), 400
     
     try:
-        add_reminder(data['user_id'], data['message'], data['time'], data['days'], data['type'])
-        return jsonify({'success': True})
+        reminder_id = add_reminder(data['user_id'], data['message'], data['time'], data['days'], data['type'])
+        return jsonify({'success': True, 'id': reminder_id})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -173,6 +481,16 @@ def get_alerts():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/alerts/all', methods=['GET'])
+def get_facility_alerts():
+    limit = request.args.get('limit', type=int)
+    
+    try:
+        alerts = get_all_active_alerts(limit)
+        return jsonify(alerts)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/alerts', methods=['POST'])
 def post_alert():
     data = request.json
@@ -181,8 +499,9 @@ def post_alert():
         return jsonify({'error': 'Missing required fields'}), 400
     
     try:
-        create_alert(data['user_id'], data['message'], data['type'], data['priority'])
-        return jsonify({'success': True})
+        # Repeats of an open alert are merged into it, so the id may be an existing alert's
+        alert_id = create_alert(data['user_id'], data['message'], data['type'], data['priority'])
+        return jsonify({'success': True, 'id': alert_id})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -257,6 +576,16 @@ def post_event():
 def get_agent_status():
     return jsonify(agent_coordinator.get_agent_status())
 
+@app.route('/api/agents/log', methods=['GET'])
+def get_agent_log():
+    limit = request.args.get('limit', 10, type=int)
+    return jsonify(agent_coordinator.get_log(limit))
+
+@app.route('/api/agents/metrics', methods=['GET'])
+def get_agent_metrics():
+    # Prometheus text exposition format
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/api/agents/run', methods=['POST'])
 def run_agent():
     data = request.json
@@ -267,7 +596,11 @@ def run_agent():
     agent_type = data['agent_type']
     agent_data = data.get('data', {})
     
-    result = agent_coordinator.run_agent(agent_type, agent_data)
+    # 'all' runs every agent concurrently, each with an optional 'timeout' in seconds
+    if agent_type == 'all':
+        result = agent_coordinator.run_all_agents(agent_data, data.get('timeout', AGENT_TIMEOUT))
+    else:
+        result = agent_coordinator.run_agent(agent_type, agent_data)
     return jsonify(result)
 
 @app.route('/api/agents/query', methods=['POST'])
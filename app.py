@@ -10,7 +10,8 @@ from agents.activity_agent import ActivityMonitorAgent
 from agents.reminder_agent import ReminderAgent
 from agents.alert_agent import AlertAgent
 from agents.social_agent import SocialAgent
-from database.db_manager import create_tables, get_db_connection
+from agents.query_router import QueryRouter, normalize_query
+from database.db_manager import create_tables, db_connection
 
 # Initialize the database
 create_tables()
@@ -44,6 +45,16 @@ reminder_agent = ReminderAgent()
 alert_agent = AlertAgent()
 social_agent = SocialAgent()
 
+# Chat queries are routed by the same keyword table as the API
+query_router = QueryRouter()
+chat_agents = {
+    'health': health_agent,
+    'activity': activity_agent,
+    'reminder': reminder_agent,
+    'alert': alert_agent,
+    'social': social_agent
+}
+
 # Helper function to get mock data
 def get_mock_health_data():
     # In a real app, this would come from the database
@@ -227,7 +238,7 @@ elif page == "Health Monitoring":
         
         # Analysis from health agent
         st.subheader("AI Analysis")
-        analysis = health_agent.analyze_heart_rate(health_data['heart_rate'].tolist())
+        analysis = health_agent.analyze_heart_rate(health_data['heart_rate'].to_numpy())
         st.write(analysis)
     
     with tab2:
@@ -247,8 +258,8 @@ elif page == "Health Monitoring":
         # Analysis from health agent
         st.subheader("AI Analysis")
         analysis = health_agent.analyze_blood_pressure(
-            health_data['systolic'].tolist(), 
-            health_data['diastolic'].tolist()
+            health_data['systolic'].to_numpy(), 
+            health_data['diastolic'].to_numpy()
         )
         st.write(analysis)
     
@@ -265,7 +276,7 @@ elif page == "Health Monitoring":
         
         # Analysis from health agent
         st.subheader("AI Analysis")
-        analysis = health_agent.analyze_glucose(glucose_data['glucose'].tolist())
+        analysis = health_agent.analyze_glucose(glucose_data['glucose'].to_numpy())
         st.write(analysis)
     
     # Recommendations
@@ -314,7 +325,7 @@ elif page == "Activity Tracking":
     
     # Analysis from activity agent
     st.subheader("AI Analysis")
-    analysis = activity_agent.analyze_activity(activity_data['activity_level'].tolist())
+    analysis = activity_agent.analyze_activity(activity_data['activity_level'].to_numpy())
     st.write(analysis)
     
     # Recommendations
@@ -628,19 +639,13 @@ elif page == "Agent Chat":
         with st.chat_message("user"):
             st.markdown(prompt)
         
-        # Process with appropriate agent based on content
+        # Process with appropriate agent based on content (same routing as the API)
         response = ""
+        query = normalize_query(prompt)
+        ranked_agents = query_router.route(query)
         
-        if "health" in prompt.lower() or "heart" in prompt.lower() or "blood pressure" in prompt.lower():
-            response = health_agent.respond_to_query(prompt)
-        elif "activity" in prompt.lower() or "movement" in prompt.lower() or "exercise" in prompt.lower():
-            response = activity_agent.respond_to_query(prompt)
-        elif "reminder" in prompt.lower() or "medication" in prompt.lower() or "appointment" in prompt.lower():
-            response = reminder_agent.respond_to_query(prompt)
-        elif "alert" in prompt.lower() or "emergency" in prompt.lower() or "help" in prompt.lower():
-            response = alert_agent.respond_to_query(prompt)
-        elif "social" in prompt.lower() or "family" in prompt.lower() or "friend" in prompt.lower():
-            response = social_agent.respond_to_query(prompt)
+        if ranked_agents:
+            response = chat_agents[ranked_agents[0]].respond_to_query(prompt)
         else:
             # Default response when no specific agent is matched
             response = "I'll help you with that. Our multi-agent system is monitoring all aspects of elderly care. What specific information are you looking for?"
@@ -1,5 +1,9 @@
 import { NextResponse } from "next/server"
 import { getLatestHealthData, recordHealthData } from "/lib/db"
+import alertRules from "../../../agents/alert_rules.json"
+
+// Thresholds shared with the Python alert rules
+const THRESHOLDS = alertRules.thresholds
 
 export async function GET(request: Request) {
   const { searchParams } = new URL(request.url)
@@ -46,11 +50,11 @@ export async function POST(request: Request) {
 
     // Check for abnormal values and trigger alerts if needed
     if (
-      heartRate > 100 ||
-      heartRate < 50 ||
-      Number.parseInt(bp.split("/")[0]) > 140 ||
-      Number.parseInt(bp.split("/")[1]) > 90 ||
-      glucose > 200
+      heartRate > THRESHOLDS.heart_rate_high ||
+      heartRate < THRESHOLDS.heart_rate_low ||
+      Number.parseInt(bp.split("/")[0]) > THRESHOLDS.systolic_high ||
+      Number.parseInt(bp.split("/")[1]) > THRESHOLDS.diastolic_high ||
+      glucose > THRESHOLDS.glucose_high
     ) {
       // In a real app, we would call an alert service here
       console.log(`ALERT: Abnormal health reading detected for user ${userId}`)
@@ -0,0 +1,77 @@
+"""
+Time ActivityMonitorAgent pattern detection over a week of per-minute
+location events for a whole facility: one find_unusual_patterns call over
+flat columns, detect_unusual_patterns called per resident, and a plain
+Python loop over the same rules that both are checked against.
+
+Usage: python benchmarks/bench_activity_patterns.py [residents] [days]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.activity_agent import ActivityMonitorAgent
+
+ROOMS = ["Bedroom", "Bathroom", "Kitchen", "Living Room", "Dining Room"]
+
+def timed(label, func):
+    start = time.perf_counter()
+    result = func()
+    print(f"{label:<32} {time.perf_counter() - start:>8.3f}s")
+    return result
+
+def loop_patterns(times, locations):
+    """The detection rules as a per-event loop, with "HH:MM" rolling over at midnight"""
+    minutes, day, previous = [], 0, None
+    for time_text in times:
+        hour, minute = map(int, time_text.split(":"))
+        if previous is not None and hour * 60 + minute < previous:
+            day += 1
+        previous = hour * 60 + minute
+        minutes.append(day * 1440 + previous)
+
+    last_visit, frequent = {}, set()
+    for i, room in enumerate(locations):
+        if i == 0 or locations[i - 1] != room:
+            if room in last_visit and minutes[i] - minutes[last_visit[room]] < 30:
+                frequent.add(last_visit[room])
+            last_visit[room] = i
+    patterns = [f"Frequent {locations[i].lower()} visits detected around {times[i]}" for i in sorted(frequent)]
+    patterns += [f"Extended period with no movement detected between {times[i]} and {times[i + 1]}"
+                 for i in range(len(times) - 1) if minutes[i + 1] - minutes[i] > 180]
+    return patterns
+
+def main():
+    residents = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else 7
+    agent = ActivityMonitorAgent()
+
+    # One "HH:MM" location sample per minute; residents move about every 20 minutes on average
+    rng = np.random.default_rng(0)
+    minutes = days * 1440
+    clock = [f"{m // 60:02d}:{m % 60:02d}" for m in range(1440)] * days
+    times = clock * residents
+    moves = rng.random(residents * minutes) < 0.05
+    locations = [ROOMS[i] for i in (np.cumsum(moves) * 7 + np.cumsum(rng.random(len(moves)) < 0.01)) % len(ROOMS)]
+    offsets = np.arange(residents + 1) * minutes
+
+    print(f"{residents} residents, {len(times)} events")
+    findings = timed("find_unusual_patterns", lambda: agent.find_unusual_patterns(times, locations, offsets))
+
+    def per_resident():
+        return [agent.detect_unusual_patterns([
+            {'time': times[i], 'location': locations[i]} for i in range(offsets[r], offsets[r + 1])
+        ]) for r in range(residents)]
+
+    assert timed("detect_unusual_patterns loop", per_resident) == findings
+    assert timed("plain Python loop", lambda: [
+        loop_patterns(times[offsets[r]:offsets[r + 1]], locations[offsets[r]:offsets[r + 1]]) for r in range(residents)
+    ]) == findings
+    print(f"{sum(map(len, findings))} findings")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Measure the AgentCoordinator log under continuous ingest: run_agent calls
+per second and the memory the log holds after many calls, for the old
+unbounded list of eagerly formatted entries and for the bounded AgentLog
+(with sampling, and with spilling to a rotating file).
+
+Usage: python benchmarks/bench_agent_log.py [calls]
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.agent_coordinator import AgentCoordinator
+from agents.agent_log import AgentLog
+
+class ListLog:
+    """The previous log: a list that formats every entry as it is added"""
+
+    def __init__(self):
+        self.entries = []
+
+    def record(self, agent_type, event, payload=None):
+        if event == 'start':
+            details = f'Running with data: {json.dumps(payload) if payload else "None"}'
+        elif event == 'complete':
+            details = f'Result: {json.dumps(payload) if isinstance(payload, dict) else str(payload)}'
+        else:
+            details = payload
+        self.entries.append({
+            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'action': f'{event} {agent_type} agent',
+            'details': details
+        })
+
+def run(label, make_log, calls):
+    readings = [{'user_id': i % 100, 'heart_rate': 60 + i % 50, 'systolic': 120 + i % 40,
+                 'diastolic': 80, 'glucose': 110} for i in range(calls)]
+
+    def ingest(trace):
+        coordinator = AgentCoordinator()
+        coordinator.log = make_log()
+        if trace:
+            tracemalloc.start()
+        start = time.perf_counter()
+        for reading in readings:
+            coordinator.run_agent('alert', {'health_data': reading})
+        elapsed = time.perf_counter() - start
+        held = tracemalloc.get_traced_memory()[0] if trace else None
+        tracemalloc.stop()
+        return elapsed, held
+
+    # tracemalloc slows everything down, so time a separate untraced run
+    elapsed, _ = ingest(False)
+    _, held = ingest(True)
+    print(f"{label:<28} {calls / elapsed:>10,.0f} calls/s {held / 1e6:>8.1f} MB held")
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+
+    print(f"{calls} run_agent calls")
+    run("unbounded list", ListLog, calls)
+    run("AgentLog", AgentLog, calls)
+    run("AgentLog, 10% sampled", lambda: AgentLog(sample_rate=0.1), calls)
+    with tempfile.TemporaryDirectory() as tmp:
+        run("AgentLog, spilled to disk", lambda: AgentLog(spill_path=os.path.join(tmp, "agents.log")), calls)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Measure a full AgentCoordinator sweep (all five agents) for one resident
+and for a batch of residents: the old sequential loop with its 0.1 s pause
+between agents, sequential without the pause, and the concurrent
+run_all_agents / run_all_agents_batch. Also checks that a slow agent is cut
+off at its timeout.
+
+Usage: python benchmarks/bench_agent_sweep.py [residents] [repeats]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.agent_coordinator import AgentCoordinator
+
+DAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+def resident_data(user_id):
+    """Input for every agent, shaped like the API passes it"""
+    return {
+        'heart_rate': 60 + user_id % 50,
+        'activity_level': 20 + user_id % 60,
+        'reminders': [{'id': i, 'user_id': user_id, 'message': 'Take medication', 'time': f"{8 + i % 12:02d}:00",
+                       'days': DAYS, 'type': 'medication', 'status': 'pending'} for i in range(20)],
+        'current_time': '09:00',
+        'current_day': 'Mon',
+        'health_data': {'user_id': user_id, 'heart_rate': 60 + user_id % 50, 'systolic': 120 + user_id % 40,
+                        'diastolic': 80, 'glucose': 110},
+        'interactions_data': [{'type': 'Family', 'value': 3}, {'type': 'Friends', 'value': 2}],
+        'weekly_data': [{'day': day, 'interactions': 1 + i % 3} for i, day in enumerate(DAYS)],
+    }
+
+def timed(label, repeats, func):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        result = func()
+    elapsed = (time.perf_counter() - start) / repeats
+    print(f"{label:<40} {elapsed * 1e3:>10.2f} ms/sweep")
+    return result
+
+def main():
+    residents = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    coordinator = AgentCoordinator()
+    one = resident_data(1)
+    batch = [resident_data(user_id) for user_id in range(1, residents + 1)]
+
+    def old_sweep(data):
+        results = {}
+        for agent_type in coordinator.agents:
+            results[agent_type] = coordinator.run_agent(agent_type, data)
+            time.sleep(0.1)
+        return results
+
+    print("1 resident")
+    timed("sequential with 0.1 s pauses (old)", 1, lambda: old_sweep(one))
+    timed("sequential", repeats, lambda: coordinator.run_all_agents(one, concurrent=False))
+    result = timed("concurrent", repeats, lambda: coordinator.run_all_agents(one))
+    assert all(r['status'] == 'success' for r in result.values())
+
+    print(f"{residents} residents")
+    print(f"{'sequential with 0.1 s pauses (old)':<40} {residents * 500:>10.2f} ms/sweep (estimated)")
+    timed("sequential", repeats, lambda: [coordinator.run_all_agents(d, concurrent=False) for d in batch])
+    timed("concurrent, one resident at a time", repeats, lambda: [coordinator.run_all_agents(d) for d in batch])
+    results = timed("run_all_agents_batch", repeats, lambda: coordinator.run_all_agents_batch(batch))
+    assert len(results) == residents and all(r['status'] == 'success' for res in results for r in res.values())
+
+    # A stuck agent is reported as timed out without holding up the others
+    social = coordinator.social_agent.calculate_social_wellbeing_score
+    coordinator.social_agent.calculate_social_wellbeing_score = lambda *args: time.sleep(1) or social(*args)
+    result = timed("concurrent, social stuck for 1 s", 1, lambda: coordinator.run_all_agents(one, timeout=0.2))
+    assert result['social']['status'] == 'timeout' and result['health']['status'] == 'success'
+    coordinator.social_agent.calculate_social_wellbeing_score = social
+    coordinator.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Measure the compiled alert rules: readings per second for a vectorized
+evaluate() over NumPy columns (with and without per-resident threshold
+overrides), with every alert rendered, and through the per-reading
+AlertAgent.evaluate_health_alert wrapper.
+
+Usage: python benchmarks/bench_alert_rules.py [readings] [residents_with_overrides]
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.alert_rules import AlertRules
+from agents.alert_agent import AlertAgent
+
+def timed(label, n, func):
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<32} {elapsed:>8.3f}s {n / elapsed:>14,.0f} readings/s")
+    return result
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    overridden = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+
+    rng = np.random.default_rng(0)
+    columns = {
+        'heart_rate': rng.normal(78, 15, n).round(),
+        'systolic': rng.normal(128, 18, n).round(),
+        'diastolic': rng.normal(82, 10, n).round(),
+        'glucose': rng.normal(120, 35, n).round(),
+    }
+    user_ids = rng.integers(1, 10001, n)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        overrides_path = os.path.join(tmp, "overrides.json")
+        with open(overrides_path, "w") as f:
+            json.dump({str(user_id): {"heart_rate_high": 110, "systolic_high": 150}
+                       for user_id in range(1, overridden + 1)}, f)
+
+        plain = AlertRules()
+        with_overrides = AlertRules(overrides_path=overrides_path)
+
+        print(f"{n} readings, {overridden} residents with overrides")
+        _, matched = timed("evaluate", n, lambda: plain.evaluate('health', columns))
+        timed("evaluate with overrides", n, lambda: with_overrides.evaluate('health', columns, user_ids))
+        alerts = timed("evaluate + render alerts", n, lambda: plain.alerts('health', columns))
+        assert sum(map(len, alerts)) == matched.sum()
+        print(f"{int(matched.sum())} alerts")
+
+    agent = AlertAgent()
+    sample = min(n, 20000)
+    readings = [{'user_id': int(user_ids[i]), 'heart_rate': columns['heart_rate'][i],
+                 'systolic': columns['systolic'][i], 'diastolic': columns['diastolic'][i],
+                 'glucose': columns['glucose'][i]} for i in range(sample)]
+    timed("per-reading wrapper", sample, lambda: [agent.evaluate_health_alert(r) for r in readings])
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Compare the row-dict read path with the columnar NumPy read path on a
+large range: wall time and peak Python/NumPy allocations (tracemalloc)
+to get the heart rate analysis for one resident.
+
+Usage: python benchmarks/bench_columnar_reads.py [num_rows]
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.health_agent import HealthMonitorAgent
+from database import db_manager
+
+START, END = '2020-01-01', '2030-01-01'
+
+def seed(n):
+    rng = np.random.default_rng(0)
+    heart_rate = rng.normal(75, 8, n).round().astype(int)
+    # Epoch seconds from 2025-01-01, one reading every 30s
+    ts = 1735689600 + np.arange(n) * 30
+    with db_manager.db_connection() as conn:
+        conn.executemany(
+            """INSERT INTO health_data (user_id, heart_rate, bp, systolic, diastolic, glucose, ts)
+               VALUES (1, ?, '120/80', 120, 80, 105.0, ?)""",
+            zip(heart_rate.tolist(), ts.tolist())
+        )
+
+def row_path(agent):
+    rows = db_manager.get_health_data_range(1, START, END)
+    return agent.analyze_heart_rate([row['heart_rate'] for row in rows])
+
+def columnar_path(agent):
+    columns = db_manager.get_health_data_columns(1, START, END)
+    return agent.analyze_heart_rate(columns['heart_rate'])
+
+def measure(label, func, agent):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(agent)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<10} {elapsed:>7.2f}s  peak {peak / 2**20:>8.1f} MiB")
+    return result
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    agent = HealthMonitorAgent()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        db_manager.DB_PATH = os.path.join(tmp, 'columnar.db')
+        db_manager.create_tables()
+        seed(n)
+        print(f"{n} rows")
+        
+        rows_result = measure("rows", row_path, agent)
+        columnar_result = measure("columnar", columnar_path, agent)
+        assert rows_result == columnar_result
+        
+        db_manager.close_pool()
+
+if __name__ == '__main__':
+    main()
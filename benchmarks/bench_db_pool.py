@@ -0,0 +1,54 @@
+"""
+Compare health_data inserts per second between the original
+connect/insert/commit/close pattern and the pooled WAL connections.
+
+Usage: python benchmarks/bench_db_pool.py [num_inserts]
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import db_manager
+
+def legacy_insert(db_path, user_id, heart_rate, bp, glucose):
+    """The pre-pool behaviour: a fresh connection per statement"""
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "INSERT INTO health_data (user_id, heart_rate, bp, glucose) VALUES (?, ?, ?, ?)",
+        (user_id, heart_rate, bp, glucose)
+    )
+    conn.commit()
+    conn.close()
+
+def run(label, insert, n):
+    start = time.perf_counter()
+    for i in range(n):
+        insert(1, 60 + i % 40, "120/80", 100.0)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {n / elapsed:>10.0f} inserts/sec  ({elapsed:.2f}s)")
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = os.path.join(tmp, "legacy.db")
+        db_manager.DB_PATH = legacy_path
+        db_manager.create_tables()
+        db_manager.close_pool()
+        # The legacy path ran with the default rollback journal
+        conn = sqlite3.connect(legacy_path)
+        conn.execute("PRAGMA journal_mode = DELETE")
+        conn.close()
+        run("connect-per-call (DELETE)", lambda *row: legacy_insert(legacy_path, *row), n)
+
+        db_manager.DB_PATH = os.path.join(tmp, "pooled.db")
+        db_manager.create_tables()
+        run("pooled (WAL, NORMAL)", db_manager.record_health_data, n)
+        db_manager.close_pool()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Measure what the event pipeline takes off the ingestion request path: the
+per-reading agent work POST /api/health does synchronously, against
+publishing the reading to ReadingPipeline. Also times the workers draining
+the queue in batches, a critical reading evaluated on the publisher's
+thread, and a burst into a small queue, where publishers wait for their
+readings to be evaluated (by themselves, or behind their resident's queued
+readings).
+
+Usage: python benchmarks/bench_event_pipeline.py [readings] [residents]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import db_manager
+from agents.agent_coordinator import AgentCoordinator
+from agents.event_pipeline import EventBus, ReadingPipeline
+
+def make_readings(n, residents, rng):
+    # Mostly routine vitals, with some elevated (but not critical) ones
+    return [{'user_id': int(u), 'heart_rate': float(hr), 'systolic': float(sys_value),
+             'diastolic': float(dia_value), 'glucose': float(glu), 'bp': f"{sys_value:.0f}/{dia_value:.0f}"}
+            for u, hr, sys_value, dia_value, glu in zip(
+                rng.integers(1, residents + 1, n), rng.normal(78, 8, n).round().clip(55, 115),
+                rng.normal(125, 12, n).round().clip(95, 170), rng.normal(80, 6, n).round().clip(65, 110),
+                rng.normal(120, 25, n).round().clip(75, 240))]
+
+def per_reading(label, n, func):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<40} {elapsed:>8.3f}s {elapsed / n * 1e6:>8.1f} us/reading")
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    residents = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    rng = np.random.default_rng(0)
+    readings = make_readings(n, residents, rng)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_manager.DB_PATH = os.path.join(tmp, "pipeline.db")
+        db_manager.create_tables()
+        print(f"{n} readings, {residents} residents")
+
+        coordinator = AgentCoordinator()
+
+        def synchronous():
+            # What POST /api/health runs before answering, minus the insert
+            for reading in readings:
+                coordinator.health_agent.detect_anomalies(reading)
+                coordinator.health_agent.record_vitals(reading['user_id'], reading['heart_rate'], reading['systolic'],
+                                                       reading['diastolic'], reading['glucose'])
+                coordinator.run_agent('health', {key: reading[key] for key in ('heart_rate', 'systolic', 'diastolic', 'glucose')})
+                coordinator.run_agent('alert', {'health_data': reading})
+
+        per_reading("synchronous agents per request", n, synchronous)
+
+        pipeline = ReadingPipeline(AgentCoordinator(), EventBus(maxsize=n))
+        start = time.perf_counter()
+        queued = sum(pipeline.publish_health(reading) is None for reading in readings)
+        published = time.perf_counter() - start
+        pipeline.bus.join()
+        drained = time.perf_counter() - start
+        print(f"{'publish per request':<40} {published:>8.3f}s {published / n * 1e6:>8.1f} us/reading ({queued} queued)")
+        # The workers also store each alert, which the synchronous path above does not
+        print(f"{'publish + workers drained':<40} {drained:>8.3f}s {drained / n * 1e6:>8.1f} us/reading")
+
+        critical = dict(readings[0], heart_rate=150.0)
+        per_reading("critical reading, evaluated inline", 1, lambda: pipeline.publish_health(critical))
+        pipeline.close()
+
+        small = ReadingPipeline(AgentCoordinator(), EventBus(maxsize=100))
+        start = time.perf_counter()
+        inline = sum(small.publish_health(reading) is not None for reading in readings)
+        small.bus.join()
+        elapsed = time.perf_counter() - start
+        print(f"{'burst into a 100-event queue':<40} {elapsed:>8.3f}s {elapsed / n * 1e6:>8.1f} us/reading "
+              f"({inline} waited for their evaluation)")
+        small.close()
+        db_manager.close_pool()
+
+if __name__ == "__main__":
+    main()
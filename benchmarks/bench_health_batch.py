@@ -0,0 +1,62 @@
+"""
+Compare a facility summary built by calling the per-resident
+HealthMonitorAgent.analyze_* methods in a loop against one
+analyze_residents call over ragged arrays (stats and flags only, then
+with every report rendered).
+
+Usage: python benchmarks/bench_health_batch.py [residents] [samples_per_resident]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.health_agent import HealthMonitorAgent
+
+def timed(label, func):
+    start = time.perf_counter()
+    result = func()
+    print(f"{label:<28} {time.perf_counter() - start:>8.3f}s")
+    return result
+
+def main():
+    residents = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    samples = int(sys.argv[2]) if len(sys.argv) > 2 else 288
+    agent = HealthMonitorAgent()
+    
+    # Ragged: each resident has up to `samples` readings
+    rng = np.random.default_rng(0)
+    lengths = rng.integers(samples // 2, samples + 1, residents)
+    offsets = np.concatenate([[0], np.cumsum(lengths)])
+    n = offsets[-1]
+    heart_rate = rng.normal(78, 12, n).round()
+    systolic = rng.normal(128, 14, n).round()
+    diastolic = rng.normal(82, 8, n).round()
+    glucose = rng.normal(115, 25, n).round()
+    
+    def loop():
+        reports = []
+        for i in range(residents):
+            part = slice(offsets[i], offsets[i + 1])
+            reports.append("\n".join([
+                agent.analyze_heart_rate(heart_rate[part]),
+                agent.analyze_blood_pressure(systolic[part], diastolic[part]),
+                agent.analyze_glucose(glucose[part]),
+            ]))
+        return reports
+    
+    def batch():
+        return agent.analyze_residents(heart_rate, systolic, diastolic, glucose, offsets=offsets)
+    
+    print(f"{residents} residents, {n} readings")
+    reports = timed("per-resident loop", loop)
+    result = timed("analyze_residents", batch)
+    rendered = timed("analyze_residents + render", lambda: list(batch()))
+    assert rendered == reports
+    print(f"{len(result.needs_attention())} residents need attention")
+
+if __name__ == "__main__":
+    main()
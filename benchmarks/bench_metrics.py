@@ -0,0 +1,58 @@
+"""
+Measure the cost of the /api/agents/metrics instrumentation: per-call
+overhead of a timed wrapper around a no-op, around an agent method and
+around a db_manager insert (against the unwrapped function), and the time
+to render the Prometheus text.
+
+Usage: python benchmarks/bench_metrics.py [calls]
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import db_manager
+from database.metrics import MetricsRegistry, registry
+from agents.agent_coordinator import AgentCoordinator
+
+def compare(label, plain, timed, calls, block=1000):
+    # Alternate blocks so drift (e.g. a growing table) hits both sides equally
+    elapsed = [0.0, 0.0]
+    for _ in range(max(1, calls // block)):
+        for side, func in enumerate((plain, timed)):
+            start = time.perf_counter()
+            for _ in range(block):
+                func()
+            elapsed[side] += time.perf_counter() - start
+    bare, wrapped = (total / (max(1, calls // block) * block) * 1e6 for total in elapsed)
+    print(f"{label:<28} {bare:>8.2f} us bare {wrapped:>8.2f} us timed  (+{wrapped - bare:.2f} us)")
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    def noop():
+        return None
+
+    compare("no-op", noop, MetricsRegistry().timed(noop, 'bench'), calls)
+
+    coordinator = AgentCoordinator()
+    method = coordinator.health_agent.analyze_heart_rate
+    compare("analyze_heart_rate", lambda: method.__wrapped__([72]), lambda: method([72]), calls)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_manager.DB_PATH = os.path.join(tmp, "metrics.db")
+        db_manager.create_tables()
+        insert = db_manager.record_health_data
+        n = min(calls, 20000)
+        compare("record_health_data", lambda: insert.__wrapped__(1, 72, "120/80", 100.0),
+                lambda: insert(1, 72, "120/80", 100.0), n)
+        db_manager.close_pool()
+
+    start = time.perf_counter()
+    text = registry.render()
+    print(f"render: {len(text.splitlines())} lines in {(time.perf_counter() - start) * 1e3:.2f} ms")
+
+if __name__ == "__main__":
+    main()
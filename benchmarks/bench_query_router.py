@@ -0,0 +1,76 @@
+"""
+Time AgentCoordinator.process_query routing and caching on a synthetic mix
+of chat queries: the previous per-group keyword scans, the compiled
+QueryRouter with and without its memo, and repeated queries answered from the response cache. Also
+reports how often the router's top agent differs from the old first match
+(only queries with more hits for a later agent should).
+
+Usage: python benchmarks/bench_query_router.py [queries]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import db_manager
+from agents.agent_coordinator import AgentCoordinator
+from agents.query_router import QueryRouter, normalize_query
+
+# The keyword groups process_query scanned in order before the router
+OLD_GROUPS = [
+    ('health', ['heart', 'blood', 'health', 'glucose']),
+    ('activity', ['activity', 'movement', 'walk', 'step']),
+    ('reminder', ['reminder', 'medication', 'appointment']),
+    ('alert', ['alert', 'emergency', 'fall', 'help']),
+    ('social', ['social', 'family', 'friend', 'call']),
+]
+
+WORDS = ("how is my heart doing today did she take her medication any alerts overnight "
+         "when is the next family call show the walk and step counts blood pressure trend "
+         "glucose after lunch who visited friends social events emergency contacts please "
+         "what was the activity level yesterday is everything okay good morning").split()
+
+def old_route(query):
+    for agent_type, keywords in OLD_GROUPS:
+        if any(keyword in query.lower() for keyword in keywords):
+            return agent_type
+    return None
+
+def timed(label, n, func):
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<32} {elapsed:>8.3f}s {elapsed / n * 1e6:>8.2f} us/query")
+    return result
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    rng = random.Random(0)
+    queries = [' '.join(rng.choice(WORDS) for _ in range(rng.randint(3, 12))) for _ in range(n)]
+
+    router = QueryRouter()
+    print(f"{n} queries")
+    old = timed("old keyword scans", n, lambda: [old_route(query) for query in queries])
+    new = timed("compiled router", n, lambda: [(router._route(normalize_query(query)) or [None])[0] for query in queries])
+    repeated = [rng.choice(queries[:200]) for _ in range(n)]
+    timed("compiled router, memoized", n, lambda: [router.route(normalize_query(query)) for query in repeated])
+    changed = sum(a != b for a, b in zip(old, new))
+    print(f"top agent differs from the old first match on {changed} queries ({changed / n:.1%}), "
+          f"where a later agent has more keyword hits")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_manager.DB_PATH = os.path.join(tmp, "router.db")
+        db_manager.create_tables()
+        coordinator = AgentCoordinator()
+
+        # Dashboards and devices repeat a small set of questions
+        coordinator.response_cache.maxsize = 0
+        timed("process_query, no cache", n, lambda: [coordinator.process_query(query) for query in repeated])
+        coordinator.response_cache.maxsize = 1024
+        timed("process_query, cached", n, lambda: [coordinator.process_query(query) for query in repeated])
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Compare the cost of finding due reminders once a minute over a simulated
+day: scanning every reminder with ReminderAgent.check_due_reminders() or
+querying get_due_reminders_all() on every tick, versus popping them from
+ReminderScheduler's heap, which was loaded once.
+
+Usage: python benchmarks/bench_reminder_scheduler.py [reminders] [residents]
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import db_manager
+from database.reminder_scheduler import ReminderScheduler
+from agents.reminder_agent import ReminderAgent
+
+DAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    residents = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_manager.DB_PATH = os.path.join(tmp, "reminders.db")
+        db_manager.create_tables()
+        for i in range(n):
+            minute = int(rng.integers(0, 1440))
+            days = [day for day in DAYS if rng.random() < 0.6] or ["Mon"]
+            db_manager.add_reminder(int(rng.integers(1, residents + 1)), f"Reminder {i}",
+                                    f"{minute // 60:02d}:{minute % 60:02d}", days, "medication")
+
+        # Residents use the default UTC zone, so ticks line up with "HH:MM" times
+        day_start = datetime(2024, 1, 1, tzinfo=timezone.utc).timestamp()
+        ticks = [day_start + 60 * m for m in range(1440)]
+        print(f"{n} reminders, {residents} residents, {len(ticks)} ticks")
+
+        # The scan is slow, so time every 11th tick and scale up to the day
+        agent = ReminderAgent()
+        reminders = db_manager.get_pending_reminders_all()
+        for reminder in reminders:
+            reminder['days'] = json.loads(reminder['days'])
+        scan_ticks = ticks[5::11]
+        start = time.perf_counter()
+        for tick in scan_ticks:
+            now = datetime.fromtimestamp(tick, timezone.utc)
+            agent.check_due_reminders(reminders, now.strftime('%H:%M'), now.strftime('%a'))
+        elapsed = time.perf_counter() - start
+        print(f"{'scan every tick':<24} {elapsed / len(scan_ticks) * len(ticks):>8.3f}s "
+              f"{elapsed / len(scan_ticks) * 1e3:>8.3f} ms/tick")
+
+        start = time.perf_counter()
+        scanned = 0
+        for tick in ticks:
+            now = datetime.fromtimestamp(tick, timezone.utc)
+            scanned += len(db_manager.get_due_reminders_all(now.strftime('%H:%M'), now.strftime('%a')))
+        elapsed = time.perf_counter() - start
+        print(f"{'query every tick':<24} {elapsed:>8.3f}s {elapsed / len(ticks) * 1e3:>8.3f} ms/tick")
+
+        scheduler = ReminderScheduler()
+        start = time.perf_counter()
+        scheduler.load(now=ticks[0] - 1)
+        print(f"{'scheduler load':<24} {time.perf_counter() - start:>8.3f}s")
+
+        start = time.perf_counter()
+        popped = sum(len(scheduler.pop_due(tick)) for tick in ticks)
+        elapsed = time.perf_counter() - start
+        print(f"{'scheduler pop_due':<24} {elapsed:>8.3f}s {elapsed / len(ticks) * 1e3:>8.3f} ms/tick")
+
+        assert popped == scanned, (popped, scanned)
+        print(f"{popped} reminders fired")
+        db_manager.close_pool()
+
+if __name__ == "__main__":
+    main()
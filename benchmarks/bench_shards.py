@@ -0,0 +1,57 @@
+"""
+Compare health_data insert throughput with concurrent writers (one
+resident each) against a single database file and against N shards.
+
+Each insert is its own transaction, as with POST /api/health, so on one
+file every writer queues for the same SQLite write lock. The gap grows
+with commit latency; pass FULL as the synchronous level to fsync every
+commit as a slow disk would.
+
+Usage: python benchmarks/bench_shards.py [inserts_per_writer] [writers] [shards] [NORMAL|FULL]
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import db_manager
+
+def run(label, n, writers):
+    def writer(user_id):
+        for i in range(n):
+            db_manager.record_health_data(user_id, 60 + i % 40, "120/80", 100.0)
+
+    threads = [threading.Thread(target=writer, args=(user_id,)) for user_id in range(1, writers + 1)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<20} {n * writers / elapsed:>10.0f} inserts/sec  ({elapsed:.2f}s)")
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    writers = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    shards = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+    synchronous = sys.argv[4] if len(sys.argv) > 4 else "NORMAL"
+
+    apply_pragmas = db_manager._apply_pragmas
+    def pragmas(conn):
+        apply_pragmas(conn)
+        conn.execute(f"PRAGMA synchronous = {synchronous}")
+    db_manager._apply_pragmas = pragmas
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in (1, shards):
+            db_manager.DB_PATH = os.path.join(tmp, f"shards_{count}.db")
+            db_manager.SHARD_COUNT = count
+            db_manager.create_tables()
+            run(f"{count} file(s)", n, writers)
+            db_manager.close_pool()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Compare health_data insert throughput between one commit per reading and
+the group-commit write-behind buffer, with several concurrent writers.
+
+Usage: python benchmarks/bench_write_buffer.py [num_inserts] [num_threads]
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import db_manager
+from database.write_buffer import WriteBehindBuffer
+
+def run(label, insert, n, threads, finish=None):
+    per_thread = n // threads
+
+    def writer():
+        for i in range(per_thread):
+            insert(1, 60 + i % 40, "120/80", 100.0)
+
+    workers = [threading.Thread(target=writer) for _ in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    if finish:
+        finish()
+    elapsed = time.perf_counter() - start
+    total = per_thread * threads
+    print(f"{label:<28} {total / elapsed:>10.0f} inserts/sec  ({elapsed:.2f}s)")
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_manager.DB_PATH = os.path.join(tmp, "direct.db")
+        db_manager.create_tables()
+        run("commit per reading", db_manager.record_health_data, n, threads)
+        db_manager.close_pool()
+
+        for durability in ("async", "full"):
+            db_manager.DB_PATH = os.path.join(tmp, f"buffered_{durability}.db")
+            db_manager.create_tables()
+            buffer = WriteBehindBuffer()
+            # 'full' writers each wait for their group commit
+            insert = buffer.record_health_data if durability == "async" else (
+                lambda *row: buffer.record_health_data(*row, durability="full")
+            )
+            run(f"write-behind ({durability})", insert, n, threads, buffer.flush)
+            buffer.close()
+            db_manager.close_pool()
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,305 @@
 import sqlite3
 import json
 import os
-from datetime import datetime
+import queue
+import threading
+import time
+import atexit
+import functools
+import math
+import bisect
+import heapq
+import re
+import calendar
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
-# Database file path
+import numpy as np
+
+from database import metrics
+
+# Database file path (shard 0; further shards sit next to it)
 DB_PATH = "eldercare.db"
 
-def get_db_connection():
-    """Create a connection to the SQLite database"""
-    conn = sqlite3.connect(DB_PATH)
+# Residents are spread across this many database files by user_id % SHARD_COUNT;
+# move existing data with database/reshard.py before changing it
+SHARD_COUNT = int(os.environ.get("ELDERCARE_SHARDS", "1"))
+# Row ids are allocated from a disjoint range per shard (shard << ID_SHARD_BITS)
+# so they stay unique facility-wide
+ID_SHARD_BITS = 40
+
+# Connection pool settings
+POOL_SIZE = 8
+BUSY_TIMEOUT_MS = 5000
+BUSY_RETRIES = 5
+BUSY_BACKOFF = 0.05
+
+# Vital signs kept in the health_rollups table, and the bucket format per period
+ROLLUP_METRICS = ["heart_rate", "systolic", "diastolic", "glucose"]
+ROLLUP_PERIODS = {"hour": "%Y-%m-%d %H:00:00", "day": "%Y-%m-%d"}
+
+# Time-series tables that store timestamps as integer epoch seconds in `ts`
+EPOCH_TABLES = ["health_data", "activity_log", "social_interactions"]
+
+# Timezone for residents without one in the residents table
+DEFAULT_TIMEZONE = "UTC"
+
+# Raw samples older than this are moved to per-month archive databases
+RAW_RETENTION_DAYS = 90
+ARCHIVED_TABLES = ["health_data", "activity_log"]
+
+# Rows fetched per keyset page by the range iterators
+RANGE_BATCH_SIZE = 1000
+
+# Fixed dtypes for the columnar read path; NULL vitals come back as NaN
+HEALTH_COLUMN_DTYPES = [
+    ("timestamp", "datetime64[s]"),
+    ("heart_rate", "f8"),
+    ("systolic", "f8"),
+    ("diastolic", "f8"),
+    ("glucose", "f8"),
+]
+ACTIVITY_COLUMN_DTYPES = [
+    ("timestamp", "datetime64[s]"),
+    ("activity", "U32"),
+    ("status", "U16"),
+]
+
+# Alert priorities in urgency order, stored as alerts.priority_rank; anything else ranks last
+ALERT_PRIORITY_RANKS = {"critical": 1, "high": 2, "medium": 3}
+LOWEST_PRIORITY_RANK = 4
+
+# A repeat of an open alert within this many seconds of its last occurrence is
+# counted on that alert's row (alerts.occurrences) instead of inserted
+ALERT_DEDUP_WINDOW = 300
+# Most recent alerts remembered by the in-memory dedup cache
+ALERT_DEDUP_MAX_KEYS = 10000
+
+# Reminder days are stored as a bitmask: bit i set means WEEKDAYS[i]
+WEEKDAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+def _apply_pragmas(conn):
+    """Tune a connection for concurrent readers and frequent small writes"""
+    conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+    conn.execute("PRAGMA journal_mode = WAL")
+    # WAL + NORMAL only fsyncs at checkpoints, which is still crash-safe
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    conn.execute("PRAGMA cache_size = -16000")
+
+class ConnectionPool:
+    """
+    Bounded pool of long-lived SQLite connections shared across threads
+    """
+
+    def __init__(self, db_path, max_size=POOL_SIZE):
+        self.db_path = db_path
+        self.max_size = max_size
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=BUSY_TIMEOUT_MS / 1000, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        _apply_pragmas(conn)
+        return conn
+
+    def _checkout(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            can_create = self._created < self.max_size
+            if can_create:
+                self._created += 1
+
+        if can_create:
+            try:
+                return self._connect()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+        try:
+            return self._idle.get(timeout=BUSY_TIMEOUT_MS / 1000)
+        except queue.Empty:
+            raise sqlite3.OperationalError("database connection pool exhausted")
+
+    def in_transaction(self):
+        """Whether the calling thread is inside a connection() block"""
+        return getattr(self._local, 'conn', None) is not None
+
+    @contextmanager
+    def connection(self):
+        """Yield a pooled connection, committing when the outermost block exits"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            # Nested use joins the enclosing transaction
+            yield conn
+            return
+
+        conn = self._checkout()
+        self._local.conn = conn
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            self._local.conn = None
+            self._idle.put(conn)
+
+    def close(self):
+        """Close all idle connections"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._created -= 1
+
+_pools = {}
+_pool_lock = threading.Lock()
+
+def shard_for(user_id):
+    """Shard holding a resident's rows"""
+    return int(user_id) % SHARD_COUNT
+
+def shard_path(shard):
+    """Database file for a shard; shard 0 is DB_PATH itself"""
+    if shard == 0:
+        return DB_PATH
+    stem, ext = os.path.splitext(DB_PATH)
+    return f"{stem}_shard{shard}{ext}"
+
+def get_pool(shard=0):
+    """Get the process-wide pool for a shard's database file"""
+    path = shard_path(shard)
+    pool = _pools.get(path)
+    if pool is not None:
+        return pool
+
+    with _pool_lock:
+        if path not in _pools:
+            _pools[path] = ConnectionPool(path)
+        return _pools[path]
+
+def close_pool():
+    """Close the pooled connections of every shard (called automatically at exit)"""
+    with _pool_lock:
+        for pool in _pools.values():
+            pool.close()
+
+atexit.register(close_pool)
+
+def shard_connection(shard):
+    """Context manager yielding a pooled connection to one shard (see db_connection)"""
+    return get_pool(shard).connection()
+
+def db_connection(user_id=None):
+    """
+    Context manager yielding a pooled connection to the shard holding
+    user_id (shard 0 when None).
+
+    The transaction commits when the outermost block exits and rolls back on
+    error, so nested calls (e.g. a db_manager function used inside another
+    block) share a single transaction. Transactions never span shards.
+    """
+    return shard_connection(0 if user_id is None else shard_for(user_id))
+
+def _in_transaction():
+    return any(pool.in_transaction() for pool in list(_pools.values()))
+
+_fan_out_executor = None
+
+def fan_out(query, *args, key=None):
+    """
+    Run query(conn, *args) on every shard, in parallel, and combine the
+    lists it returns.
+
+    With key, each shard's list must already be sorted by key and the
+    results are merged in that order; otherwise they are concatenated.
+    """
+    global _fan_out_executor
+    
+    def run(shard):
+        with shard_connection(shard) as conn:
+            return query(conn, *args)
+    
+    if SHARD_COUNT == 1:
+        parts = [run(0)]
+    else:
+        with _pool_lock:
+            if _fan_out_executor is None:
+                _fan_out_executor = ThreadPoolExecutor(max_workers=POOL_SIZE, thread_name_prefix="shard-fan-out")
+        parts = list(_fan_out_executor.map(run, range(SHARD_COUNT)))
+    
+    if key is None:
+        return [row for part in parts for row in part]
+    return list(heapq.merge(*parts, key=key))
+
+def _shards_for_id(row_id):
+    """Shards to search for a row id, starting with the one that allocated it"""
+    home = int(row_id) >> ID_SHARD_BITS
+    shards = list(range(SHARD_COUNT))
+    # Re-sharded rows may have moved, so the others are tried after
+    if home in shards:
+        shards.remove(home)
+        shards.insert(0, home)
+    return shards
+
+def _execute_by_id(sql, row_id, params=()):
+    """Run an UPDATE/DELETE keyed by row id on the shard holding it; returns rows changed"""
+    for shard in _shards_for_id(row_id):
+        with shard_connection(shard) as conn:
+            changed = conn.execute(sql, (*params, row_id)).rowcount
+        if changed:
+            return changed
+    return 0
+
+def is_busy_error(error):
+    """Whether an exception is SQLite reporting a busy or locked database"""
+    if not isinstance(error, sqlite3.OperationalError):
+        return False
+    message = str(error).lower()
+    return 'locked' in message or 'busy' in message
+
+def retry_on_busy(func):
+    """Retry a whole transaction with backoff when SQLite reports it is busy"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        for attempt in range(BUSY_RETRIES):
+            try:
+                return func(*args, **kwargs)
+            except sqlite3.OperationalError as e:
+                # Inside an enclosing transaction only the outermost caller may retry
+                if not is_busy_error(e) or attempt == BUSY_RETRIES - 1 or _in_transaction():
+                    raise
+                time.sleep(BUSY_BACKOFF * (2 ** attempt))
+    return wrapper
+
+def get_db_connection(user_id=None):
+    """Create a standalone connection to a resident's shard (prefer db_connection())"""
+    conn = sqlite3.connect(shard_path(0 if user_id is None else shard_for(user_id)), timeout=BUSY_TIMEOUT_MS / 1000)
     conn.row_factory = sqlite3.Row  # This enables column access by name
+    _apply_pragmas(conn)
     return conn
 
-def create_tables():
-    """Create all necessary tables if they don't exist"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
+# Schema migrations, applied in order and tracked with PRAGMA user_version.
+# Append new migrations to the end; never edit one that has shipped.
+def _migration_base_tables(cursor):
+    """Create the original tables"""
     # Health records
     cursor.execute('''CREATE TABLE IF NOT EXISTS health_data (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -80,286 +363,971 @@ def create_tables():
         status TEXT DEFAULT 'upcoming'
     )''')
 
-    conn.commit()
-    conn.close()
+def _migration_time_series_indexes(cursor):
+    """Index the per-user time-series tables and open alerts"""
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_health_data_user_ts ON health_data (user_id, timestamp)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_activity_log_user_ts ON activity_log (user_id, timestamp)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_social_interactions_user_ts ON social_interactions (user_id, timestamp)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_alerts_open ON alerts (user_id) WHERE handled = 0")
+
+# SQL that parses the legacy "120/80" bp text, for rows not yet backfilled
+_BP_SQL = {
+    'systolic': "CAST(substr(bp, 1, instr(bp, '/') - 1) AS INTEGER)",
+    'diastolic': "CAST(substr(bp, instr(bp, '/') + 1) AS INTEGER)",
+}
+
+def _migration_blood_pressure_columns(cursor):
+    """Add typed blood pressure columns (rows are backfilled after the migration commits)"""
+    cursor.execute("ALTER TABLE health_data ADD COLUMN systolic INTEGER")
+    cursor.execute("ALTER TABLE health_data ADD COLUMN diastolic INTEGER")
+
+def _migration_reminder_day_mask(cursor):
+    """Add an integer weekday bitmask to reminders and index due-reminder lookups"""
+    cursor.execute("ALTER TABLE reminders ADD COLUMN day_mask INTEGER NOT NULL DEFAULT 0")
+    day_bits = " ".join(f"WHEN '{day}' THEN {1 << i}" for i, day in enumerate(WEEKDAYS))
+    cursor.execute(f"""UPDATE reminders SET day_mask = (
+                          SELECT COALESCE(SUM(DISTINCT CASE value {day_bits} ELSE 0 END), 0)
+                          FROM json_each(reminders.days))
+                       WHERE json_valid(days)""")
+    # Due-reminder lookups compare zero-padded "HH:MM" text, so pad legacy "H:MM" times
+    rows = cursor.execute("SELECT id, time FROM reminders").fetchall()
+    cursor.executemany("UPDATE reminders SET time = ? WHERE id = ?",
+                       [(_normalize_time(t), row_id) for row_id, t in rows if _normalize_time(t) != t])
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_reminders_time_status ON reminders (time, status)")
+
+def _migration_health_rollups(cursor):
+    """Add hourly/daily vitals rollups and build them from existing readings"""
+    cursor.execute('''CREATE TABLE IF NOT EXISTS health_rollups (
+        user_id INTEGER NOT NULL,
+        metric TEXT NOT NULL,
+        period TEXT NOT NULL,
+        bucket TEXT NOT NULL,
+        count INTEGER NOT NULL,
+        sum REAL NOT NULL,
+        sum_sq REAL NOT NULL,
+        min REAL,
+        max REAL,
+        PRIMARY KEY (user_id, period, metric, bucket)
+    ) WITHOUT ROWID''')
+    
+    # The blood pressure backfill may not have run yet, so fall back to parsing bp
+    values = {metric: metric for metric in ROLLUP_METRICS}
+    for metric, parsed in _BP_SQL.items():
+        values[metric] = f"COALESCE({metric}, CASE WHEN instr(bp, '/') > 0 THEN {parsed} END)"
+    
+    for period, bucket_format in ROLLUP_PERIODS.items():
+        for metric, value in values.items():
+            cursor.execute(f"""INSERT OR REPLACE INTO health_rollups
+                               SELECT user_id, '{metric}', '{period}', strftime('{bucket_format}', timestamp),
+                                      COUNT(v), SUM(v), SUM(v * v), MIN(v), MAX(v)
+                               FROM (SELECT user_id, timestamp, {value} AS v FROM health_data)
+                               WHERE v IS NOT NULL
+                               GROUP BY user_id, strftime('{bucket_format}', timestamp)""")
+
+def _epoch_timestamp_column(cursor, schema, table):
+    """Replace a table's DATETIME timestamp text with integer epoch seconds in ts"""
+    cursor.execute(f"ALTER TABLE {schema}.{table} ADD COLUMN ts INTEGER")
+    cursor.execute(f"UPDATE {schema}.{table} SET ts = CAST(strftime('%s', timestamp) AS INTEGER)")
+    cursor.execute(f"DROP INDEX IF EXISTS {schema}.idx_{table}_user_ts")
+    cursor.execute(f"ALTER TABLE {schema}.{table} DROP COLUMN timestamp")
+    cursor.execute(f"CREATE INDEX {schema}.idx_{table}_user_ts ON {table} (user_id, ts)")
+
+def _migration_epoch_timestamps(cursor):
+    """Store time-series timestamps as epoch seconds and add per-resident timezones"""
+    for table in EPOCH_TABLES:
+        _epoch_timestamp_column(cursor, 'main', table)
+    
+    cursor.execute(f'''CREATE TABLE IF NOT EXISTS residents (
+        user_id INTEGER PRIMARY KEY,
+        timezone TEXT NOT NULL DEFAULT '{DEFAULT_TIMEZONE}'
+    )''')
+
+def _migration_alert_priority_rank(cursor):
+    """Store a numeric priority rank on alerts and index open alerts in urgency order"""
+    cursor.execute(f"ALTER TABLE alerts ADD COLUMN priority_rank INTEGER NOT NULL DEFAULT {LOWEST_PRIORITY_RANK}")
+    ranks = " ".join(f"WHEN '{priority}' THEN {rank}" for priority, rank in ALERT_PRIORITY_RANKS.items())
+    cursor.execute(f"UPDATE alerts SET priority_rank = CASE priority {ranks} ELSE {LOWEST_PRIORITY_RANK} END")
+    
+    # Only open alerts are indexed, so both stay as small as the open backlog
+    cursor.execute("DROP INDEX IF EXISTS idx_alerts_open")
+    cursor.execute("CREATE INDEX idx_alerts_open ON alerts (user_id, priority_rank, timestamp) WHERE handled = 0")
+    cursor.execute("CREATE INDEX idx_alerts_open_rank ON alerts (priority_rank, timestamp) WHERE handled = 0")
+
+def _migration_alert_occurrences(cursor):
+    """Count repeats of an alert on its row instead of storing a row per repeat"""
+    cursor.execute("ALTER TABLE alerts ADD COLUMN occurrences INTEGER NOT NULL DEFAULT 1")
+    cursor.execute("ALTER TABLE alerts ADD COLUMN last_occurred DATETIME")
+    cursor.execute("UPDATE alerts SET last_occurred = timestamp")
+
+MIGRATIONS = [
+    _migration_base_tables,
+    _migration_time_series_indexes,
+    _migration_blood_pressure_columns,
+    _migration_reminder_day_mask,
+    _migration_health_rollups,
+    _migration_epoch_timestamps,
+    _migration_alert_priority_rank,
+    _migration_alert_occurrences,
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+def get_schema_version(conn):
+    """Get the schema version recorded in the database"""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def _seed_id_ranges(cursor, shard):
+    """Start a shard's AUTOINCREMENT sequences at the bottom of its id range"""
+    floor = shard << ID_SHARD_BITS
+    tables = cursor.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND sql LIKE '%AUTOINCREMENT%'"
+    ).fetchall()
+    for (table,) in tables:
+        if not cursor.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = ?", (floor, table)).rowcount:
+            cursor.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)", (table, floor))
+
+@retry_on_busy
+def _create_shard_tables(shard):
+    with shard_connection(shard) as conn:
+        # Fast path: nothing to do when the database is already current
+        if get_schema_version(conn) >= SCHEMA_VERSION:
+            return
+        
+        # Take the write lock before re-checking so concurrent starters migrate once
+        if not conn.in_transaction:
+            conn.execute("BEGIN IMMEDIATE")
+        version = get_schema_version(conn)
+        
+        cursor = conn.cursor()
+        for migration in MIGRATIONS[version:]:
+            migration(cursor)
+        if shard:
+            _seed_id_ranges(cursor, shard)
+        
+        cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    
+    # Data backfills run after the schema change commits, in short transactions
+    if version < MIGRATIONS.index(_migration_blood_pressure_columns) + 1:
+        backfill_blood_pressure(shards=[shard])
+    if version < MIGRATIONS.index(_migration_epoch_timestamps) + 1:
+        upgrade_archives(shards=[shard])
+
+def create_tables():
+    """Create all tables and apply any pending schema migrations on every shard"""
+    for shard in range(SHARD_COUNT):
+        _create_shard_tables(shard)
+
+# Resident and timestamp functions
+_resident_zones = {}
+
+def _zone(name):
+    """Look up an IANA timezone name, raising ValueError if it is unknown"""
+    if name == 'UTC':
+        return timezone.utc
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError, TypeError) as e:
+        raise ValueError(f"Unknown timezone {name}") from e
+
+def _resident_zone(user_id):
+    """Get a resident's tzinfo, cached per database"""
+    key = (DB_PATH, user_id)
+    zone = _resident_zones.get(key)
+    if zone is None:
+        with db_connection(user_id) as conn:
+            row = conn.execute("SELECT timezone FROM residents WHERE user_id = ?", (user_id,)).fetchone()
+        zone = _resident_zones[key] = _zone(row[0] if row else DEFAULT_TIMEZONE)
+    return zone
+
+def get_resident_timezone(user_id):
+    """Get the timezone name used for a resident's calendar days"""
+    return str(_resident_zone(user_id))
+
+@retry_on_busy
+def set_resident_timezone(user_id, timezone_name):
+    """Set a resident's IANA timezone (e.g. 'Europe/London')"""
+    zone = _zone(timezone_name)
+    
+    with db_connection(user_id) as conn:
+        conn.execute(
+            """INSERT INTO residents (user_id, timezone) VALUES (?, ?)
+               ON CONFLICT (user_id) DO UPDATE SET timezone = excluded.timezone""",
+            (user_id, timezone_name)
+        )
+    
+    _resident_zones[(DB_PATH, user_id)] = zone
+
+def parse_timestamp(value=None):
+    """
+    Convert a datetime, ISO 8601 string or epoch seconds to integer epoch
+    seconds (now if value is None). Times without an offset are UTC.
+    """
+    if value is None:
+        return int(time.time())
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        try:
+            datetime.fromtimestamp(value, timezone.utc)
+        except (OverflowError, OSError, ValueError):
+            raise ValueError(f"Timestamp {value} is out of range") from None
+        return int(value)
+    if not isinstance(value, datetime):
+        value = datetime.fromisoformat(str(value))
+    
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+def _local_midnight(day, zone):
+    """Epoch seconds at the start of a calendar day in zone"""
+    return int(datetime(day.year, day.month, day.day, tzinfo=zone).timestamp())
+
+def _is_date_only(value):
+    if isinstance(value, date):
+        return not isinstance(value, datetime)
+    return isinstance(value, str) and len(value) == 10
+
+def _range_bounds(user_id, start_date, end_date):
+    """
+    Convert an inclusive start/end range to half-open [start_ts, end_ts)
+    epoch seconds.
+
+    Plain dates are the resident's calendar days, so end_date covers the
+    whole day; datetimes and epoch seconds are exact.
+    """
+    bounds = []
+    for value, is_end in ((start_date, 0), (end_date, 1)):
+        if _is_date_only(value):
+            day = date.fromisoformat(str(value)) + timedelta(days=is_end)
+            bounds.append(_local_midnight(day, _resident_zone(user_id)))
+        else:
+            bounds.append(parse_timestamp(value) + is_end)
+    return tuple(bounds)
+
+# Renders ts in the 'YYYY-MM-DD HH:MM:SS' UTC form the API has always returned
+_TIMESTAMP_SQL = "strftime('%Y-%m-%d %H:%M:%S', ts, 'unixepoch') AS timestamp"
 
 # Health data functions
-def record_health_data(user_id, heart_rate, bp, glucose):
-    """Record new health data"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute(
-        "INSERT INTO health_data (user_id, heart_rate, bp, glucose) VALUES (?, ?, ?, ?)",
-        (user_id, heart_rate, bp, glucose)
-    )
+def parse_blood_pressure(bp):
+    """Split a "120/80" reading into integer (systolic, diastolic), or (None, None) if invalid"""
+    try:
+        systolic, diastolic = map(int, str(bp).split('/'))
+    except (TypeError, ValueError):
+        return None, None
+    return systolic, diastolic
+
+def _parse_number(value, name):
+    """A finite number (int when integral) from a number or numeric string, else ValueError"""
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise ValueError(f"Invalid {name} {value!r}")
+    try:
+        number = float(value)
+    except ValueError:
+        raise ValueError(f"Invalid {name} {value!r}") from None
+    if not math.isfinite(number):
+        raise ValueError(f"Invalid {name} {value!r}")
+    return int(number) if number.is_integer() else number
+
+def parse_user_id(value):
+    """A resident id as an int, or ValueError if it is not an integer"""
+    user_id = _parse_number(value, 'user_id')
+    if not isinstance(user_id, int):
+        raise ValueError(f"Invalid user_id {value!r}")
+    return user_id
+
+def parse_health_reading(reading):
+    """
+    Validate a health reading dict (user_id, heart_rate, bp, glucose and an
+    optional timestamp) and return a typed copy with systolic/diastolic
+    parsed and the timestamp as epoch seconds (now if missing). Raises
+    ValueError for an invalid field, KeyError for a missing one.
+    """
+    systolic, diastolic = parse_blood_pressure(reading['bp'])
+    if systolic is None:
+        raise ValueError('Invalid bp, expected "systolic/diastolic"')
+    return {
+        'user_id': parse_user_id(reading['user_id']),
+        'heart_rate': _parse_number(reading['heart_rate'], 'heart_rate'),
+        'bp': f"{systolic}/{diastolic}",
+        'systolic': systolic,
+        'diastolic': diastolic,
+        'glucose': _parse_number(reading['glucose'], 'glucose'),
+        'timestamp': parse_timestamp(reading.get('timestamp'))
+    }
+
+def parse_activity_entry(entry):
+    """
+    Validate an activity dict (user_id, activity and optional status and
+    timestamp) like parse_health_reading; status defaults to 'active'.
+    """
+    status = entry.get('status', 'active')
+    for name, value in (('activity', entry['activity']), ('status', status)):
+        if not isinstance(value, str) or not value:
+            raise ValueError(f"Invalid {name} {value!r}")
+    return {
+        'user_id': parse_user_id(entry['user_id']),
+        'activity': entry['activity'],
+        'status': status,
+        'timestamp': parse_timestamp(entry.get('timestamp'))
+    }
+
+@retry_on_busy
+def _backfill_blood_pressure_batch(shard, first_id, last_id):
+    with shard_connection(shard) as conn:
+        return conn.execute(
+            f"""UPDATE health_data
+               SET systolic = {_BP_SQL['systolic']}, diastolic = {_BP_SQL['diastolic']}
+               WHERE id BETWEEN ? AND ? AND systolic IS NULL AND instr(bp, '/') > 0""",
+            (first_id, last_id)
+        ).rowcount
+
+def backfill_blood_pressure(batch_size=5000, shards=None):
+    """
+    Populate systolic/diastolic from the legacy bp text for existing rows.
+
+    Works through the table in id ranges, one short transaction per batch,
+    so ingest can keep writing while it runs. Safe to re-run.
+    """
+    updated = 0
+    for shard in range(SHARD_COUNT) if shards is None else shards:
+        with shard_connection(shard) as conn:
+            min_id, max_id = conn.execute("SELECT COALESCE(MIN(id), 1), COALESCE(MAX(id), 0) FROM health_data").fetchone()
+        
+        for first_id in range(min_id, max_id + 1, batch_size):
+            updated += _backfill_blood_pressure_batch(shard, first_id, first_id + batch_size - 1)
     
-    conn.commit()
-    conn.close()
+    return updated
 
-def get_latest_health_data(user_id):
-    """Get the latest health data for a user"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
+def _update_health_rollups(conn, rows):
+    """
+    Fold (user_id, ts, {metric: value}) readings into health_rollups.
+
+    Readings are aggregated per bucket in Python first, so a bulk write costs
+    one upsert per touched bucket rather than one per reading.
+    """
+    buckets = {}
+    # Buckets are UTC hours/days; format each distinct hour once
+    hour_buckets = {}
+    for user_id, ts, values in rows:
+        hour = ts - ts % 3600
+        period_buckets = hour_buckets.get(hour)
+        if period_buckets is None:
+            hour_text = time.strftime(ROLLUP_PERIODS['hour'], time.gmtime(hour))
+            period_buckets = hour_buckets[hour] = (('hour', hour_text), ('day', hour_text[:10]))
+        for metric, value in values.items():
+            if value is None:
+                continue
+            for period, bucket in period_buckets:
+                key = (user_id, metric, period, bucket)
+                stats = buckets.get(key)
+                if stats is None:
+                    buckets[key] = [1, value, value * value, value, value]
+                else:
+                    stats[0] += 1
+                    stats[1] += value
+                    stats[2] += value * value
+                    stats[3] = min(stats[3], value)
+                    stats[4] = max(stats[4], value)
     
-    cursor.execute(
-        "SELECT * FROM health_data WHERE user_id = ? ORDER BY timestamp DESC LIMIT 1",
-        (user_id,)
+    conn.executemany(
+        """INSERT INTO health_rollups (user_id, metric, period, bucket, count, sum, sum_sq, min, max)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+           ON CONFLICT (user_id, period, metric, bucket) DO UPDATE SET
+               count = count + excluded.count,
+               sum = sum + excluded.sum,
+               sum_sq = sum_sq + excluded.sum_sq,
+               min = MIN(min, excluded.min),
+               max = MAX(max, excluded.max)""",
+        [key + tuple(stats) for key, stats in buckets.items()]
     )
+
+# Kinds of resident data whose writes are versioned for caches of derived answers
+DATA_KINDS = ('health', 'activity', 'reminders', 'alerts', 'social')
+# Bumped after every write of each kind (in this process)
+_data_versions = dict.fromkeys(DATA_KINDS, 0)
+
+def data_version(*kinds):
+    """Version of the given kinds of resident data (all by default); it changes after every write"""
+    return tuple(_data_versions[kind] for kind in kinds or DATA_KINDS)
+
+def _data_changed(kind):
+    _data_versions[kind] += 1
+
+@retry_on_busy
+def record_health_data(user_id, heart_rate, bp, glucose, timestamp=None):
+    """Record new health data, taken at timestamp (see parse_timestamp, defaults to now)"""
+    systolic, diastolic = parse_blood_pressure(bp)
+    ts = parse_timestamp(timestamp)
     
-    result = cursor.fetchone()
-    conn.close()
+    with db_connection(user_id) as conn:
+        conn.execute(
+            """INSERT INTO health_data (user_id, heart_rate, bp, systolic, diastolic, glucose, ts)
+               VALUES (?, ?, ?, ?, ?, ?, ?)""",
+            (user_id, heart_rate, bp, systolic, diastolic, glucose, ts)
+        )
+        _update_health_rollups(conn, [(user_id, ts, {
+            'heart_rate': heart_rate, 'systolic': systolic, 'diastolic': diastolic, 'glucose': glucose
+        })])
+    
+    _data_changed('health')
+
+@retry_on_busy
+def _insert_health_rows(shard, rows, rollup_rows):
+    with shard_connection(shard) as conn:
+        conn.executemany(
+            """INSERT INTO health_data (user_id, heart_rate, bp, systolic, diastolic, glucose, ts)
+               VALUES (?, ?, ?, ?, ?, ?, ?)""",
+            rows
+        )
+        _update_health_rollups(conn, rollup_rows)
+
+def record_health_data_bulk(readings):
+    """
+    Record many health readings in a single transaction per shard.
+
+    Each reading is a dict with user_id, heart_rate, bp, glucose and an
+    optional timestamp (see parse_timestamp, defaults to now). Returns the
+    number of rows written.
+    """
+    shards = {}
+    for r in readings:
+        systolic, diastolic = parse_blood_pressure(r['bp'])
+        ts = parse_timestamp(r.get('timestamp'))
+        rows, rollup_rows = shards.setdefault(shard_for(r['user_id']), ([], []))
+        rows.append((r['user_id'], r['heart_rate'], r['bp'], systolic, diastolic, r['glucose'], ts))
+        rollup_rows.append((r['user_id'], ts, {
+            'heart_rate': r['heart_rate'], 'systolic': systolic, 'diastolic': diastolic, 'glucose': r['glucose']
+        }))
+    
+    for shard, (rows, rollup_rows) in shards.items():
+        _insert_health_rows(shard, rows, rollup_rows)
+    
+    _data_changed('health')
+    return sum(len(rows) for rows, _ in shards.values())
+
+def get_latest_health_data(user_id):
+    """Get the latest health data for a user"""
+    with db_connection(user_id) as conn:
+        result = conn.execute(
+            f"SELECT *, {_TIMESTAMP_SQL} FROM health_data WHERE user_id = ? ORDER BY ts DESC LIMIT 1",
+            (user_id,)
+        ).fetchone()
     
     return dict(result) if result else None
 
 def get_health_data_range(user_id, start_date, end_date):
-    """Get health data for a user within a date range"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute(
-        """SELECT * FROM health_data 
-           WHERE user_id = ? AND timestamp BETWEEN ? AND ?
-           ORDER BY timestamp""",
-        (user_id, start_date, end_date)
-    )
+    """Get health data for a user within a date range, including archived months"""
+    return list(iter_health_data_range(user_id, start_date, end_date))
+
+def iter_health_data_range(user_id, start_date, end_date, after=None, batch_size=RANGE_BATCH_SIZE):
+    """
+    Yield health data rows in (ts, id) order, fetching one keyset page at a
+    time so memory stays flat however large the range is. Pass the (ts, id)
+    of the last row seen as `after` to resume.
+    """
+    return _iter_range('health_data', user_id, *_range_bounds(user_id, start_date, end_date), after, batch_size)
+
+def get_health_data_page(user_id, start_date, end_date, limit, after=None):
+    """Get one page of health data and the (ts, id) key to resume after, or None at the end"""
+    start_ts, end_ts = _range_bounds(user_id, start_date, end_date)
+    with db_connection(user_id) as conn:
+        page = _select_range_page(conn, 'health_data', user_id, start_ts, end_ts, after, limit)
     
-    results = cursor.fetchall()
-    conn.close()
+    next_key = (page[-1]['ts'], page[-1]['id']) if len(page) == limit else None
+    return [dict(row) for row in page], next_key
+
+def get_health_data_columns(user_id, start_date, end_date):
+    """
+    Get health data for a user within a date range as typed NumPy columns.
+
+    Rows go straight from the cursor into one structured array (see
+    HEALTH_COLUMN_DTYPES) without building a dict per row; the returned dict
+    maps each column name to a view on that array.
+    """
+    data = _select_columns('health_data', HEALTH_COLUMN_DTYPES, user_id, *_range_bounds(user_id, start_date, end_date))
+    return {name: data[name] for name in data.dtype.names}
+
+def get_health_data_frame(user_id, start_date, end_date):
+    """Get health data for a user within a date range as a pandas DataFrame with fixed dtypes"""
+    import pandas as pd
+    
+    start_ts, end_ts = _range_bounds(user_id, start_date, end_date)
+    return pd.DataFrame(_select_columns('health_data', HEALTH_COLUMN_DTYPES, user_id, start_ts, end_ts))
+
+def get_high_blood_pressure_readings(user_id, start_date, end_date, systolic_above=140, diastolic_above=90):
+    """Get readings within a date range where blood pressure exceeds the given limits"""
+    start_ts, end_ts = _range_bounds(user_id, start_date, end_date)
+    with db_connection(user_id) as conn:
+        results = conn.execute(
+            f"""SELECT *, {_TIMESTAMP_SQL} FROM health_data
+                WHERE user_id = ? AND ts >= ? AND ts < ?
+                  AND (systolic > ? OR diastolic > ?)
+                ORDER BY ts""",
+            (user_id, start_ts, end_ts, systolic_above, diastolic_above)
+        ).fetchall()
     
     return [dict(row) for row in results]
 
+def get_health_summary(user_id, start_date, end_date):
+    """Get count, average, minimum and maximum of each vital sign within a date range"""
+    start_ts, end_ts = _range_bounds(user_id, start_date, end_date)
+    with db_connection(user_id) as conn:
+        result = conn.execute(
+            """SELECT COUNT(*) AS count,
+                      AVG(heart_rate) AS avg_heart_rate, MIN(heart_rate) AS min_heart_rate, MAX(heart_rate) AS max_heart_rate,
+                      AVG(systolic) AS avg_systolic, MIN(systolic) AS min_systolic, MAX(systolic) AS max_systolic,
+                      AVG(diastolic) AS avg_diastolic, MIN(diastolic) AS min_diastolic, MAX(diastolic) AS max_diastolic,
+                      AVG(glucose) AS avg_glucose, MIN(glucose) AS min_glucose, MAX(glucose) AS max_glucose
+               FROM health_data
+               WHERE user_id = ? AND ts >= ? AND ts < ?""",
+            (user_id, start_ts, end_ts)
+        ).fetchone()
+    
+    return dict(result)
+
+def _rollup_stats(count, total, total_sq, minimum, maximum):
+    mean = total / count if count else None
+    std = math.sqrt(max(total_sq / count - mean * mean, 0.0)) if count else None
+    return {'count': count, 'mean': mean, 'std': std, 'min': minimum, 'max': maximum}
+
+def get_health_rollups(user_id, metric, period, start_date, end_date):
+    """
+    Get per-bucket statistics for one metric from the hourly or daily rollups.
+
+    Buckets are UTC and compared as text, so pass dates like '2026-01-01'
+    (daily) or '2026-01-01 08:00:00' (hourly).
+    """
+    if metric not in ROLLUP_METRICS or period not in ROLLUP_PERIODS:
+        raise ValueError(f"Unknown rollup {period}/{metric}")
+    
+    with db_connection(user_id) as conn:
+        results = conn.execute(
+            """SELECT bucket, count, sum, sum_sq, min, max FROM health_rollups
+               WHERE user_id = ? AND metric = ? AND period = ? AND bucket BETWEEN ? AND ?
+               ORDER BY bucket""",
+            (user_id, metric, period, start_date, end_date)
+        ).fetchall()
+    
+    return [{'bucket': row['bucket'], **_rollup_stats(*tuple(row)[1:])} for row in results]
+
+def get_health_rollup_summary(user_id, start_date, end_date):
+    """Get overall count, mean, std, min and max per metric by combining daily rollups"""
+    with db_connection(user_id) as conn:
+        results = conn.execute(
+            """SELECT metric, SUM(count), SUM(sum), SUM(sum_sq), MIN(min), MAX(max)
+               FROM health_rollups
+               WHERE user_id = ? AND period = 'day' AND bucket BETWEEN ? AND ?
+               GROUP BY metric""",
+            (user_id, start_date, end_date)
+        ).fetchall()
+    
+    return {row[0]: _rollup_stats(*tuple(row)[1:]) for row in results}
+
 # Activity functions
-def record_activity(user_id, activity, status):
-    """Record new activity data"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute(
-        "INSERT INTO activity_log (user_id, activity, status) VALUES (?, ?, ?)",
-        (user_id, activity, status)
-    )
+@retry_on_busy
+def record_activity(user_id, activity, status, timestamp=None):
+    """Record new activity data, taken at timestamp (defaults to now)"""
+    ts = parse_timestamp(timestamp)
+    with db_connection(user_id) as conn:
+        conn.execute(
+            "INSERT INTO activity_log (user_id, activity, status, ts) VALUES (?, ?, ?, ?)",
+            (user_id, activity, status, ts)
+        )
     
-    conn.commit()
-    conn.close()
+    _data_changed('activity')
 
-def get_daily_activity_summary(user_id, date):
-    """Get activity summary for a specific date"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
+@retry_on_busy
+def _insert_activity_rows(shard, rows):
+    with shard_connection(shard) as conn:
+        conn.executemany(
+            "INSERT INTO activity_log (user_id, activity, status, ts) VALUES (?, ?, ?, ?)",
+            rows
+        )
+
+def record_activity_bulk(activities):
+    """
+    Record many activity entries in a single transaction per shard.
+
+    Each entry is a dict with user_id, activity, an optional status
+    (default 'active') and an optional timestamp. Returns the number of
+    rows written.
+    """
+    shards = {}
+    for a in activities:
+        shards.setdefault(shard_for(a['user_id']), []).append(
+            (a['user_id'], a['activity'], a.get('status', 'active'), parse_timestamp(a.get('timestamp')))
+        )
     
-    cursor.execute(
-        """SELECT activity, COUNT(*) as count 
-           FROM activity_log 
-           WHERE user_id = ? AND date(timestamp) = ? 
-           GROUP BY activity""",
-        (user_id, date)
-    )
+    for shard, rows in shards.items():
+        _insert_activity_rows(shard, rows)
     
-    results = cursor.fetchall()
-    conn.close()
+    _data_changed('activity')
+    return sum(len(rows) for rows in shards.values())
+
+def get_daily_activity_summary(user_id, date=None):
+    """Get activity summary for a calendar day in the resident's timezone (default today)"""
+    if date is None:
+        date = datetime.now(_resident_zone(user_id)).date()
+    start_ts, end_ts = _range_bounds(user_id, date, date)
+    
+    with db_connection(user_id) as conn:
+        results = conn.execute(
+            """SELECT activity, COUNT(*) as count 
+               FROM activity_log 
+               WHERE user_id = ? AND ts >= ? AND ts < ? 
+               GROUP BY activity""",
+            (user_id, start_ts, end_ts)
+        ).fetchall()
     
     return [dict(row) for row in results]
 
 def get_activity_data_range(user_id, start_date, end_date):
-    """Get activity data for a user within a date range"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute(
-        """SELECT * FROM activity_log 
-           WHERE user_id = ? AND timestamp BETWEEN ? AND ?
-           ORDER BY timestamp""",
-        (user_id, start_date, end_date)
-    )
-    
-    results = cursor.fetchall()
-    conn.close()
+    """Get activity data for a user within a date range, including archived months"""
+    return list(iter_activity_data_range(user_id, start_date, end_date))
+
+def iter_activity_data_range(user_id, start_date, end_date, after=None, batch_size=RANGE_BATCH_SIZE):
+    """Yield activity rows in (ts, id) order one keyset page at a time"""
+    return _iter_range('activity_log', user_id, *_range_bounds(user_id, start_date, end_date), after, batch_size)
+
+def get_activity_data_page(user_id, start_date, end_date, limit, after=None):
+    """Get one page of activity data and the (ts, id) key to resume after, or None at the end"""
+    start_ts, end_ts = _range_bounds(user_id, start_date, end_date)
+    with db_connection(user_id) as conn:
+        page = _select_range_page(conn, 'activity_log', user_id, start_ts, end_ts, after, limit)
     
-    return [dict(row) for row in results]
+    next_key = (page[-1]['ts'], page[-1]['id']) if len(page) == limit else None
+    return [dict(row) for row in page], next_key
+
+def get_activity_data_columns(user_id, start_date, end_date):
+    """Get activity data for a user within a date range as typed NumPy columns"""
+    data = _select_columns('activity_log', ACTIVITY_COLUMN_DTYPES, user_id, *_range_bounds(user_id, start_date, end_date))
+    return {name: data[name] for name in data.dtype.names}
 
 # Reminder functions
+def days_to_mask(days):
+    """Convert a list of day names ("Mon", "Tue", ...) to a weekday bitmask"""
+    mask = 0
+    for day in days:
+        if day in WEEKDAYS:
+            mask |= 1 << WEEKDAYS.index(day)
+    return mask
+
+def _normalize_time(value):
+    """Zero-pad "H:MM" times so they compare correctly as text"""
+    try:
+        return datetime.strptime(value, '%H:%M').strftime('%H:%M')
+    except (TypeError, ValueError):
+        return value
+
+# Callbacks run after a reminder changes, as callback(action, reminder) with
+# action 'add', 'status' or 'delete' and the reminder row (just {'id'} on delete)
+_reminder_listeners = []
+
+def add_reminder_listener(callback):
+    """Register a callback for reminder changes (e.g. to keep a scheduler in sync)"""
+    _reminder_listeners.append(callback)
+
+def remove_reminder_listener(callback):
+    """Unregister a callback added with add_reminder_listener"""
+    _reminder_listeners.remove(callback)
+
+def _notify_reminder_listeners(action, reminder):
+    for callback in list(_reminder_listeners):
+        callback(action, reminder)
+
+@retry_on_busy
 def add_reminder(user_id, message, time, days, reminder_type):
-    """Add a new reminder"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
+    """Add a new reminder; returns its id"""
     # Convert days list to JSON string
     days_json = json.dumps(days)
+    reminder = {
+        'user_id': user_id,
+        'message': message,
+        'time': _normalize_time(time),
+        'days': days_json,
+        'day_mask': days_to_mask(days),
+        'type': reminder_type,
+        'status': 'pending'
+    }
     
-    cursor.execute(
-        """INSERT INTO reminders (user_id, message, time, days, type) 
-           VALUES (?, ?, ?, ?, ?)""",
-        (user_id, message, time, days_json, reminder_type)
-    )
+    with db_connection(user_id) as conn:
+        reminder['id'] = conn.execute(
+            """INSERT INTO reminders (user_id, message, time, days, day_mask, type) 
+               VALUES (?, ?, ?, ?, ?, ?)""",
+            (user_id, reminder['message'], reminder['time'], days_json, reminder['day_mask'], reminder_type)
+        ).lastrowid
+    
+    _data_changed('reminders')
+    _notify_reminder_listeners('add', reminder)
+    return reminder['id']
+
+def get_reminder(reminder_id):
+    """Get a reminder by id, or None if there is none"""
+    for shard in _shards_for_id(reminder_id):
+        with shard_connection(shard) as conn:
+            row = conn.execute("SELECT * FROM reminders WHERE id = ?", (reminder_id,)).fetchone()
+        if row:
+            return dict(row)
+    return None
+
+def get_pending_reminders_all():
+    """Get every resident's pending reminders"""
+    def query(conn):
+        return [dict(row) for row in conn.execute("SELECT * FROM reminders WHERE status = 'pending'")]
     
-    conn.commit()
-    conn.close()
+    return fan_out(query)
 
 def get_due_reminders(user_id, current_time, current_day):
     """Get reminders due at the current time and day"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    with db_connection(user_id) as conn:
+        results = conn.execute(
+            """SELECT * FROM reminders 
+               WHERE time = ? AND status = 'pending' AND user_id = ? AND day_mask & ? != 0""",
+            (_normalize_time(current_time), user_id, days_to_mask([current_day]))
+        ).fetchall()
     
-    cursor.execute(
-        """SELECT * FROM reminders 
-           WHERE user_id = ? AND time = ? AND status = 'pending'""",
-        (user_id, current_time)
-    )
+    return [dict(row) for row in results]
+
+def get_due_reminders_all(current_time, current_day, window_minutes=0):
+    """
+    Get pending reminders for every resident due within window_minutes of
+    current_time on current_day.
+
+    Windows that cross midnight match the neighbouring day's schedule, so a
+    00:02 reminder is due at 23:58 on the previous day with a 5 minute window.
+    """
+    now = datetime.strptime(current_time, '%H:%M')
+    day_index = WEEKDAYS.index(current_day)
+    start = now - timedelta(minutes=window_minutes)
+    end = now + timedelta(minutes=window_minutes)
+    
+    # Split the window into same-day (start, end, day) ranges
+    ranges = []
+    if start.date() < now.date():
+        ranges.append((start.strftime('%H:%M'), '23:59', (day_index - 1) % 7))
+        start = now.replace(hour=0, minute=0)
+    if end.date() > now.date():
+        ranges.append(('00:00', end.strftime('%H:%M'), (day_index + 1) % 7))
+        end = now.replace(hour=23, minute=59)
+    ranges.append((start.strftime('%H:%M'), end.strftime('%H:%M'), day_index))
     
-    results = cursor.fetchall()
-    conn.close()
+    conditions = []
+    params = []
+    for range_start, range_end, day in ranges:
+        conditions.append("(time BETWEEN ? AND ? AND status = 'pending' AND day_mask & ? != 0)")
+        params.extend([range_start, range_end, 1 << day])
     
-    # Filter reminders to those scheduled for today
-    filtered_reminders = []
-    for reminder in results:
-        days = json.loads(reminder['days'])
-        if current_day in days:
-            filtered_reminders.append(dict(reminder))
+    def query(conn):
+        results = conn.execute(
+            f"SELECT * FROM reminders WHERE {' OR '.join(conditions)} ORDER BY time, user_id",
+            params
+        ).fetchall()
+        return [dict(row) for row in results]
     
-    return filtered_reminders
+    return fan_out(query, key=lambda reminder: (reminder['time'], reminder['user_id']))
 
+@retry_on_busy
 def update_reminder_status(reminder_id, status):
     """Update the status of a reminder"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    if not _execute_by_id("UPDATE reminders SET status = ? WHERE id = ?", reminder_id, (status,)):
+        return
     
-    cursor.execute(
-        "UPDATE reminders SET status = ? WHERE id = ?",
-        (status, reminder_id)
-    )
-    
-    conn.commit()
-    conn.close()
+    _data_changed('reminders')
+    if _reminder_listeners:
+        reminder = get_reminder(reminder_id)
+        if reminder:
+            _notify_reminder_listeners('status', reminder)
 
+@retry_on_busy
 def delete_reminder(reminder_id):
     """Delete a reminder"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute("DELETE FROM reminders WHERE id = ?", (reminder_id,))
-    
-    conn.commit()
-    conn.close()
+    if _execute_by_id("DELETE FROM reminders WHERE id = ?", reminder_id):
+        _data_changed('reminders')
+        _notify_reminder_listeners('delete', {'id': reminder_id})
 
 # Alert functions
+# Dedup cache: (database, user_id, type, priority, signature) -> (alert id, expiry),
+# oldest first, so expired entries are evicted from the front. The lock only
+# guards the cache; database work happens outside it
+_alert_dedup = OrderedDict()
+_alert_dedup_lock = threading.Lock()
+
+def _alert_signature(message):
+    """An alert message with its numbers blanked, so repeats of one condition match"""
+    return re.sub(r"\d+(?:\.\d+)?", "#", str(message))
+
+def _find_open_alert(conn, user_id, alert_type, priority, priority_rank, signature):
+    """Id of an open alert matching a new one that recurred within the dedup window"""
+    rows = conn.execute(
+        """SELECT id, type, priority, message FROM alerts
+           WHERE user_id = ? AND handled = 0 AND priority_rank = ?
+             AND last_occurred >= datetime('now', ?)
+           ORDER BY last_occurred DESC""",
+        (user_id, priority_rank, f"-{ALERT_DEDUP_WINDOW} seconds")
+    ).fetchall()
+    
+    for row in rows:
+        if row['type'] == alert_type and row['priority'] == priority and _alert_signature(row['message']) == signature:
+            return row['id']
+    return None
+
+def _merge_alert(conn, alert_id, message):
+    """Count a repeat on an open alert; False if it has been resolved since"""
+    return conn.execute(
+        """UPDATE alerts SET occurrences = occurrences + 1, last_occurred = CURRENT_TIMESTAMP, message = ?
+           WHERE id = ? AND handled = 0""",
+        (message, alert_id)
+    ).rowcount > 0
+
+@retry_on_busy
 def create_alert(user_id, message, alert_type, priority):
-    """Create a new alert"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute(
-        """INSERT INTO alerts (user_id, message, type, priority) 
-           VALUES (?, ?, ?, ?)""",
-        (user_id, message, alert_type, priority)
-    )
+    """
+    Create a new alert, or merge a repeat into the open one; returns its id.
+
+    A repeat is an alert for the same resident, type and priority whose
+    message differs only in its numbers, arriving within
+    ALERT_DEDUP_WINDOW seconds of the open alert's last occurrence. It
+    bumps that alert's occurrences and takes over its message. A different
+    priority never matches, so escalations are inserted immediately.
+    """
+    priority_rank = ALERT_PRIORITY_RANKS.get(priority, LOWEST_PRIORITY_RANK)
+    signature = _alert_signature(message)
+    key = (DB_PATH, user_id, alert_type, priority, signature)
+    now = time.time()
+    
+    with _alert_dedup_lock:
+        cached = _alert_dedup.get(key)
+    
+    with db_connection(user_id) as conn:
+        # Take the shard's write lock before looking, so concurrent repeats of
+        # one alert serialize here and the later ones merge into the first
+        if not conn.in_transaction:
+            conn.execute("BEGIN IMMEDIATE")
+        alert_id = cached[0] if cached and cached[1] > now else None
+        merged = alert_id is not None and _merge_alert(conn, alert_id, message)
+        if not merged:
+            # On a cache miss (e.g. after a restart) or a stale entry the open alerts index has the answer
+            alert_id = _find_open_alert(conn, user_id, alert_type, priority, priority_rank, signature)
+            merged = alert_id is not None and _merge_alert(conn, alert_id, message)
+        
+        if not merged:
+            alert_id = conn.execute(
+                """INSERT INTO alerts (user_id, message, type, priority, priority_rank, last_occurred) 
+                   VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)""",
+                (user_id, message, alert_type, priority, priority_rank)
+            ).lastrowid
+    
+    with _alert_dedup_lock:
+        # Each occurrence restarts the window
+        _alert_dedup[key] = (alert_id, now + ALERT_DEDUP_WINDOW)
+        _alert_dedup.move_to_end(key)
+        
+        # Evict expired entries, then the oldest beyond the size bound
+        while _alert_dedup and (next(iter(_alert_dedup.values()))[1] <= now
+                                or len(_alert_dedup) > ALERT_DEDUP_MAX_KEYS):
+            _alert_dedup.popitem(last=False)
     
-    conn.commit()
-    conn.close()
+    _data_changed('alerts')
+    return alert_id
 
 def get_active_alerts(user_id):
-    """Get active (unhandled) alerts for a user"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute(
-        """SELECT * FROM alerts 
-           WHERE user_id = ? AND handled = 0 
-           ORDER BY 
-           CASE 
-             WHEN priority = 'critical' THEN 1
-             WHEN priority = 'high' THEN 2
-             WHEN priority = 'medium' THEN 3
-             ELSE 4
-           END""",
-        (user_id,)
-    )
-    
-    results = cursor.fetchall()
-    conn.close()
+    """Get active (unhandled) alerts for a user, most urgent (then oldest) first"""
+    with db_connection(user_id) as conn:
+        results = conn.execute(
+            """SELECT * FROM alerts 
+               WHERE user_id = ? AND handled = 0 
+               ORDER BY priority_rank, timestamp""",
+            (user_id,)
+        ).fetchall()
     
     return [dict(row) for row in results]
 
+def get_all_active_alerts(limit=None):
+    """
+    Get active alerts for every resident, most urgent (then oldest) first.
+
+    Each shard walks the open-alerts index in order and stops after `limit`
+    rows, so the cost follows the number of alerts returned rather than the
+    alert history.
+    """
+    def query(conn):
+        results = conn.execute(
+            """SELECT * FROM alerts
+               WHERE handled = 0
+               ORDER BY priority_rank, timestamp
+               LIMIT ?""",
+            (-1 if limit is None else limit,)
+        ).fetchall()
+        return [dict(row) for row in results]
+    
+    alerts = fan_out(query, key=lambda alert: (alert['priority_rank'], alert['timestamp']))
+    return alerts if limit is None else alerts[:limit]
+
+@retry_on_busy
 def resolve_alert(alert_id):
     """Mark an alert as handled/resolved"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute(
-        "UPDATE alerts SET handled = 1, status = 'handled' WHERE id = ?",
-        (alert_id,)
-    )
-    
-    conn.commit()
-    conn.close()
+    if _execute_by_id("UPDATE alerts SET handled = 1, status = 'handled' WHERE id = ?", alert_id):
+        _data_changed('alerts')
 
 # Social interaction functions
+@retry_on_busy
 def record_social_interaction(user_id, interaction_type, participants, duration):
     """Record a new social interaction"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
     # Convert participants list to JSON string
     participants_json = json.dumps(participants)
     
-    cursor.execute(
-        """INSERT INTO social_interactions (user_id, type, participants, duration) 
-           VALUES (?, ?, ?, ?)""",
-        (user_id, interaction_type, participants_json, duration)
-    )
+    with db_connection(user_id) as conn:
+        conn.execute(
+            """INSERT INTO social_interactions (user_id, type, participants, duration, ts) 
+               VALUES (?, ?, ?, ?, ?)""",
+            (user_id, interaction_type, participants_json, duration, parse_timestamp())
+        )
     
-    conn.commit()
-    conn.close()
+    _data_changed('social')
 
 def get_weekly_social_summary(user_id):
-    """Get social interaction summary for the past week"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute(
-        """SELECT date(timestamp) as date, COUNT(*) as count 
-           FROM social_interactions 
-           WHERE user_id = ? AND timestamp >= date('now', '-7 days') 
-           GROUP BY date(timestamp)""",
-        (user_id,)
-    )
+    """Get social interaction counts per day, in the resident's timezone, for the past week"""
+    zone = _resident_zone(user_id)
+    today = datetime.now(zone).date()
+    days = [today - timedelta(days=n) for n in range(7, -1, -1)]
+    day_starts = [_local_midnight(day, zone) for day in days]
     
-    results = cursor.fetchall()
-    conn.close()
+    with db_connection(user_id) as conn:
+        results = conn.execute(
+            "SELECT ts FROM social_interactions WHERE user_id = ? AND ts >= ?",
+            (user_id, day_starts[0])
+        ).fetchall()
     
-    return [dict(row) for row in results]
+    # Bucket by local day here; day lengths vary across DST changes
+    counts = [0] * len(days)
+    for (ts,) in results:
+        counts[bisect.bisect_right(day_starts, ts) - 1] += 1
+    
+    return [{'date': day.isoformat(), 'count': count} for day, count in zip(days, counts) if count]
 
+@retry_on_busy
 def add_social_event(user_id, title, date, event_type, participants):
     """Add a new social event"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
     # Convert participants list to JSON string
     participants_json = json.dumps(participants)
     
-    cursor.execute(
-        """INSERT INTO social_events (user_id, title, date, type, participants) 
-           VALUES (?, ?, ?, ?, ?)""",
-        (user_id, title, date, event_type, participants_json)
-    )
+    with db_connection(user_id) as conn:
+        conn.execute(
+            """INSERT INTO social_events (user_id, title, date, type, participants) 
+               VALUES (?, ?, ?, ?, ?)""",
+            (user_id, title, date, event_type, participants_json)
+        )
     
-    conn.commit()
-    conn.close()
+    _data_changed('social')
 
 def get_upcoming_social_events(user_id):
     """Get upcoming social events for a user"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute(
-        """SELECT * FROM social_events 
-           WHERE user_id = ? AND status = 'upcoming' AND date >= date('now')
-           ORDER BY date""",
-        (user_id,)
-    )
-    
-    results = cursor.fetchall()
-    conn.close()
+    with db_connection(user_id) as conn:
+        results = conn.execute(
+            """SELECT * FROM social_events 
+               WHERE user_id = ? AND status = 'upcoming' AND date >= ?
+               ORDER BY date""",
+            (user_id, datetime.now(_resident_zone(user_id)).date().isoformat())
+        ).fetchall()
     
     # Parse JSON strings back to lists
     events = []
@@ -369,3 +1337,297 @@ def get_upcoming_social_events(user_id):
         events.append(event_dict)
     
     return events
+
+# Retention and archive functions
+def get_archive_dir():
+    """Directory holding the monthly archive databases, next to DB_PATH"""
+    return os.path.join(os.path.dirname(os.path.abspath(DB_PATH)), "archive")
+
+def _archive_path(month, shard=0):
+    stem = os.path.splitext(os.path.basename(shard_path(shard)))[0]
+    return os.path.join(get_archive_dir(), f"{stem}_{month.replace('-', '_')}.db")
+
+def _month_of(ts):
+    return time.strftime('%Y-%m', time.gmtime(ts))
+
+def list_archive_months(start_ts=None, end_ts=None, shard=0):
+    """List a shard's archived months ('YYYY-MM') that overlap the half-open epoch range [start_ts, end_ts)"""
+    directory = get_archive_dir()
+    if not os.path.isdir(directory):
+        return []
+    
+    prefix = os.path.splitext(os.path.basename(shard_path(shard)))[0] + "_"
+    months = []
+    for name in os.listdir(directory):
+        # Shard 0's prefix is also the start of the other shards' names
+        if not (name.startswith(prefix) and re.fullmatch(r"\d{4}_\d{2}\.db", name[len(prefix):])):
+            continue
+        month = name[len(prefix):-3].replace("_", "-")
+        if start_ts is not None and month < _month_of(start_ts):
+            continue
+        if end_ts is not None and month > _month_of(end_ts - 1):
+            continue
+        months.append(month)
+    
+    return sorted(months)
+
+@contextmanager
+def _attached_archive(conn, month, shard=0):
+    """ATTACH a month's archive of a shard to a connection for the duration of the block"""
+    alias = f"archive_{month.replace('-', '_')}"
+    conn.execute(f"ATTACH DATABASE ? AS {alias}", (_archive_path(month, shard),))
+    try:
+        yield alias
+    finally:
+        conn.execute(f"DETACH DATABASE {alias}")
+
+def _table_columns(conn, schema, table):
+    return [(row[1], row[2]) for row in conn.execute(f"PRAGMA {schema}.table_info({table})")]
+
+def _select_keyset(conn, source, select, user_id, start_ts, end_ts, after, limit):
+    """
+    Select up to `limit` rows from one table ordered by (ts, id) after the
+    keyset `after`.
+
+    The keyset is split into two index seeks, rows sharing the last ts
+    (which the index orders by rowid) and then later ones, so a page never
+    rescans rows that were already returned.
+    """
+    rows = []
+    if after is not None:
+        rows = conn.execute(
+            f"""SELECT {select} FROM {source}
+                WHERE user_id = ? AND ts = ? AND id > ?
+                ORDER BY id LIMIT ?""",
+            (user_id, after[0], after[1], limit)
+        ).fetchall()
+        if len(rows) >= limit:
+            return rows
+        condition, params = "ts > ? AND ts >= ? AND ts < ?", (after[0], start_ts, end_ts)
+    else:
+        condition, params = "ts >= ? AND ts < ?", (start_ts, end_ts)
+    
+    rows.extend(conn.execute(
+        f"""SELECT {select} FROM {source}
+            WHERE user_id = ? AND {condition}
+            ORDER BY ts, id LIMIT ?""",
+        (user_id, *params, limit - len(rows))
+    ).fetchall())
+    return rows
+
+def _select_range_page(conn, table, user_id, start_ts, end_ts, after, limit):
+    """
+    Select up to `limit` of one user's rows in [start_ts, end_ts), ordered
+    by (ts, id) and strictly after the keyset `after`, from the live table
+    and any overlapping archives.
+    """
+    columns = [name for name, _ in _table_columns(conn, 'main', table)]
+    
+    # Archive months are disjoint and ordered, so stop once a page is full
+    rows = []
+    shard = shard_for(user_id)
+    first_ts = max(start_ts, after[0]) if after is not None else start_ts
+    for month in list_archive_months(first_ts, end_ts, shard):
+        if len(rows) >= limit:
+            break
+        with _attached_archive(conn, month, shard) as alias:
+            archived = {name for name, _ in _table_columns(conn, alias, table)}
+            if not archived:
+                continue
+            # Archives written before a later migration lack its columns
+            select = ", ".join(c if c in archived else f"NULL AS {c}" for c in columns)
+            rows.extend(_select_keyset(
+                conn, f"{alias}.{table}", f"{select}, {_TIMESTAMP_SQL}", user_id, start_ts, end_ts,
+                after, limit - len(rows)
+            ))
+    
+    live = _select_keyset(conn, f"main.{table}", f"*, {_TIMESTAMP_SQL}", user_id, start_ts, end_ts, after, limit)
+    
+    if not rows:
+        return live
+    
+    # Late-arriving rows for an archived month may still be live, so merge by key
+    rows.extend(live)
+    rows.sort(key=lambda row: (row['ts'], row['id']))
+    return rows[:limit]
+
+def _iter_range(table, user_id, start_ts, end_ts, after, batch_size):
+    while True:
+        with db_connection(user_id) as conn:
+            page = _select_range_page(conn, table, user_id, start_ts, end_ts, after, batch_size)
+        
+        for row in page:
+            yield dict(row)
+        
+        if len(page) < batch_size:
+            return
+        after = (page[-1]['ts'], page[-1]['id'])
+
+def _select_columns(table, dtypes, user_id, start_ts, end_ts):
+    """Read one user's rows in [start_ts, end_ts), live and archived, into a structured array ordered by time"""
+    dtype = np.dtype([(name, "i8" if name == "timestamp" else col_type) for name, col_type in dtypes])
+    
+    def read(conn, source, available):
+        select = ", ".join(
+            "ts" if name == "timestamp"
+            else "NULL" if name not in available
+            else f"COALESCE({name}, '')" if col_type.startswith("U")
+            else name
+            for name, col_type in dtypes
+        )
+        cursor = conn.cursor()
+        cursor.row_factory = None
+        cursor.execute(
+            f"""SELECT {select} FROM {source}
+                WHERE user_id = ? AND ts >= ? AND ts < ?
+                ORDER BY ts, id""",
+            (user_id, start_ts, end_ts)
+        )
+        return np.fromiter(cursor, dtype=dtype)
+    
+    parts = []
+    with db_connection(user_id) as conn:
+        for month in list_archive_months(start_ts, end_ts, shard_for(user_id)):
+            with _attached_archive(conn, month, shard_for(user_id)) as alias:
+                # Archives written before a later migration lack its columns
+                archived = {name for name, _ in _table_columns(conn, alias, table)}
+                if archived:
+                    parts.append(read(conn, f"{alias}.{table}", archived))
+        parts.append(read(conn, f"main.{table}", {name for name, _ in dtypes}))
+    
+    data = parts[0] if len(parts) == 1 else np.concatenate(parts)
+    if len(parts) > 1:
+        # Late-arriving rows for an archived month may still be live
+        data = data[np.argsort(data["timestamp"], kind="stable")]
+    
+    return data.view(np.dtype([(name, col_type) for name, col_type in dtypes]))
+
+def _ensure_archive_table(conn, alias, table):
+    """Create or widen an archive table to match the live table's columns"""
+    live = _table_columns(conn, 'main', table)
+    archived = {name for name, _ in _table_columns(conn, alias, table)}
+    
+    if not archived:
+        definitions = ", ".join(
+            "id INTEGER PRIMARY KEY" if name == "id" else f"{name} {col_type}" for name, col_type in live
+        )
+        conn.execute(f"CREATE TABLE {alias}.{table} ({definitions})")
+        conn.execute(f"CREATE INDEX {alias}.idx_{table}_user_ts ON {table} (user_id, ts)")
+    else:
+        for name, col_type in live:
+            if name not in archived:
+                conn.execute(f"ALTER TABLE {alias}.{table} ADD COLUMN {name} {col_type}")
+    
+    return [name for name, _ in live]
+
+@retry_on_busy
+def _archive_month(month, shard=0):
+    """Move one month of a shard's raw rows into its archive database"""
+    year, mon = map(int, month.split("-"))
+    start = calendar.timegm((year, mon, 1, 0, 0, 0))
+    end = calendar.timegm((year + mon // 12, mon % 12 + 1, 1, 0, 0, 0))
+    moved = 0
+    
+    with shard_connection(shard) as conn:
+        with _attached_archive(conn, month, shard) as alias:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                for table in ARCHIVED_TABLES:
+                    columns = ", ".join(_ensure_archive_table(conn, alias, table))
+                    # OR IGNORE makes a re-run after an interrupted move harmless
+                    conn.execute(
+                        f"""INSERT OR IGNORE INTO {alias}.{table} ({columns})
+                            SELECT {columns} FROM main.{table} WHERE ts >= ? AND ts < ?""",
+                        (start, end)
+                    )
+                    moved += conn.execute(
+                        f"DELETE FROM main.{table} WHERE ts >= ? AND ts < ?",
+                        (start, end)
+                    ).rowcount
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+    
+    return moved
+
+def run_retention(retention_days=RAW_RETENTION_DAYS, now=None, vacuum=False):
+    """
+    Move whole months of raw health_data and activity_log rows older than
+    retention_days into per-month archive databases (one set per shard).
+
+    The hourly/daily health_rollups stay in the live database, so older data
+    remains available downsampled without opening the archives, while the
+    range functions still read the raw archived rows through ATTACH.
+    Returns the number of rows moved per month.
+    """
+    now = now or datetime.now(timezone.utc)
+    cutoff_day = now - timedelta(days=retention_days)
+    cutoff = calendar.timegm((cutoff_day.year, cutoff_day.month, 1, 0, 0, 0))
+    
+    moved = {}
+    for shard in range(SHARD_COUNT):
+        with shard_connection(shard) as conn:
+            months = set()
+            for table in ARCHIVED_TABLES:
+                months.update(row[0] for row in conn.execute(
+                    f"SELECT DISTINCT strftime('%Y-%m', ts, 'unixepoch') FROM {table} WHERE ts < ?",
+                    (cutoff,)
+                ))
+        
+        if months:
+            os.makedirs(get_archive_dir(), exist_ok=True)
+        
+        for month in sorted(months):
+            moved[month] = moved.get(month, 0) + _archive_month(month, shard)
+        
+        if vacuum and months:
+            with shard_connection(shard) as conn:
+                conn.execute("VACUUM")
+    
+    return dict(sorted(moved.items()))
+
+def upgrade_archives(shards=None):
+    """
+    Convert archive tables written before epoch timestamps to the ts column.
+
+    Called by create_tables() after that migration; safe to re-run. Returns
+    the number of tables converted.
+    """
+    upgraded = 0
+    for shard in range(SHARD_COUNT) if shards is None else shards:
+        for month in list_archive_months(shard=shard):
+            conn = sqlite3.connect(_archive_path(month, shard), timeout=BUSY_TIMEOUT_MS / 1000)
+            try:
+                with conn:
+                    conn.execute("BEGIN IMMEDIATE")
+                    for table in ARCHIVED_TABLES:
+                        columns = {name for name, _ in _table_columns(conn, 'main', table)}
+                        if 'timestamp' in columns and 'ts' not in columns:
+                            _epoch_timestamp_column(conn, 'main', table)
+                            upgraded += 1
+            finally:
+                conn.close()
+    
+    return upgraded
+
+# Helpers that route, connect or parse rather than query; every other public
+# function is counted and timed for /api/agents/metrics
+_UNINSTRUMENTED = {
+    'shard_for', 'shard_path', 'get_pool', 'close_pool', 'shard_connection', 'db_connection',
+    'get_db_connection', 'fan_out', 'retry_on_busy', 'is_busy_error', 'get_schema_version', 'days_to_mask',
+    'parse_timestamp', 'parse_blood_pressure', 'parse_user_id', 'parse_health_reading',
+    'parse_activity_entry', 'add_reminder_listener', 'remove_reminder_listener',
+    'get_archive_dir', 'data_version',
+}
+
+def _instrument_functions():
+    if not metrics.METRICS_ENABLED:
+        return
+    metrics.registry.describe('eldercare_db', 'db_manager functions')
+    for name, func in list(globals().items()):
+        if (callable(func) and getattr(func, '__module__', None) == __name__
+                and not name.startswith('_') and name not in _UNINSTRUMENTED and not isinstance(func, type)):
+            globals()[name] = metrics.registry.timed(func, 'eldercare_db', function=name)
+
+_instrument_functions()
@@ -0,0 +1,173 @@
+import bisect
+import functools
+import inspect
+import os
+import threading
+import time
+
+# Set ELDERCARE_METRICS=0 to skip instrumenting agents and db_manager
+METRICS_ENABLED = os.environ.get('ELDERCARE_METRICS', '1') != '0'
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                   0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Quantiles estimated from the histogram for each series
+QUANTILES = (0.5, 0.95, 0.99)
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(labels, **extra):
+    pairs = list(labels) + list(extra.items())
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}' if pairs else ''
+
+class CallStats:
+    """Call count, error count, in-flight gauge and latency histogram of one instrumented callable"""
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.total_seconds = 0.0
+        # buckets[i] counts latencies up to LATENCY_BUCKETS[i]; the last one is +Inf
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            self.in_flight += 1
+        return time.perf_counter()
+
+    def finish(self, start, error=False):
+        elapsed = time.perf_counter() - start
+        bucket = bisect.bisect_left(LATENCY_BUCKETS, elapsed)
+        with self._lock:
+            self.in_flight -= 1
+            self.calls += 1
+            self.errors += error
+            self.total_seconds += elapsed
+            self.buckets[bucket] += 1
+
+    def quantile(self, q):
+        """Latency quantile estimated by interpolating within its histogram bucket, or None"""
+        with self._lock:
+            buckets = self.buckets[:]
+        total = sum(buckets)
+        if not total:
+            return None
+        rank = q * total
+        seen = 0
+        for i, count in enumerate(buckets):
+            if count and seen + count >= rank:
+                if i == len(LATENCY_BUCKETS):
+                    return LATENCY_BUCKETS[-1]
+                lower = LATENCY_BUCKETS[i - 1] if i else 0.0
+                return lower + (LATENCY_BUCKETS[i] - lower) * (rank - seen) / count
+            seen += count
+        return LATENCY_BUCKETS[-1]
+
+def _timed_generator(generator, stats, start):
+    # Row iterators are timed until exhausted or closed, so the latency covers every page they fetch
+    error = False
+    try:
+        yield from generator
+    except Exception:
+        error = True
+        raise
+    finally:
+        stats.finish(start, error)
+
+class MetricsRegistry:
+    """
+    Per-callable call statistics grouped into metric families, e.g.
+    'eldercare_agent' labelled by agent and method. render() writes them in
+    the Prometheus text exposition format: <family>_calls_total,
+    <family>_errors_total, <family>_in_flight, the <family>_latency_seconds
+    histogram and <family>_latency_quantile_seconds estimates.
+    """
+
+    def __init__(self):
+        self._families = {}
+        self._lock = threading.Lock()
+
+    def describe(self, family, help_text):
+        """Register a metric family and its HELP text"""
+        with self._lock:
+            self._families.setdefault(family, {'help': help_text, 'series': {}})['help'] = help_text
+
+    def stats(self, family, **labels):
+        """The CallStats of one labelled series, created on first use"""
+        key = tuple(labels.items())
+        with self._lock:
+            series = self._families.setdefault(family, {'help': family, 'series': {}})['series']
+            stats = series.get(key)
+            if stats is None:
+                stats = series[key] = CallStats()
+        return stats
+
+    def timed(self, func, family, **labels):
+        """Wrap func so each call is counted and timed under family/labels"""
+        stats = self.stats(family, **labels)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = stats.start()
+            try:
+                result = func(*args, **kwargs)
+            except Exception:
+                stats.finish(start, error=True)
+                raise
+            if inspect.isgenerator(result):
+                return _timed_generator(result, stats, start)
+            stats.finish(start)
+            return result
+        return wrapper
+
+    def instrument(self, obj, family, **labels):
+        """Time every public method of an object, labelled with method=<name>"""
+        if not METRICS_ENABLED:
+            return obj
+        for name, method in inspect.getmembers(obj, inspect.ismethod):
+            if not name.startswith('_'):
+                setattr(obj, name, self.timed(method, family, **labels, method=name))
+        return obj
+
+    def render(self):
+        """All metrics in the Prometheus text format"""
+        with self._lock:
+            families = [(family, info['help'], list(info['series'].items())) for family, info in self._families.items()]
+
+        lines = []
+        for family, help_text, series in families:
+            lines += [f'# HELP {family}_calls_total {help_text}: calls',
+                      f'# TYPE {family}_calls_total counter']
+            lines += [f'{family}_calls_total{_format_labels(key)} {stats.calls}' for key, stats in series]
+            lines += [f'# HELP {family}_errors_total {help_text}: calls that raised',
+                      f'# TYPE {family}_errors_total counter']
+            lines += [f'{family}_errors_total{_format_labels(key)} {stats.errors}' for key, stats in series]
+            lines += [f'# HELP {family}_in_flight {help_text}: calls in progress',
+                      f'# TYPE {family}_in_flight gauge']
+            lines += [f'{family}_in_flight{_format_labels(key)} {stats.in_flight}' for key, stats in series]
+
+            lines += [f'# HELP {family}_latency_seconds {help_text}: latency',
+                      f'# TYPE {family}_latency_seconds histogram']
+            for key, stats in series:
+                with stats._lock:
+                    buckets, total_seconds = stats.buckets[:], stats.total_seconds
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS + ('+Inf',), buckets):
+                    cumulative += count
+                    lines.append(f'{family}_latency_seconds_bucket{_format_labels(key, le=bound)} {cumulative}')
+                lines.append(f'{family}_latency_seconds_sum{_format_labels(key)} {total_seconds}')
+                lines.append(f'{family}_latency_seconds_count{_format_labels(key)} {cumulative}')
+
+            lines += [f'# HELP {family}_latency_quantile_seconds {help_text}: latency quantiles estimated from the histogram',
+                      f'# TYPE {family}_latency_quantile_seconds gauge']
+            for key, stats in series:
+                for q in QUANTILES:
+                    value = stats.quantile(q)
+                    if value is not None:
+                        lines.append(f'{family}_latency_quantile_seconds{_format_labels(key, quantile=q)} {value}')
+        return '\n'.join(lines) + '\n'
+
+# Shared by the agents, db_manager and the API's /api/agents/metrics
+registry = MetricsRegistry()
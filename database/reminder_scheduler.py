@@ -0,0 +1,202 @@
+import heapq
+import logging
+import threading
+import time
+import atexit
+from collections import deque
+from datetime import datetime, timedelta
+
+from database import db_manager as db
+
+logger = logging.getLogger(__name__)
+
+# Fired reminders kept for clients polling with fired_after()
+FIRED_HISTORY = 10000
+
+def next_fire_time(reminder, after, zone):
+    """
+    Epoch seconds of a reminder's first occurrence strictly after `after`,
+    in the resident's timezone; None if it is not scheduled on any day
+    """
+    if not reminder['day_mask']:
+        return None
+    hour, minute = map(int, reminder['time'].split(':'))
+
+    today = datetime.fromtimestamp(after, zone).date()
+    # Today's slot may already have passed, so look one day past a full week
+    for offset in range(8):
+        day = today + timedelta(days=offset)
+        if reminder['day_mask'] & (1 << day.weekday()):
+            fire = int(datetime(day.year, day.month, day.day, hour, minute, tzinfo=zone).timestamp())
+            if fire > after:
+                return fire
+    return None
+
+class ReminderScheduler:
+    """
+    Fires pending reminders at their scheduled time.
+
+    Reminders are loaded once into a heap keyed by next fire time and kept
+    in sync through db_manager's reminder listeners, so add_reminder,
+    update_reminder_status and delete_reminder update the heap in
+    O(log n). A timer thread sleeps until the earliest fire time; each
+    tick pops only the reminders that are due and reschedules them for
+    their next day. Changed or removed reminders leave stale heap entries
+    behind, which are skipped when they surface.
+    """
+
+    def __init__(self, on_fire=None):
+        self.on_fire = on_fire
+        self._reminders = {}
+        self._versions = {}
+        self._heap = []
+        # (sequence number, reminder) of recently fired reminders
+        self._fired = deque(maxlen=FIRED_HISTORY)
+        self._fired_seq = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def start(self):
+        """Load pending reminders, follow changes and start the timer thread"""
+        db.add_reminder_listener(self._on_change)
+        self.load()
+        self._thread = threading.Thread(target=self._run, name="reminder-scheduler", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+        return self
+
+    def load(self, now=None):
+        """(Re)build the heap from every pending reminder in the database"""
+        reminders = db.get_pending_reminders_all()
+        now = time.time() if now is None else now
+        with self._cond:
+            self._reminders.clear()
+            self._heap = []
+            for reminder in reminders:
+                self._schedule_locked(reminder, now)
+            heapq.heapify(self._heap)
+            self._cond.notify_all()
+
+    def schedule(self, reminder, now=None):
+        """Add or replace a reminder; only pending ones are scheduled"""
+        with self._cond:
+            self._schedule_locked(reminder, time.time() if now is None else now, push=True)
+            self._cond.notify_all()
+
+    def unschedule(self, reminder_id):
+        """Stop firing a reminder"""
+        with self._cond:
+            self._reminders.pop(reminder_id, None)
+            # Bumping the version invalidates its heap entries
+            self._versions[reminder_id] = self._versions.get(reminder_id, 0) + 1
+
+    def _schedule_locked(self, reminder, now, push=False):
+        reminder_id = reminder['id']
+        version = self._versions[reminder_id] = self._versions.get(reminder_id, 0) + 1
+        self._reminders.pop(reminder_id, None)
+        if reminder.get('status', 'pending') != 'pending':
+            return
+
+        fire_at = next_fire_time(reminder, now, db._resident_zone(reminder['user_id']))
+        if fire_at is None:
+            return
+        self._reminders[reminder_id] = reminder
+        entry = (fire_at, reminder_id, version)
+        if push:
+            heapq.heappush(self._heap, entry)
+        else:
+            self._heap.append(entry)
+
+    def _on_change(self, action, reminder):
+        if action == 'delete':
+            self.unschedule(reminder['id'])
+        else:
+            self.schedule(reminder)
+
+    def next_fire_time(self):
+        """Epoch seconds of the earliest scheduled reminder, or None"""
+        with self._cond:
+            self._drop_stale_locked()
+            return self._heap[0][0] if self._heap else None
+
+    def _drop_stale_locked(self):
+        while self._heap and self._versions.get(self._heap[0][1]) != self._heap[0][2]:
+            heapq.heappop(self._heap)
+
+    def pop_due(self, now=None):
+        """
+        Take the reminders due at or before now, in fire time order, and
+        reschedule each for its next occurrence. Each returned reminder has
+        a 'due_at' epoch timestamp.
+        """
+        now = time.time() if now is None else now
+        due = []
+        with self._cond:
+            while True:
+                self._drop_stale_locked()
+                if not self._heap or self._heap[0][0] > now:
+                    break
+                fire_at, reminder_id, version = heapq.heappop(self._heap)
+                reminder = self._reminders[reminder_id]
+                due.append({**reminder, 'due_at': fire_at})
+                self._fired_seq += 1
+                self._fired.append((self._fired_seq, due[-1]))
+
+                # Recurring: the next slot after this one keeps the heap entry's version
+                next_at = next_fire_time(reminder, max(fire_at, now), db._resident_zone(reminder['user_id']))
+                if next_at is None:
+                    del self._reminders[reminder_id]
+                else:
+                    heapq.heappush(self._heap, (next_at, reminder_id, version))
+        return due
+
+    def fired_after(self, seq=0, user_id=None):
+        """
+        Reminders fired after sequence number seq, oldest first, and the
+        sequence number to pass next time; polling costs follow the number
+        of reminders fired in between
+        """
+        with self._cond:
+            fired = []
+            # Newest are at the right, so stop at the first one already seen
+            for fired_seq, reminder in reversed(self._fired):
+                if fired_seq <= seq:
+                    break
+                if user_id is None or reminder['user_id'] == user_id:
+                    fired.append(reminder)
+            last_seq = self._fired_seq
+        fired.reverse()
+        return fired, last_seq
+
+    def close(self):
+        """Stop the timer thread and stop following reminder changes"""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        if self._on_change in db._reminder_listeners:
+            db.remove_reminder_listener(self._on_change)
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                # Sleep until the earliest fire time; schedule() wakes us if it moves earlier
+                while not self._closed:
+                    self._drop_stale_locked()
+                    wait = None if not self._heap else self._heap[0][0] - time.time()
+                    if wait is not None and wait <= 0:
+                        break
+                    self._cond.wait(wait)
+                if self._closed:
+                    return
+
+            due = self.pop_due()
+            if due and self.on_fire is not None:
+                try:
+                    self.on_fire(due)
+                except Exception:
+                    logger.exception("on_fire failed for reminders %s", [r['id'] for r in due])
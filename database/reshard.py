@@ -0,0 +1,125 @@
+"""
+Move residents between shard files after changing the number of shards.
+
+Usage: python -m database.reshard NEW_COUNT [--from OLD_COUNT] [--db PATH]
+
+Then start the app with ELDERCARE_SHARDS=NEW_COUNT. Stop ingest and back up
+the database files first: a move commits to two WAL databases, which is
+not atomic across files if the process dies mid-commit.
+"""
+import argparse
+
+from database import db_manager as db
+
+# Tables keyed by user_id, moved along with the resident
+RESIDENT_TABLES = [
+    "health_data", "activity_log", "reminders", "alerts",
+    "social_interactions", "social_events", "health_rollups", "residents",
+]
+
+def _move_live_rows(src, dst, new_count):
+    """Move the rows of residents that belong on dst from shard src; returns rows moved"""
+    moved = 0
+    with db.shard_connection(src) as conn:
+        conn.execute("ATTACH DATABASE ? AS dst", (db.shard_path(dst),))
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                for table in RESIDENT_TABLES:
+                    # Leave out id so moved rows get a fresh id from dst's range
+                    columns = ", ".join(name for name, _ in db._table_columns(conn, 'main', table) if name != 'id')
+                    moved += conn.execute(
+                        f"""INSERT OR REPLACE INTO dst.{table} ({columns})
+                            SELECT {columns} FROM main.{table} WHERE user_id % ? = ?""",
+                        (new_count, dst)
+                    ).rowcount
+                    conn.execute(f"DELETE FROM main.{table} WHERE user_id % ? = ?", (new_count, dst))
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+        finally:
+            conn.execute("DETACH DATABASE dst")
+
+    return moved
+
+def _move_archived_rows(src, dst, new_count):
+    """Move the archived rows of residents that belong on dst; returns rows moved"""
+    moved = 0
+    for month in db.list_archive_months(shard=src):
+        with db.shard_connection(src) as conn:
+            with db._attached_archive(conn, month, src) as alias:
+                conn.execute("ATTACH DATABASE ? AS dst_archive", (db._archive_path(month, dst),))
+                try:
+                    conn.execute("BEGIN IMMEDIATE")
+                    try:
+                        for table in db.ARCHIVED_TABLES:
+                            archived = [name for name, _ in db._table_columns(conn, alias, table)]
+                            if not archived:
+                                continue
+                            db._ensure_archive_table(conn, 'dst_archive', table)
+                            columns = ", ".join(archived)
+                            # Archived ids are already unique facility-wide, so they are kept
+                            moved += conn.execute(
+                                f"""INSERT OR IGNORE INTO dst_archive.{table} ({columns})
+                                    SELECT {columns} FROM {alias}.{table} WHERE user_id % ? = ?""",
+                                (new_count, dst)
+                            ).rowcount
+                            conn.execute(f"DELETE FROM {alias}.{table} WHERE user_id % ? = ?", (new_count, dst))
+                        conn.commit()
+                    except BaseException:
+                        conn.rollback()
+                        raise
+                finally:
+                    conn.execute("DETACH DATABASE dst_archive")
+
+    return moved
+
+def reshard(new_count, old_count=None):
+    """
+    Redistribute residents from old_count shards (default SHARD_COUNT) to
+    new_count shards by user_id % new_count, including their archives.
+
+    Live rows that move get new ids from the destination shard's range.
+    Returns the number of rows moved per (source, destination) pair.
+    """
+    old_count = db.SHARD_COUNT if old_count is None else old_count
+    if new_count < 1:
+        raise ValueError("new_count must be at least 1")
+
+    # Create and migrate every file involved before moving anything
+    db.SHARD_COUNT = max(old_count, new_count)
+    db.create_tables()
+
+    moved = {}
+    try:
+        for src in range(old_count):
+            for dst in range(new_count):
+                if dst != src:
+                    rows = _move_live_rows(src, dst, new_count) + _move_archived_rows(src, dst, new_count)
+                    if rows:
+                        moved[(src, dst)] = rows
+    finally:
+        db.SHARD_COUNT = new_count
+
+    return moved
+
+def main():
+    parser = argparse.ArgumentParser(description="Move residents between shard files")
+    parser.add_argument("new_count", type=int, help="number of shards to distribute residents across")
+    parser.add_argument("--from", dest="old_count", type=int, default=db.SHARD_COUNT,
+                        help="number of shards the data is in now (default: ELDERCARE_SHARDS or 1)")
+    parser.add_argument("--db", default=db.DB_PATH, help="path of shard 0 (default: %(default)s)")
+    args = parser.parse_args()
+
+    db.DB_PATH = args.db
+    moved = reshard(args.new_count, args.old_count)
+
+    for (src, dst), rows in moved.items():
+        print(f"shard {src} -> {dst}: {rows} rows")
+    for shard in range(args.new_count, args.old_count):
+        print(f"{db.shard_path(shard)} is now empty and can be removed")
+    print(f"Start the app with ELDERCARE_SHARDS={args.new_count}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+import logging
+import threading
+import time
+import atexit
+from collections import OrderedDict
+
+from database.db_manager import (
+    shard_for, shard_connection, retry_on_busy, is_busy_error, record_health_data_bulk, record_activity_bulk,
+    parse_health_reading, parse_activity_entry
+)
+
+logger = logging.getLogger(__name__)
+
+# How long a write may wait before the group commit that makes it durable
+FLUSH_INTERVAL_MS = 50
+# Pending rows that trigger an early flush
+MAX_BATCH_ROWS = 500
+# Seconds a 'commit' or 'full' write waits for its group commit before TimeoutError
+COMMIT_TIMEOUT = 10.0
+# Rows that failed to commit for a reason other than a busy database, kept for inspection
+DEAD_LETTER_MAX = 1000
+
+# 'async': return as soon as the row is queued
+# 'commit': wait for the group commit that contains the row
+# 'full': like 'commit', with the group committed under synchronous=FULL
+DURABILITY_LEVELS = ('async', 'commit', 'full')
+
+class WriteBehindBuffer:
+    """
+    Buffers high-rate sensor inserts and group-commits them from a
+    background thread every flush_interval_ms or max_batch rows, whichever
+    comes first.
+
+    Rows are validated when queued. A group that fails because the
+    database is busy stays queued and is retried until it commits (waiters
+    are bounded by their timeout); one that fails for any other reason is
+    committed row by row, and the rows that still fail are moved to
+    dead_letters() and their waiters get the error, so a bad row can never
+    hold up later writes.
+    """
+    
+    def __init__(self, flush_interval_ms=FLUSH_INTERVAL_MS, max_batch=MAX_BATCH_ROWS, durability='async'):
+        if durability not in DURABILITY_LEVELS:
+            raise ValueError(f"Unknown durability level {durability}")
+        
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_batch = max_batch
+        self.durability = durability
+        
+        self._health = []
+        self._activity = []
+        # Rows are numbered as they are queued; every row up to committed_seq is
+        # committed (or dead-lettered)
+        self._queued_seq = 0
+        self._committed_seq = 0
+        # seq -> (row, error) of rows that will never be committed, oldest first
+        self._dead_letters = OrderedDict()
+        self._closed = False
+        self._flush_requested = False
+        # Set when a queued row asked for 'full'; applies to the next group
+        self._full_requested = False
+        
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="write-behind-flusher", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+    
+    def record_health_data(self, user_id, heart_rate, bp, glucose, timestamp=None, durability=None):
+        """Queue a health reading; returns its sequence number. Raises ValueError for invalid values."""
+        # Stamped on arrival so buffering does not shift the reading's time
+        return self._enqueue(self._health, parse_health_reading({
+            'user_id': user_id,
+            'heart_rate': heart_rate,
+            'bp': bp,
+            'glucose': glucose,
+            'timestamp': timestamp
+        }), durability)
+    
+    def record_activity(self, user_id, activity, status, timestamp=None, durability=None):
+        """Queue an activity entry; returns its sequence number. Raises ValueError for invalid values."""
+        return self._enqueue(self._activity, parse_activity_entry({
+            'user_id': user_id,
+            'activity': activity,
+            'status': status,
+            'timestamp': timestamp
+        }), durability)
+    
+    def _enqueue(self, pending, row, durability):
+        durability = durability or self.durability
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Write-behind buffer is closed")
+            self._queued_seq += 1
+            seq = self._queued_seq
+            pending.append((seq, row))
+            if durability != 'async':
+                self._flush_requested = True
+            if durability == 'full':
+                self._full_requested = True
+            if self._flush_requested or len(self._health) + len(self._activity) >= self.max_batch:
+                self._cond.notify_all()
+        
+        if durability != 'async':
+            self.wait_for(seq, COMMIT_TIMEOUT)
+        return seq
+    
+    def flush(self, timeout=None):
+        """Barrier: block until everything queued before the call is committed"""
+        with self._cond:
+            seq = self._queued_seq
+            self._flush_requested = True
+            self._cond.notify_all()
+        self.wait_for(seq, timeout)
+    
+    def wait_for(self, seq, timeout=None):
+        """
+        Block until the row with sequence number seq is committed. Raises
+        the error of a row that was dead-lettered instead, or TimeoutError.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._committed_seq < seq:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError(f"Write {seq} not committed within {timeout}s")
+                self._cond.wait(remaining)
+            failed = self._dead_letters.get(seq)
+        if failed is not None:
+            raise failed[1]
+    
+    def pending(self):
+        """Number of rows queued but not yet committed"""
+        with self._cond:
+            return self._queued_seq - self._committed_seq
+    
+    def dead_letters(self):
+        """(row, error) of the most recent rows that failed to commit and were dropped"""
+        with self._cond:
+            return list(self._dead_letters.values())
+    
+    def close(self):
+        """Flush what is queued and stop the background flusher"""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+    
+    def _run(self):
+        while True:
+            with self._cond:
+                deadline = time.monotonic() + self.flush_interval
+                # Durable writers and flush() callers do not wait out the interval
+                while not (self._closed or self._flush_requested
+                           or len(self._health) + len(self._activity) >= self.max_batch):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                
+                self._flush_requested = False
+                full = self._full_requested or self.durability == 'full'
+                self._full_requested = False
+                health, activity = self._health, self._activity
+                self._health, self._activity = [], []
+                seq = self._queued_seq
+                closed = self._closed
+            
+            retry_health, retry_activity, error = [], [], None
+            if health or activity:
+                # One group commit per shard; a row that cannot be routed is dead-lettered
+                shards = {}
+                for kind, items in enumerate((health, activity)):
+                    for item in items:
+                        try:
+                            shard = shard_for(item[1]['user_id'])
+                        except Exception as e:
+                            self._dead_letter(*item, e)
+                            continue
+                        shards.setdefault(shard, ([], []))[kind].append(item)
+                
+                for shard, (shard_health, shard_activity) in shards.items():
+                    failed_health, failed_activity, busy = self._commit_group(shard, shard_health, shard_activity, full)
+                    retry_health += failed_health
+                    retry_activity += failed_activity
+                    error = busy or error
+            
+            with self._cond:
+                if retry_health or retry_activity:
+                    # Only the busy shards' rows are retried, ahead of newer rows
+                    self._health[:0] = sorted(retry_health, key=lambda item: item[0])
+                    self._activity[:0] = sorted(retry_activity, key=lambda item: item[0])
+                    self._full_requested = self._full_requested or full
+                    # Rows after the first retried one stay pending until it commits
+                    seq = min(item[0] for item in retry_health + retry_activity) - 1
+                self._committed_seq = max(self._committed_seq, seq)
+                self._cond.notify_all()
+            
+            if closed:
+                return
+            if error is not None:
+                time.sleep(self.flush_interval)
+    
+    def _commit_group(self, shard, health, activity, full):
+        """
+        Commit one shard's (seq, row) items. Returns the items to retry
+        because the database was busy, and the busy error. Items that fail
+        for any other reason are committed one at a time to find the bad
+        rows, which are dead-lettered.
+        """
+        try:
+            self._commit(shard, [row for _, row in health], [row for _, row in activity], full)
+            return [], [], None
+        except Exception as e:
+            if is_busy_error(e):
+                return health, activity, e
+            if len(health) + len(activity) == 1:
+                self._dead_letter(*(health or activity)[0], e)
+                return [], [], None
+        
+        retry_health, retry_activity, busy = [], [], None
+        for item in health:
+            failed, _, error = self._commit_group(shard, [item], [], full)
+            retry_health += failed
+            busy = error or busy
+        for item in activity:
+            _, failed, error = self._commit_group(shard, [], [item], full)
+            retry_activity += failed
+            busy = error or busy
+        return retry_health, retry_activity, busy
+    
+    def _dead_letter(self, seq, row, error):
+        logger.warning("Dropping write %d that cannot be committed: %r (%s)", seq, row, error)
+        with self._cond:
+            self._dead_letters[seq] = (row, error)
+            while len(self._dead_letters) > DEAD_LETTER_MAX:
+                self._dead_letters.popitem(last=False)
+    
+    @retry_on_busy
+    def _commit(self, shard, health, activity, full=False):
+        with shard_connection(shard) as conn:
+            # synchronous can only change outside a transaction, so commit here
+            if full:
+                conn.execute("PRAGMA synchronous = FULL")
+            try:
+                if health:
+                    record_health_data_bulk(health)
+                if activity:
+                    record_activity_bulk(activity)
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+            finally:
+                if full:
+                    conn.execute("PRAGMA synchronous = NORMAL")
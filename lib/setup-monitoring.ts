@@ -4,6 +4,7 @@
  */
 
 import { fetchLatestHealthData, createAlert } from "../lib/agent-clients";
+import alertRules from "../agents/alert_rules.json";
 
 // Intervals for different checks (in milliseconds)
 const HEALTH_CHECK_INTERVAL = 60000 // 1 minute
@@ -11,12 +12,8 @@ const ACTIVITY_CHECK_INTERVAL = 120000 // 2 minutes
 const REMINDER_CHECK_INTERVAL = 30000 // 30 seconds
 const SOCIAL_CHECK_INTERVAL = 3600000 // 1 hour
 
-// Thresholds for health metrics
-const THRESHOLDS = {
-  heart_rate: { low: 60, high: 100 },
-  blood_pressure: { systolic: { low: 90, high: 140 }, diastolic: { low: 60, high: 90 } },
-  glucose: { low: 70, high: 140 },
-}
+// Thresholds for health metrics, shared with the Python alert rules
+const THRESHOLDS = alertRules.thresholds
 
 let healthCheckInterval: NodeJS.Timeout | null = null
 let activityCheckInterval: NodeJS.Timeout | null = null
@@ -82,9 +79,9 @@ async function checkHealthMetrics(userId: number) {
 
     // Check heart rate
     if (healthData.heart_rate) {
-      if (healthData.heart_rate < THRESHOLDS.heart_rate.low) {
+      if (healthData.heart_rate < THRESHOLDS.heart_rate_low) {
         await createAlert(userId, `Low heart rate detected: ${healthData.heart_rate} BPM`, "health", "high")
-      } else if (healthData.heart_rate > THRESHOLDS.heart_rate.high) {
+      } else if (healthData.heart_rate > THRESHOLDS.heart_rate_high) {
         await createAlert(userId, `Elevated heart rate detected: ${healthData.heart_rate} BPM`, "health", "high")
       }
     }
@@ -93,11 +90,11 @@ async function checkHealthMetrics(userId: number) {
     if (healthData.bp) {
       const [systolic, diastolic] = healthData.bp.split("/").map(Number)
 
-      if (systolic > THRESHOLDS.blood_pressure.systolic.high || diastolic > THRESHOLDS.blood_pressure.diastolic.high) {
+      if (systolic > THRESHOLDS.systolic_high || diastolic > THRESHOLDS.diastolic_high) {
         await createAlert(userId, `Elevated blood pressure detected: ${healthData.bp} mmHg`, "health", "high")
       } else if (
-        systolic < THRESHOLDS.blood_pressure.systolic.low ||
-        diastolic < THRESHOLDS.blood_pressure.diastolic.low
+        systolic < THRESHOLDS.systolic_low ||
+        diastolic < THRESHOLDS.diastolic_low
       ) {
         await createAlert(userId, `Low blood pressure detected: ${healthData.bp} mmHg`, "health", "high")
       }
@@ -105,9 +102,9 @@ async function checkHealthMetrics(userId: number) {
 
     // Check glucose
     if (healthData.glucose) {
-      if (healthData.glucose < THRESHOLDS.glucose.low) {
+      if (healthData.glucose < THRESHOLDS.glucose_low) {
         await createAlert(userId, `Low glucose level detected: ${healthData.glucose} mg/dL`, "health", "high")
-      } else if (healthData.glucose > THRESHOLDS.glucose.high) {
+      } else if (healthData.glucose > THRESHOLDS.glucose_high) {
         await createAlert(userId, `Elevated glucose level detected: ${healthData.glucose} mg/dL`, "health", "high")
       }
     }
@@ -0,0 +1,23 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import db_manager
+
+@pytest.fixture(autouse=True)
+def db(tmp_path, monkeypatch):
+    """A fresh, migrated single-shard database for each test (never eldercare.db)"""
+    monkeypatch.setattr(db_manager, 'DB_PATH', str(tmp_path / 'eldercare.db'))
+    monkeypatch.setattr(db_manager, 'SHARD_COUNT', 1)
+    db_manager.create_tables()
+    yield db_manager
+    db_manager.close_pool()
+
+@pytest.fixture
+def client(db):
+    """Flask test client for the API, imported only once DB_PATH points at the test database"""
+    from api.api import app
+    return app.test_client()
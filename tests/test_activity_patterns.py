@@ -0,0 +1,103 @@
+import numpy as np
+import pytest
+
+from agents.activity_agent import ActivityMonitorAgent
+
+ROOMS = ['Bedroom', 'Bathroom', 'Kitchen', 'Living Room']
+
+def reference_patterns(location_data):
+    """The intended rules as plain loops: HH:MM rolls over a day when it goes back, any room"""
+    minutes, day, previous = [], 0, None
+    for entry in location_data:
+        hour, minute = map(int, entry['time'].split(':'))
+        if previous is not None and hour * 60 + minute < previous:
+            day += 1
+        previous = hour * 60 + minute
+        minutes.append(day * 1440 + previous)
+
+    patterns = []
+    last_visit, frequent = {}, set()
+    for i, entry in enumerate(location_data):
+        if i > 0 and location_data[i - 1]['location'] == entry['location']:
+            continue
+        j = last_visit.get(entry['location'])
+        if j is not None and minutes[i] - minutes[j] < 30:
+            frequent.add(j)
+        last_visit[entry['location']] = i
+    for j in sorted(frequent):
+        patterns.append(f"Frequent {location_data[j]['location'].lower()} visits detected around {location_data[j]['time']}")
+    for i in range(len(location_data) - 1):
+        if minutes[i + 1] - minutes[i] > 180:
+            patterns.append(f"Extended period with no movement detected between {location_data[i]['time']} and {location_data[i + 1]['time']}")
+    return patterns
+
+def events(*pairs):
+    return [{'time': time, 'location': location} for time, location in pairs]
+
+@pytest.fixture
+def agent():
+    return ActivityMonitorAgent()
+
+def test_returning_to_any_room_soon_is_a_frequent_visit(agent):
+    data = events(('09:00', 'Kitchen'), ('09:05', 'Living Room'), ('09:10', 'Kitchen'), ('09:15', 'Bathroom'))
+    assert agent.detect_unusual_patterns(data) == ["Frequent kitchen visits detected around 09:00"]
+
+def test_repeated_samples_of_one_room_are_one_visit(agent):
+    data = events(('08:00', 'Bathroom'), ('08:01', 'Bathroom'), ('08:02', 'Bathroom'), ('08:40', 'Bedroom'))
+    assert agent.detect_unusual_patterns(data) == []
+
+def test_long_gap_in_one_room_ends_at_the_next_event(agent):
+    data = events(('08:00', 'Kitchen'), ('12:00', 'Kitchen'), ('12:05', 'Living Room'))
+    assert agent.detect_unusual_patterns(data) == [
+        "Extended period with no movement detected between 08:00 and 12:00"
+    ]
+
+def test_times_roll_over_at_midnight(agent):
+    data = events(('21:30', 'Bedroom'), ('23:50', 'Bathroom'), ('00:10', 'Bedroom'), ('00:15', 'Bathroom'), ('06:45', 'Kitchen'))
+    assert agent.detect_unusual_patterns(data) == [
+        "Frequent bathroom visits detected around 23:50",
+        "Extended period with no movement detected between 00:15 and 06:45",
+    ]
+
+def test_same_time_next_day_is_not_a_repeat_visit(agent):
+    data = events(('10:00', 'Kitchen'), ('16:00', 'Bedroom'), ('09:50', 'Kitchen'))
+    assert agent.detect_unusual_patterns(data) == [
+        "Extended period with no movement detected between 10:00 and 16:00",
+        "Extended period with no movement detected between 16:00 and 09:50",
+    ]
+
+@pytest.mark.parametrize('seed', range(20))
+def test_matches_reference_loops_over_several_days(agent, seed):
+    rng = np.random.default_rng(seed)
+    days = 1 + seed % 3
+    minutes = np.sort(rng.integers(0, 1440 * days, rng.integers(0, 80))) % 1440
+    data = events(*((f"{m // 60:02d}:{m % 60:02d}", ROOMS[rng.integers(len(ROOMS))]) for m in minutes))
+
+    assert agent.detect_unusual_patterns(data) == reference_patterns(data)
+
+def test_unpadded_times_match_reference_loops(agent):
+    data = events(('8:00', 'Bathroom'), ('8:10', 'Kitchen'), ('8:20', 'Bathroom'), ('12:30', 'Bedroom'))
+    assert agent.detect_unusual_patterns(data) == reference_patterns(data)
+
+def test_facility_columns_match_per_resident_calls(agent):
+    rng = np.random.default_rng(1)
+    residents = [events(*((f"{m // 60:02d}:{m % 60:02d}", ROOMS[rng.integers(len(ROOMS))])
+                          for m in np.sort(rng.integers(0, 2880, size)) % 1440)) for size in (5, 0, 40, 1, 25)]
+    times = [e['time'] for r in residents for e in r]
+    locations = [e['location'] for r in residents for e in r]
+    offsets = np.cumsum([0] + [len(r) for r in residents])
+
+    assert agent.find_unusual_patterns(times, locations, offsets) == [agent.detect_unusual_patterns(r) for r in residents]
+
+def test_full_timestamps_cross_midnight(agent):
+    times = ['2026-01-10T23:50:00', '2026-01-11T00:05:00', '2026-01-11T00:10:00', '2026-01-11T04:00:00']
+    assert agent.find_unusual_patterns(times, ['Bathroom', 'Bedroom', 'Bathroom', 'Bedroom']) == [[
+        "Frequent bathroom visits detected around 2026-01-10T23:50:00",
+        "Extended period with no movement detected between 2026-01-11T00:10:00 and 2026-01-11T04:00:00",
+    ]]
+
+def test_invalid_input_is_rejected(agent):
+    with pytest.raises(ValueError):
+        agent.find_unusual_patterns(['25:00'], ['Bathroom'])
+    with pytest.raises(ValueError):
+        agent.find_unusual_patterns(['08:00'], [])
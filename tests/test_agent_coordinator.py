@@ -0,0 +1,65 @@
+import threading
+import time
+
+import pytest
+
+from agents import agent_coordinator
+
+@pytest.fixture
+def coordinator(monkeypatch):
+    monkeypatch.delenv('ELDERCARE_AGENT_LOG', raising=False)
+    coordinator = agent_coordinator.AgentCoordinator()
+    yield coordinator
+    coordinator.close()
+
+def test_concurrent_first_batches_share_one_pool(coordinator, monkeypatch):
+    created = []
+    real_executor = agent_coordinator.ThreadPoolExecutor
+    def slow_executor(*args, **kwargs):
+        # Widen the window between the None check and the assignment
+        time.sleep(0.05)
+        created.append(real_executor(*args, **kwargs))
+        return created[-1]
+    monkeypatch.setattr(agent_coordinator, 'ThreadPoolExecutor', slow_executor)
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(coordinator.run_all_agents_batch([None]))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(created) == 1
+    assert len(results) == 8
+    assert all(set(result[0]) == set(coordinator.agents) for result in results)
+
+def test_batches_still_run_after_close(coordinator):
+    coordinator.run_all_agents()
+    coordinator.close()
+
+    assert set(coordinator.run_all_agents()) == set(coordinator.agents)
+
+def test_concurrent_runs_each_get_their_own_results(coordinator, monkeypatch):
+    real_analyze = coordinator.social_agent.analyze_social_interactions
+    def slow_social(*args):
+        time.sleep(0.5)
+        return real_analyze(*args)
+    monkeypatch.setattr(coordinator.social_agent, 'analyze_social_interactions', slow_social)
+    social = {'interactions_data': [], 'weekly_data': []}
+
+    results = {}
+    def run(heart_rate):
+        results[heart_rate] = coordinator.run_all_agents({'heart_rate': heart_rate, **social}, timeout={'social': 0.1})
+    threads = [threading.Thread(target=run, args=(60 + i,)) for i in range(8)]
+    start = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Overrunning social agents time out without holding up the other runs
+    assert time.monotonic() - start < 2.0
+    for heart_rate, result in results.items():
+        assert set(result) == set(coordinator.agents)
+        assert f'Average: {heart_rate:.1f} BPM' in result['health']['result']
+        assert result['social']['status'] == 'timeout'
@@ -0,0 +1,50 @@
+import json
+
+from agents import agent_log
+from agents.agent_log import AgentLog
+
+def test_ring_keeps_the_newest_records():
+    log = AgentLog(capacity=3)
+    for i in range(5):
+        log.record('health', 'complete', {'run': i})
+
+    assert len(log) == 3
+    assert [entry['details'] for entry in log.entries(limit=0)] == [f'Result: {{"run": {i}}}' for i in (2, 3, 4)]
+    assert [entry['details'] for entry in log.entries(limit=2)] == ['Result: {"run": 3}', 'Result: {"run": 4}']
+
+def test_records_are_formatted_when_read():
+    log = AgentLog()
+    payload = {'user_id': 1}
+    log.record('health', 'start', payload)
+    log.record('alert', 'error', 'boom')
+    log.record('activity', 'start')
+    # The record holds the payload itself, not a formatted copy
+    payload['user_id'] = 2
+
+    assert [(entry['action'], entry['details']) for entry in log.entries()] == [
+        ('Started health agent', 'Running with data: {"user_id": 2}'),
+        ('Error in alert agent', 'boom'),
+        ('Started activity agent', 'Running with data: None'),
+    ]
+
+def test_sampling_keeps_errors_and_timeouts():
+    log = AgentLog(sample_rate=0.0)
+    log.record('health', 'start', {})
+    log.record('health', 'complete', {})
+    log.record('health', 'error', 'boom')
+    log.record('health', 'timeout', 'slow')
+
+    assert [entry['action'] for entry in log.entries()] == ['Error in health agent', 'Timeout in health agent']
+
+def test_evicted_records_spill_to_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(agent_log, 'SPILL_BATCH', 2)
+    path = tmp_path / 'agents.log'
+    log = AgentLog(capacity=2, spill_path=str(path))
+    for i in range(5):
+        log.record('health', 'complete', i)
+
+    # Runs 0 and 1 filled a batch; run 2 waits for the next one until flushed
+    assert [json.loads(line)['details'] for line in path.read_text().splitlines()] == ['Result: 0', 'Result: 1']
+    log.flush()
+    assert [json.loads(line)['details'] for line in path.read_text().splitlines()] == ['Result: 0', 'Result: 1', 'Result: 2']
+    assert [entry['details'] for entry in log.entries()] == ['Result: 3', 'Result: 4']
@@ -0,0 +1,106 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from database import db_manager as db
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    db._alert_dedup.clear()
+    yield
+    db._alert_dedup.clear()
+
+def alert_rows(user_id=1):
+    with db.db_connection(user_id) as conn:
+        return [dict(row) for row in conn.execute(
+            "SELECT id, message, priority, occurrences, handled FROM alerts WHERE user_id = ? ORDER BY id", (user_id,)
+        )]
+
+def test_repeat_merges_into_open_alert():
+    first = db.create_alert(1, 'Elevated heart rate detected: 105 BPM', 'health', 'high')
+    second = db.create_alert(1, 'Elevated heart rate detected: 112 BPM', 'health', 'high')
+
+    assert first == second
+    [row] = alert_rows()
+    assert row['occurrences'] == 2
+    assert row['message'] == 'Elevated heart rate detected: 112 BPM'
+
+def test_different_priority_type_resident_or_message_is_a_new_alert():
+    base = db.create_alert(1, 'Elevated heart rate detected: 105 BPM', 'health', 'high')
+
+    assert db.create_alert(1, 'Elevated heart rate detected: 150 BPM', 'health', 'critical') != base
+    assert db.create_alert(1, 'Elevated heart rate detected: 105 BPM', 'activity', 'high') != base
+    assert db.create_alert(2, 'Elevated heart rate detected: 105 BPM', 'health', 'high') != base
+    assert db.create_alert(1, 'Low glucose detected: 60 mg/dL', 'health', 'high') != base
+    assert len(alert_rows()) == 4
+
+def test_resolved_alert_is_not_reopened():
+    first = db.create_alert(1, 'Fall detected', 'fall', 'critical')
+    db.resolve_alert(first)
+
+    second = db.create_alert(1, 'Fall detected', 'fall', 'critical')
+    assert second != first
+    assert [row['handled'] for row in alert_rows()] == [1, 0]
+
+def test_repeat_outside_window_is_a_new_alert():
+    first = db.create_alert(1, 'Fall detected', 'fall', 'critical')
+    with db.db_connection(1) as conn:
+        conn.execute("UPDATE alerts SET last_occurred = datetime('now', ?)", (f"-{db.ALERT_DEDUP_WINDOW + 60} seconds",))
+    db._alert_dedup.clear()
+
+    assert db.create_alert(1, 'Fall detected', 'fall', 'critical') != first
+
+def test_open_alert_is_found_after_cache_is_lost():
+    first = db.create_alert(1, 'Fall detected', 'fall', 'critical')
+    db._alert_dedup.clear()
+
+    assert db.create_alert(1, 'Fall detected', 'fall', 'critical') == first
+
+def test_stale_cache_entry_falls_back_to_open_alert():
+    resolved = db.create_alert(1, 'Fall detected', 'fall', 'critical')
+    db.resolve_alert(resolved)
+    current = db.create_alert(1, 'Fall detected', 'fall', 'critical')
+    # A late cache update from a racing writer left the resolved id behind
+    key = next(iter(db._alert_dedup))
+    db._alert_dedup[key] = (resolved, time.time() + 60)
+
+    assert db.create_alert(1, 'Fall detected', 'fall', 'critical') == current
+    assert len(alert_rows()) == 2
+
+def test_concurrent_repeats_make_one_alert():
+    def repeat():
+        for i in range(25):
+            db.create_alert(1, f'Elevated heart rate detected: {100 + i} BPM', 'health', 'high')
+
+    threads = [threading.Thread(target=repeat) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    [row] = alert_rows()
+    assert row['occurrences'] == 200
+
+def test_busy_shard_does_not_block_alerts_on_another(monkeypatch):
+    monkeypatch.setattr(db, 'SHARD_COUNT', 2)
+    db.create_tables()
+
+    # Hold shard 0's write lock so an alert for resident 2 waits on it
+    locker = sqlite3.connect(db.shard_path(0))
+    locker.execute("BEGIN IMMEDIATE")
+    blocked = threading.Thread(target=db.create_alert, args=(2, 'Fall detected', 'fall', 'critical'))
+    blocked.start()
+    time.sleep(0.1)
+    try:
+        start = time.monotonic()
+        db.create_alert(1, 'Fall detected', 'fall', 'critical')
+        assert time.monotonic() - start < 1.0
+        assert blocked.is_alive()
+    finally:
+        locker.rollback()
+        locker.close()
+        blocked.join()
+
+    assert len(alert_rows(2)) == 1
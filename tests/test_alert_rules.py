@@ -0,0 +1,145 @@
+import json
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from agents import alert_rules
+from agents.alert_agent import AlertAgent
+from agents.alert_rules import AlertRules
+
+def alert(message, type_, priority):
+    return {'message': message, 'type': type_, 'priority': priority}
+
+def original_health_alerts(health_data):
+    """The hard-coded checks the rule file replaced, as the reference"""
+    alerts = []
+    if 'heart_rate' in health_data:
+        hr = health_data['heart_rate']
+        if hr > 120:
+            alerts.append(alert(f'Critical heart rate detected: {hr} BPM', 'health', 'critical'))
+        elif hr > 100:
+            alerts.append(alert(f'Elevated heart rate detected: {hr} BPM', 'health', 'high'))
+        elif hr < 50:
+            alerts.append(alert(f'Low heart rate detected: {hr} BPM', 'health', 'high'))
+    if 'bp' in health_data:
+        try:
+            systolic, diastolic = map(int, health_data['bp'].split('/'))
+            if systolic > 180 or diastolic > 120:
+                alerts.append(alert(f'Hypertensive crisis detected: {health_data["bp"]} mmHg', 'health', 'critical'))
+            elif systolic > 140 or diastolic > 90:
+                alerts.append(alert(f'High blood pressure detected: {health_data["bp"]} mmHg', 'health', 'high'))
+        except ValueError:
+            pass
+    if 'glucose' in health_data:
+        glucose = health_data['glucose']
+        if glucose > 250:
+            alerts.append(alert(f'Critical glucose level detected: {glucose} mg/dL', 'health', 'critical'))
+        elif glucose > 180:
+            alerts.append(alert(f'High glucose level detected: {glucose} mg/dL', 'health', 'high'))
+        elif glucose < 70:
+            alerts.append(alert(f'Low glucose level detected: {glucose} mg/dL', 'health', 'high'))
+    return alerts
+
+def original_activity_alerts(activity_data, now):
+    alerts = []
+    if 'last_movement' in activity_data:
+        minutes = (now - datetime.strptime(activity_data['last_movement'], '%Y-%m-%d %H:%M:%S')).total_seconds() / 60
+        if minutes > 180:
+            alerts.append(alert(f'No movement detected for {int(minutes / 60)} hours', 'activity', 'critical'))
+        elif minutes > 120:
+            alerts.append(alert(f'No movement detected for {int(minutes / 60)} hours', 'activity', 'high'))
+        elif minutes > 60:
+            alerts.append(alert(f'No movement detected for {int(minutes / 60)} hour', 'activity', 'medium'))
+    if 'location' in activity_data and 'duration' in activity_data:
+        location, duration = activity_data['location'], activity_data['duration']
+        if location == 'Bathroom' and duration > 30:
+            alerts.append(alert(f'Extended time in bathroom: {duration} minutes', 'safety', 'high'))
+        elif location == 'Floor' and duration > 1:
+            alerts.append(alert(f'Possible fall detected: {duration} minutes on floor', 'safety', 'critical'))
+    return alerts
+
+@pytest.fixture
+def agent():
+    return AlertAgent()
+
+@pytest.mark.parametrize('seed', range(10))
+def test_health_alerts_match_original_checks(agent, seed):
+    rng = np.random.default_rng(seed)
+    for _ in range(200):
+        reading = {}
+        if rng.random() < 0.8:
+            reading['heart_rate'] = int(rng.integers(30, 160))
+        if rng.random() < 0.8:
+            reading['bp'] = rng.choice([f"{rng.integers(70, 210)}/{rng.integers(40, 140)}", 'high', '120', '120.5/80'])
+        if rng.random() < 0.8:
+            reading['glucose'] = int(rng.integers(40, 320))
+
+        assert agent.evaluate_health_alert(reading) == original_health_alerts(reading)
+
+def test_activity_alerts_match_original_checks(agent):
+    now = datetime.now()
+    # Half-hour offsets keep int(minutes / 60) away from the hour boundaries while the test runs
+    for minutes in (30, 90, 150, 210, 400):
+        for location, duration in (('Bathroom', 20), ('Bathroom', 45), ('Floor', 1), ('Floor', 5), ('Kitchen', 90)):
+            data = {'last_movement': (now - timedelta(minutes=minutes)).strftime('%Y-%m-%d %H:%M:%S'),
+                    'location': location, 'duration': duration}
+            assert agent.evaluate_activity_alert(data) == original_activity_alerts(data, now)
+
+def test_reading_with_one_blood_pressure_value_skips_the_check(agent):
+    assert agent.evaluate_health_alert({'systolic': 190}) == []
+    assert agent.evaluate_health_alert({'diastolic': 130, 'heart_rate': 130}) == [
+        alert('Critical heart rate detected: 130 BPM', 'health', 'critical')
+    ]
+    assert not agent.is_emergency('health', {'systolic': 190})
+
+def test_batch_gaps_are_not_rendered(agent):
+    nan = float('nan')
+    alerts = agent.evaluate_health_alerts_batch([nan, 72], [190, 190], [nan, 100], [nan, 300])
+
+    assert alerts[0] == []
+    assert alerts[1] == [
+        alert('Hypertensive crisis detected: 190/100 mmHg', 'health', 'critical'),
+        alert('Critical glucose level detected: 300 mg/dL', 'health', 'critical'),
+    ]
+
+def write_json(path, data):
+    with open(path, 'w') as f:
+        json.dump(data, f)
+
+@pytest.fixture
+def rules_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(alert_rules, 'RELOAD_INTERVAL', 0)
+    rules_path = tmp_path / 'rules.json'
+    with open(alert_rules.RULES_PATH) as f:
+        rules_path.write_text(f.read())
+    overrides_path = tmp_path / 'overrides.json'
+    write_json(overrides_path, {'7': {'heart_rate_high': 110}})
+    return rules_path, overrides_path
+
+def test_overrides_apply_per_resident(rules_files):
+    rules = AlertRules(*map(str, rules_files))
+    _, matched = rules.evaluate('health', {'heart_rate': [105, 105, 115]}, user_ids=[1, 7, 7])
+
+    assert matched.any(axis=0).tolist() == [True, False, True]
+    assert rules.thresholds(7)['heart_rate_high'] == 110
+    assert rules.thresholds(1)['heart_rate_high'] == 100
+
+def test_edited_files_are_reloaded_and_bad_edits_ignored(rules_files):
+    rules_path, overrides_path = rules_files
+    rules = AlertRules(str(rules_path), str(overrides_path))
+
+    write_json(overrides_path, {'1': {'heart_rate_high': 120}})
+    assert rules.thresholds(1)['heart_rate_high'] == 120
+    assert rules.thresholds(7)['heart_rate_high'] == 100
+
+    rules_path.write_text('{"thresholds": ')
+    assert rules.thresholds(1)['heart_rate_high'] == 120
+    assert rules.reload_error is not None
+
+def test_unknown_threshold_is_rejected(rules_files):
+    rules_path, overrides_path = rules_files
+    write_json(overrides_path, {'1': {'no_such_threshold': 1}})
+
+    with pytest.raises(ValueError):
+        AlertRules(str(rules_path), str(overrides_path))
@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from agents.anomaly_detection import (ANOMALY_WINDOW, MIN_HISTORY, StreamingAnomalyDetector, anomaly_mask,
+                                      score_series)
+from agents.health_agent import HealthMonitorAgent
+
+def steady(n, seed=0):
+    """Whole-number heart rates around 70, as the sensors report them"""
+    return np.round(np.random.default_rng(seed).normal(70, 2, n))
+
+@pytest.mark.parametrize('n', [MIN_HISTORY + 5, ANOMALY_WINDOW * 3])
+def test_streaming_scores_match_batch_scores(n):
+    values = steady(n)
+    values[n - 3] = 110
+    detector = StreamingAnomalyDetector()
+    batch = score_series(values)
+    flagged = anomaly_mask(batch)
+
+    for i, value in enumerate(values):
+        scores = detector.score(1, heart_rate=value)
+        if i < MIN_HISTORY:
+            assert scores == {}
+        else:
+            hr = scores['heart_rate']
+            assert hr['zscore'] == pytest.approx(batch['zscore'][i])
+            assert hr['ewma_zscore'] == pytest.approx(batch['ewma_zscore'][i])
+            assert hr['robust_zscore'] == pytest.approx(batch['robust_zscore'][i])
+            assert hr['anomalous'] == flagged[i]
+        detector.update(1, heart_rate=value)
+
+    assert np.flatnonzero(flagged).tolist() == [n - 3]
+
+def test_spike_after_steady_window_is_flagged():
+    detector = StreamingAnomalyDetector()
+    for value in steady(ANOMALY_WINDOW):
+        detector.update(1, heart_rate=value, glucose=100)
+
+    assert detector.score(1, heart_rate=71)['heart_rate']['anomalous'] is False
+    spike = detector.score(1, heart_rate=95, glucose=101)
+    assert spike['heart_rate']['anomalous'] is True
+    assert spike['heart_rate']['median'] == pytest.approx(70, abs=1)
+    # A perfectly steady history does not make a 1 mg/dL change unusual
+    assert spike['glucose']['anomalous'] is False
+    # Scores are per resident
+    assert detector.score(2, heart_rate=95) == {}
+
+def test_missing_readings_are_skipped_by_batch_scores():
+    values = steady(40)
+    with_gaps = np.insert(values, [5, 20, 30], np.nan)
+    scores = score_series(with_gaps)
+    present = ~np.isnan(with_gaps)
+
+    assert np.isnan(scores['zscore'][~present]).all()
+    np.testing.assert_allclose(scores['zscore'][present], score_series(values)['zscore'])
+
+def test_health_agent_reports_unusual_readings_for_the_resident():
+    agent = HealthMonitorAgent()
+    for value in steady(ANOMALY_WINDOW):
+        agent.record_vitals(1, heart_rate=value)
+
+    # 95 BPM is under the fixed threshold but far from this resident's usual rate
+    [anomaly] = agent.detect_anomalies({'user_id': 1, 'heart_rate': 95})
+    assert anomaly.startswith('Unusual heart rate for this resident: 95 BPM')
+    assert agent.detect_anomalies({'user_id': 1, 'heart_rate': 70}) == []
+
+def test_historical_anomalies_are_found_in_columns():
+    values = steady(200)
+    values[150] = 40
+    columns = {
+        'timestamp': np.datetime64('2026-03-01T00:00:00') + np.arange(200) * np.timedelta64(60, 's'),
+        'heart_rate': values,
+    }
+
+    findings = HealthMonitorAgent().find_vitals_anomalies(columns)
+    assert [(f['timestamp'], f['metric'], f['value']) for f in findings] == [('2026-03-01 02:30:00', 'heart_rate', 40.0)]
@@ -0,0 +1,61 @@
+import calendar
+import math
+
+import numpy as np
+
+from database import db_manager as db
+
+def ts(day, hour=0):
+    return calendar.timegm((2026, 3, day, hour, 0, 0))
+
+def seed():
+    # Out of order, with one unparseable blood pressure and another resident's reading mixed in
+    db.record_health_data_bulk([
+        {'user_id': 1, 'heart_rate': 75, 'bp': '130/85', 'glucose': 110, 'timestamp': ts(3)},
+        {'user_id': 1, 'heart_rate': 70, 'bp': '120/80', 'glucose': 95, 'timestamp': ts(1)},
+        {'user_id': 1, 'heart_rate': 72, 'bp': 'high', 'glucose': 100, 'timestamp': ts(2)},
+        {'user_id': 2, 'heart_rate': 90, 'bp': '140/90', 'glucose': 120, 'timestamp': ts(2)},
+        {'user_id': 1, 'heart_rate': 80, 'bp': '125/82', 'glucose': 105, 'timestamp': ts(20)},
+    ])
+
+def same(a, b):
+    return a == b or (a is None and math.isnan(b))
+
+def test_health_columns_match_row_reads():
+    seed()
+    rows = db.get_health_data_range(1, '2026-03-01', '2026-03-10')
+    columns = db.get_health_data_columns(1, '2026-03-01', '2026-03-10')
+
+    assert columns['timestamp'].dtype == np.dtype('datetime64[s]')
+    assert columns['heart_rate'].dtype == np.float64
+    assert columns['timestamp'].astype(np.int64).tolist() == [row['ts'] for row in rows] == [ts(1), ts(2), ts(3)]
+    for name in ('heart_rate', 'systolic', 'diastolic', 'glucose'):
+        assert all(same(row[name], value) for row, value in zip(rows, columns[name].tolist()))
+    # The unparseable blood pressure is stored as NULL and read back as NaN
+    assert np.isnan(columns['systolic'][1])
+
+def test_health_frame_has_the_column_dtypes():
+    seed()
+    frame = db.get_health_data_frame(1, '2026-03-01', '2026-03-31')
+
+    assert list(frame.columns) == [name for name, _ in db.HEALTH_COLUMN_DTYPES]
+    assert frame['heart_rate'].tolist() == [70, 72, 75, 80]
+    assert frame['timestamp'].iloc[0].timestamp() == ts(1)
+
+def test_empty_range_gives_empty_columns():
+    seed()
+    columns = db.get_health_data_columns(1, '2026-04-01', '2026-04-30')
+    assert all(len(values) == 0 for values in columns.values())
+
+def test_activity_columns_match_row_reads():
+    db.record_activity_bulk([
+        {'user_id': 1, 'activity': 'Walking', 'timestamp': ts(2)},
+        {'user_id': 1, 'activity': 'Sleeping', 'status': 'resting', 'timestamp': ts(1)},
+        {'user_id': 2, 'activity': 'Reading', 'timestamp': ts(1)},
+    ])
+    rows = db.get_activity_data_range(1, '2026-03-01', '2026-03-31')
+    columns = db.get_activity_data_columns(1, '2026-03-01', '2026-03-31')
+
+    assert columns['timestamp'].astype(np.int64).tolist() == [row['ts'] for row in rows]
+    assert columns['activity'].tolist() == [row['activity'] for row in rows] == ['Sleeping', 'Walking']
+    assert columns['status'].tolist() == ['resting', 'active']
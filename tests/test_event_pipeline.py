@@ -0,0 +1,172 @@
+import threading
+import time
+
+import pytest
+
+from agents.alert_agent import AlertAgent
+from agents.event_pipeline import Backpressure, EventBus, ReadingPipeline
+
+class Gate:
+    """Blocks the threads that reach it until opened"""
+
+    def __init__(self):
+        self.reached = threading.Event()
+        self.opened = threading.Event()
+
+    def wait(self):
+        self.reached.set()
+        assert self.opened.wait(5)
+
+class RecordingHealthAgent:
+    """Records the order readings reach the vitals state; can hold one heart rate at a gate"""
+
+    def __init__(self):
+        self.recorded = []
+        self.gates = {}
+
+    def detect_anomalies(self, reading):
+        return []
+
+    def record_vitals(self, user_id, heart_rate, systolic, diastolic, glucose):
+        if heart_rate in self.gates:
+            self.gates[heart_rate].wait()
+        self.recorded.append((user_id, heart_rate))
+
+class Log:
+    def __init__(self):
+        self.entries = []
+
+    def record(self, *entry):
+        self.entries.append(entry)
+
+class Coordinator:
+    def __init__(self):
+        self.health_agent = RecordingHealthAgent()
+        self.alert_agent = AlertAgent()
+        self.log = Log()
+
+def reading(user_id, heart_rate):
+    return {'user_id': user_id, 'heart_rate': heart_rate, 'systolic': 120, 'diastolic': 80, 'glucose': 100}
+
+@pytest.fixture
+def coordinator():
+    return Coordinator()
+
+@pytest.fixture
+def pipeline(coordinator):
+    pipeline = ReadingPipeline(coordinator, EventBus(maxsize=100))
+    yield pipeline
+    for gate in coordinator.health_agent.gates.values():
+        gate.opened.set()
+    pipeline.close()
+
+def in_thread(func, *args):
+    result = {}
+    thread = threading.Thread(target=lambda: result.setdefault('value', func(*args)))
+    thread.start()
+    return thread, result
+
+def test_event_bus_hands_over_batches_in_order():
+    handled = []
+    bus = EventBus()
+    bus.subscribe('topic', handled.append, batch_size=4)
+    for i in range(10):
+        bus.publish('topic', i)
+    bus.close()
+
+    assert [event for batch in handled for event in batch] == list(range(10))
+    assert max(map(len, handled)) <= 4
+
+def test_event_bus_pushes_back_when_full():
+    gate = Gate()
+    bus = EventBus(maxsize=1)
+    bus.subscribe('topic', lambda events: gate.wait())
+    bus.publish('topic', 'taken by the worker')
+    assert gate.reached.wait(5)
+    bus.publish('topic', 'fills the queue')
+
+    with pytest.raises(Backpressure):
+        bus.publish('topic', 'no room', timeout=0.05)
+    gate.opened.set()
+    bus.close()
+
+def test_routine_readings_are_queued(pipeline, coordinator):
+    assert pipeline.publish_health(reading(1, 72)) is None
+    assert pipeline.publish_health(reading(1, 73)) is None
+    pipeline.bus.join()
+
+    assert coordinator.health_agent.recorded == [(1, 72), (1, 73)]
+
+def test_critical_reading_of_idle_resident_skips_the_queue(pipeline, coordinator, db):
+    coordinator.health_agent.gates[72] = gate = Gate()
+    pipeline.publish_health(reading(1, 72))
+    assert gate.reached.wait(5)
+
+    # The worker is stuck on resident 1; resident 2's critical reading does not wait for it
+    result = pipeline.publish_health(reading(2, 150))
+    assert [alert['priority'] for alert in result['alerts']] == ['critical']
+    assert result['alerts'][0]['id'] == db.get_active_alerts(2)[0]['id']
+    gate.opened.set()
+    pipeline.bus.join()
+
+    assert coordinator.health_agent.recorded == [(2, 150), (1, 72)]
+
+def test_critical_reading_waits_for_its_residents_queued_readings(pipeline, coordinator):
+    coordinator.health_agent.gates[70] = gate = Gate()
+    pipeline.publish_health(reading(1, 70))
+    assert gate.reached.wait(5)
+    pipeline.publish_health(reading(1, 72))
+
+    thread, result = in_thread(pipeline.publish_health, reading(1, 150))
+    time.sleep(0.1)
+    assert thread.is_alive()
+    gate.opened.set()
+    thread.join(5)
+
+    assert [alert['priority'] for alert in result['value']['alerts']] == ['critical']
+    assert coordinator.health_agent.recorded == [(1, 70), (1, 72), (1, 150)]
+
+def test_queued_reading_waits_for_the_residents_inline_evaluation(pipeline, coordinator):
+    coordinator.health_agent.gates[150] = gate = Gate()
+    thread, _ = in_thread(pipeline.publish_health, reading(1, 150))
+    assert gate.reached.wait(5)
+
+    assert pipeline.publish_health(reading(1, 72)) is None
+    time.sleep(0.1)
+    assert coordinator.health_agent.recorded == []
+    gate.opened.set()
+    thread.join(5)
+    pipeline.bus.join()
+
+    assert coordinator.health_agent.recorded == [(1, 150), (1, 72)]
+
+def test_full_queue_keeps_each_residents_order(coordinator):
+    pipeline = ReadingPipeline(coordinator, EventBus(maxsize=2), batch_size=1)
+    try:
+        threads = [in_thread(lambda user_id: [pipeline.publish_health(reading(user_id, 60 + i)) for i in range(30)],
+                             user_id)[0] for user_id in (1, 2, 3)]
+        for thread in threads:
+            thread.join(10)
+        pipeline.bus.join()
+    finally:
+        pipeline.close()
+
+    for user_id in (1, 2, 3):
+        assert [hr for uid, hr in coordinator.health_agent.recorded if uid == user_id] == list(range(60, 90))
+
+def test_failed_batch_is_logged_and_waiters_get_the_error(pipeline, coordinator, monkeypatch):
+    def broken(*args):
+        raise RuntimeError('vitals store down')
+    monkeypatch.setattr(coordinator.health_agent, 'record_vitals', broken)
+
+    assert pipeline.publish_health(reading(1, 72)) is None
+    pipeline.bus.join()
+    with pytest.raises(RuntimeError):
+        pipeline.publish_health(reading(1, 150))
+
+    assert coordinator.log.entries[0][:2] == ('health', 'error')
+    # A failed reading does not leave its resident blocked
+    monkeypatch.undo()
+    assert pipeline.publish_health(reading(1, 73)) is None
+    pipeline.bus.join()
+    assert coordinator.health_agent.recorded == [(1, 73)]
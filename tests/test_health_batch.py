@@ -0,0 +1,49 @@
+import pytest
+
+def reading(**overrides):
+    return {'user_id': 1, 'heart_rate': 72, 'bp': '120/80', 'glucose': 100, **overrides}
+
+def post_batch(client, readings):
+    response = client.post('/api/health/batch', json={'readings': readings})
+    assert response.status_code == 200
+    return response.json
+
+@pytest.mark.parametrize('bad', [
+    {'heart_rate': 'x'},
+    {'glucose': None},
+    {'user_id': 'abc'},
+    {'user_id': True},
+    {'user_id': 1.5},
+    {'bp': '120'},
+    {'timestamp': 12345678901234567890},
+    {'timestamp': 'yesterday'},
+])
+def test_invalid_reading_is_marked_not_fatal(client, db, bad):
+    result = post_batch(client, [reading(**bad), reading(user_id=2)])
+
+    assert result['status'] == ['invalid', 'ok']
+    assert result['stored'] == 1
+    assert db.get_latest_health_data(2)['heart_rate'] == 72
+
+def test_non_dict_and_missing_fields_are_invalid(client):
+    result = post_batch(client, [[1, 2], {'user_id': 1, 'bp': '120/80'}, reading()])
+    assert result['status'] == ['invalid', 'invalid', 'ok']
+
+def test_numeric_strings_are_coerced(client, db):
+    result = post_batch(client, [reading(user_id='3', heart_rate='75', glucose='101.5')])
+
+    assert result['status'] == ['ok']
+    row = db.get_latest_health_data(3)
+    assert (row['heart_rate'], row['glucose']) == (75, 101.5)
+
+def test_status_keeps_most_urgent_priority(client, monkeypatch):
+    from api.api import agent_coordinator
+
+    # Alerts in ascending urgency, then a less urgent one after the most urgent
+    alerts = [[{'priority': 'medium', 'message': 'a'}, {'priority': 'high', 'message': 'b'}],
+              [{'priority': 'high', 'message': 'c'}, {'priority': 'medium', 'message': 'd'}],
+              [{'priority': 'critical', 'message': 'e'}, {'priority': 'high', 'message': 'f'}]]
+    monkeypatch.setattr(agent_coordinator.alert_agent, 'evaluate_health_alerts_batch', lambda *args, **kwargs: alerts)
+
+    result = post_batch(client, [reading(), reading(), reading()])
+    assert result['status'] == ['high', 'high', 'critical']
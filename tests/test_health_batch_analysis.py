@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+
+from agents.health_agent import HealthMonitorAgent
+
+nan = np.nan
+
+# Three residents: normal, high heart rate and blood pressure with low glucose, and no data
+HEART_RATE = [[70, 72, 68], [95, 110, nan], [nan, nan, nan]]
+SYSTOLIC = [[118, 115, 117], [150, 145, nan], [nan, nan, nan]]
+DIASTOLIC = [[75, 78, 76], [95, 92, nan], [nan, nan, nan]]
+GLUCOSE = [[90, 100, 110], [65, 150, nan], [nan, nan, nan]]
+
+@pytest.fixture
+def agent():
+    return HealthMonitorAgent()
+
+def per_resident(agent, i):
+    """The per-resident analyze_* output for resident i, as the reference"""
+    def samples(stacked):
+        row = np.asarray(stacked[i], dtype=float)
+        return row[~np.isnan(row)]
+
+    sections = []
+    if len(samples(HEART_RATE)):
+        sections.append(agent.analyze_heart_rate(samples(HEART_RATE)))
+    if len(samples(SYSTOLIC)):
+        sections.append(agent.analyze_blood_pressure(samples(SYSTOLIC), samples(DIASTOLIC)))
+    if len(samples(GLUCOSE)):
+        sections.append(agent.analyze_glucose(samples(GLUCOSE)))
+    return "\n".join(sections) if sections else "No health data available for analysis."
+
+def flatten(stacked):
+    """Flat values and offsets with the NaN padding dropped"""
+    rows = [np.asarray(row, dtype=float) for row in stacked]
+    rows = [row[~np.isnan(row)] for row in rows]
+    return np.concatenate(rows), np.concatenate([[0], np.cumsum([len(row) for row in rows])])
+
+def test_stacked_analysis_matches_per_resident_methods(agent):
+    result = agent.analyze_residents(HEART_RATE, SYSTOLIC, DIASTOLIC, GLUCOSE, user_ids=[11, 12, 13])
+
+    assert len(result) == 3
+    assert result.user_ids.tolist() == [11, 12, 13]
+    assert list(result) == [per_resident(agent, i) for i in range(3)]
+    assert result.heart_rate['count'].tolist() == [3, 2, 0]
+    assert result.heart_rate['max'][1] == 110
+    assert np.isnan(result.heart_rate['mean'][2])
+
+def test_flat_values_with_offsets_give_the_same_result(agent):
+    (hr, offsets), (sys, _), (dia, _), (glu, _) = map(flatten, (HEART_RATE, SYSTOLIC, DIASTOLIC, GLUCOSE))
+    flat = agent.analyze_residents(hr, sys, dia, glu, offsets=offsets)
+    stacked = agent.analyze_residents(HEART_RATE, SYSTOLIC, DIASTOLIC, GLUCOSE)
+
+    assert offsets.tolist() == [0, 3, 5, 5]
+    assert list(flat) == list(stacked)
+    for name in ('heart_rate', 'systolic', 'diastolic', 'glucose'):
+        for field in ('count', 'mean', 'min', 'max'):
+            np.testing.assert_array_equal(getattr(flat, name)[field], getattr(stacked, name)[field])
+
+def test_flags_and_residents_needing_attention(agent):
+    result = agent.analyze_residents(HEART_RATE, SYSTOLIC, DIASTOLIC, GLUCOSE)
+
+    assert result.flags['heart_rate_high'].tolist() == [False, True, False]
+    assert result.flags['heart_rate_normal'].tolist() == [True, False, False]
+    assert result.flags['blood_pressure_elevated'].tolist() == [False, True, False]
+    assert result.flags['glucose_low'].tolist() == [False, True, False]
+    # A resident without data raises no flags at all
+    assert not any(mask[2] for mask in result.flags.values())
+    assert result.needs_attention().tolist() == [1]
+
+def test_missing_metrics_are_skipped(agent):
+    result = agent.analyze_residents(heart_rate=[[70, 72], [101, 99]])
+
+    assert result.systolic is None
+    assert 'glucose_high' not in result.flags
+    assert result.render(1) == agent.analyze_heart_rate([101, 99])
+
+@pytest.mark.parametrize('kwargs', [
+    {},
+    {'heart_rate': [[70]], 'glucose': [[90], [95]]},
+    {'heart_rate': [70, 72], 'offsets': [0, 3]},
+    {'heart_rate': [70, 72]},
+    {'heart_rate': [[70]], 'user_ids': [1, 2]},
+])
+def test_mismatched_input_is_rejected(agent, kwargs):
+    with pytest.raises(ValueError):
+        agent.analyze_residents(**kwargs)
@@ -0,0 +1,73 @@
+import pytest
+
+from database.write_buffer import WriteBehindBuffer
+
+@pytest.fixture
+def api():
+    import api.api as api
+    return api
+
+@pytest.mark.parametrize('bad', [{'user_id': 'abc'}, {'user_id': 1.5}, {'heart_rate': 'x'}, {'bp': '120'}])
+def test_post_health_rejects_invalid_fields(client, bad):
+    reading = {'user_id': 1, 'heart_rate': 72, 'bp': '120/80', 'glucose': 100, **bad}
+    assert client.post('/api/health', json=reading).status_code == 400
+
+@pytest.mark.parametrize('bad', [{'user_id': 'abc'}, {'activity': {'room': 'Kitchen'}}, {'status': 5}])
+def test_post_activity_rejects_invalid_fields(client, bad):
+    entry = {'user_id': 1, 'activity': 'Walking', **bad}
+    assert client.post('/api/activity', json=entry).status_code == 400
+
+def test_post_health_stores_coerced_reading(client, db):
+    response = client.post('/api/health', json={'user_id': '7', 'heart_rate': '72', 'bp': '120/80', 'glucose': 100})
+
+    assert response.status_code == 200
+    assert db.get_latest_health_data(7)['heart_rate'] == 72
+
+@pytest.fixture
+def buffered(api, monkeypatch):
+    """Route the API's writes through a write buffer flushing every flush_interval_ms"""
+    buffers = []
+    def use(flush_interval_ms, wait_timeout):
+        buffer = WriteBehindBuffer(flush_interval_ms=flush_interval_ms)
+        buffers.append(buffer)
+        monkeypatch.setattr(api, 'write_buffer', buffer)
+        monkeypatch.setattr(api, 'WRITE_WAIT_TIMEOUT', wait_timeout)
+        return buffer
+    yield use
+    for buffer in buffers:
+        buffer.close()
+
+ALERTING = {'user_id': 1, 'heart_rate': 150, 'bp': '190/120', 'glucose': 100}
+
+def test_alerting_reading_not_yet_committed_is_not_acknowledged(client, buffered):
+    buffer = buffered(flush_interval_ms=10000, wait_timeout=0.1)
+    response = client.post('/api/health', json=ALERTING)
+
+    assert response.status_code == 503
+    assert response.json['success'] is False
+    assert response.json['queued'] is True
+    assert response.json['alerts']
+    assert buffer.pending() == 1
+
+def test_alerting_reading_committed_in_time_answers_200(client, buffered, db):
+    buffered(flush_interval_ms=10, wait_timeout=5.0)
+    response = client.post('/api/health', json=ALERTING)
+
+    assert response.status_code == 200
+    assert 'queued' not in response.json
+    assert db.get_latest_health_data(1)['heart_rate'] == 150
+
+@pytest.mark.parametrize('durability', ['direct', 'buffered'])
+def test_reading_timestamps_are_stored(client, buffered, db, durability):
+    if durability == 'buffered':
+        buffered(flush_interval_ms=10, wait_timeout=5.0).durability = 'commit'
+    health = client.post('/api/health', json={**ALERTING, 'heart_rate': 72, 'bp': '120/80', 'timestamp': '2026-01-05 08:30:00'})
+    activity = client.post('/api/activity', json={'user_id': 1, 'activity': 'Walking', 'timestamp': '2026-01-05 09:00:00'})
+
+    assert (health.status_code, activity.status_code) == (200, 200)
+    assert db.get_latest_health_data(1)['timestamp'] == '2026-01-05 08:30:00'
+    assert db.get_daily_activity_summary(1, '2026-01-05') == [{'activity': 'Walking', 'count': 1}]
+
+def test_invalid_timestamp_is_rejected(client):
+    response = client.post('/api/health', json={**ALERTING, 'timestamp': 'yesterday'})
+    assert response.status_code == 400
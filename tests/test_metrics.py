@@ -0,0 +1,90 @@
+import threading
+
+import pytest
+
+from database.metrics import CallStats, MetricsRegistry
+
+@pytest.fixture
+def registry():
+    registry = MetricsRegistry()
+    registry.describe('test_fn', 'Test functions')
+    return registry
+
+def record(stats, seconds):
+    """One call that took `seconds`"""
+    stats.finish(stats.start() - seconds)
+
+def test_calls_errors_and_in_flight_are_counted(registry):
+    started, release = threading.Event(), threading.Event()
+
+    def work(fail=False):
+        started.set()
+        assert release.wait(5)
+        if fail:
+            raise ValueError('bad')
+        return 'done'
+
+    timed = registry.timed(work, 'test_fn', function='work')
+    stats = registry.stats('test_fn', function='work')
+    thread = threading.Thread(target=timed)
+    thread.start()
+    assert started.wait(5)
+    assert stats.in_flight == 1
+    release.set()
+    thread.join(5)
+
+    assert timed() == 'done'
+    with pytest.raises(ValueError):
+        timed(fail=True)
+    assert (stats.calls, stats.errors, stats.in_flight) == (3, 1, 0)
+    assert timed.__name__ == 'work'
+
+def test_generators_are_timed_until_exhausted(registry):
+    timed = registry.timed(lambda: (i for i in range(3)), 'test_fn', function='rows')
+    stats = registry.stats('test_fn', function='rows')
+
+    rows = timed()
+    assert (stats.calls, stats.in_flight) == (0, 1)
+    assert list(rows) == [0, 1, 2]
+    assert (stats.calls, stats.in_flight) == (1, 0)
+
+    rows = timed()
+    next(rows)
+    rows.close()
+    assert (stats.calls, stats.in_flight) == (2, 0)
+
+def test_quantiles_interpolate_within_buckets():
+    stats = CallStats()
+    assert stats.quantile(0.5) is None
+
+    for _ in range(10):
+        record(stats, 0.003)
+    # Every call lands in the (2.5ms, 5ms] bucket, so the median is its midpoint
+    assert stats.quantile(0.5) == pytest.approx(0.00375)
+    record(stats, 20)
+    assert stats.quantile(0.99) == 10.0
+
+def test_render_writes_prometheus_text(registry):
+    timed = registry.timed(lambda: None, 'test_fn', function='say "hi"')
+    timed()
+    timed()
+    lines = registry.render().splitlines()
+
+    assert '# TYPE test_fn_calls_total counter' in lines
+    assert 'test_fn_calls_total{function="say \\"hi\\""} 2' in lines
+    assert 'test_fn_errors_total{function="say \\"hi\\""} 0' in lines
+    assert 'test_fn_in_flight{function="say \\"hi\\""} 0' in lines
+    assert 'test_fn_latency_seconds_bucket{function="say \\"hi\\"",le="+Inf"} 2' in lines
+    assert 'test_fn_latency_seconds_count{function="say \\"hi\\""} 2' in lines
+    assert any(line.startswith('test_fn_latency_quantile_seconds{function="say \\"hi\\"",quantile="0.95"}')
+               for line in lines)
+
+def test_metrics_endpoint_covers_db_and_agents(client, db):
+    db.record_health_data(1, 72, '120/80', 100)
+    response = client.get('/api/agents/metrics')
+
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    text = response.get_data(as_text=True)
+    assert 'eldercare_db_calls_total{function="record_health_data"}' in text
+    assert 'eldercare_agent_calls_total{agent="health",method="analyze_heart_rate"}' in text
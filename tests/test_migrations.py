@@ -0,0 +1,117 @@
+import os
+import sqlite3
+
+import pytest
+
+from database import db_manager as db
+
+def legacy_database(path, version, rows=()):
+    """A database migrated only up to `version`, with (sql, params) rows inserted at that schema"""
+    conn = sqlite3.connect(path)
+    cursor = conn.cursor()
+    for migration in db.MIGRATIONS[:version]:
+        migration(cursor)
+    cursor.execute(f"PRAGMA user_version = {version}")
+    for sql, params in rows:
+        cursor.execute(sql, params)
+    conn.commit()
+    conn.close()
+
+def migrate(monkeypatch, tmp_path, version, rows=()):
+    path = str(tmp_path / 'legacy.db')
+    legacy_database(path, version, rows)
+    monkeypatch.setattr(db, 'DB_PATH', path)
+    db.create_tables()
+    return path
+
+def test_fresh_database_is_current():
+    with db.db_connection() as conn:
+        assert db.get_schema_version(conn) == db.SCHEMA_VERSION
+
+def test_create_tables_is_idempotent():
+    db.create_tables()
+    with db.db_connection() as conn:
+        assert db.get_schema_version(conn) == db.SCHEMA_VERSION
+
+def test_pending_migrations_are_applied(monkeypatch, tmp_path):
+    path = migrate(monkeypatch, tmp_path, 1)
+
+    conn = sqlite3.connect(path)
+    indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    conn.close()
+    assert {'idx_health_data_user_ts', 'idx_activity_log_user_ts', 'idx_alerts_open'} <= indexes
+
+def test_day_mask_migration_pads_legacy_times(monkeypatch, tmp_path):
+    version = db.MIGRATIONS.index(db._migration_reminder_day_mask)
+    migrate(monkeypatch, tmp_path, version, [
+        ("INSERT INTO reminders (user_id, message, time, days, type) VALUES (?, ?, ?, ?, ?)",
+         (1, 'Morning pills', '8:00', '["Mon", "Wed"]', 'medication')),
+        ("INSERT INTO reminders (user_id, message, time, days, type) VALUES (?, ?, ?, ?, ?)",
+         (1, 'Evening walk', '18:30', '["Mon"]', 'activity')),
+    ])
+
+    assert [r['message'] for r in db.get_due_reminders(1, '08:00', 'Mon')] == ['Morning pills']
+    assert [r['message'] for r in db.get_due_reminders(1, '8:00', 'Wed')] == ['Morning pills']
+    assert db.get_due_reminders(1, '08:00', 'Tue') == []
+    assert [r['time'] for r in db.get_due_reminders_all('8:00', 'Mon')] == ['08:00']
+    assert [r['time'] for r in db.get_due_reminders_all('18:30', 'Mon')] == ['18:30']
+
+def test_epoch_migration_converts_timestamps(monkeypatch, tmp_path):
+    version = db.MIGRATIONS.index(db._migration_epoch_timestamps)
+    path = migrate(monkeypatch, tmp_path, version, [
+        ("INSERT INTO health_data (user_id, heart_rate, bp, systolic, diastolic, glucose, timestamp) VALUES (?, ?, ?, ?, ?, ?, ?)",
+         (1, 72, '120/80', 120, 80, 100, '2026-01-10 08:00:00')),
+        ("INSERT INTO activity_log (user_id, activity, status, timestamp) VALUES (?, ?, ?, ?)",
+         (1, 'Walking', 'active', '2026-01-10 23:30:00')),
+        ("INSERT INTO social_interactions (user_id, type, participants, duration, timestamp) VALUES (?, ?, ?, ?, ?)",
+         (1, 'Family', '[]', 30, '2026-01-11 12:00:00')),
+    ])
+
+    conn = sqlite3.connect(path)
+    for table in db.EPOCH_TABLES:
+        columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+        assert 'ts' in columns and 'timestamp' not in columns
+    conn.close()
+
+    row = db.get_health_data_range(1, '2026-01-10', '2026-01-10')[0]
+    assert row['ts'] == 1768032000
+    assert row['timestamp'] == '2026-01-10 08:00:00'
+
+def test_epoch_migration_upgrades_archives(monkeypatch, tmp_path):
+    version = db.MIGRATIONS.index(db._migration_epoch_timestamps)
+    path = str(tmp_path / 'legacy.db')
+    legacy_database(path, version)
+    monkeypatch.setattr(db, 'DB_PATH', path)
+
+    # An archive written before the migration still has the DATETIME column
+    os.makedirs(db.get_archive_dir())
+    archive = sqlite3.connect(db._archive_path('2025-12'))
+    archive.execute("CREATE TABLE health_data (id INTEGER PRIMARY KEY, user_id INTEGER, heart_rate INTEGER, bp TEXT, "
+                    "systolic INTEGER, diastolic INTEGER, glucose REAL, timestamp DATETIME)")
+    archive.execute("CREATE TABLE activity_log (id INTEGER PRIMARY KEY, user_id INTEGER, activity TEXT, status TEXT, timestamp DATETIME)")
+    archive.execute("INSERT INTO health_data VALUES (1, 1, 70, '120/80', 120, 80, 100, '2025-12-05 10:00:00')")
+    archive.commit()
+    archive.close()
+
+    db.create_tables()
+
+    rows = db.get_health_data_range(1, '2025-12-01', '2025-12-31')
+    assert [(row['heart_rate'], row['timestamp']) for row in rows] == [(70, '2025-12-05 10:00:00')]
+
+def test_resident_days_follow_their_timezone():
+    late_evening = 1768087800  # 2026-01-10 23:30 UTC, 18:30 in New York
+    after_midnight = 1768091400  # 2026-01-11 00:30 UTC, 19:30 in New York
+    db.record_health_data_bulk([
+        {'user_id': 1, 'heart_rate': hr, 'bp': '120/80', 'glucose': 100, 'timestamp': t}
+        for hr, t in ((70, late_evening), (71, after_midnight))
+    ])
+
+    assert [r['heart_rate'] for r in db.get_health_data_range(1, '2026-01-10', '2026-01-10')] == [70]
+
+    db.set_resident_timezone(1, 'America/New_York')
+    assert db.get_resident_timezone(1) == 'America/New_York'
+    assert [r['heart_rate'] for r in db.get_health_data_range(1, '2026-01-10', '2026-01-10')] == [70, 71]
+
+def test_unknown_timezone_is_rejected():
+    with pytest.raises(ValueError):
+        db.set_resident_timezone(1, 'Mars/Olympus_Mons')
@@ -0,0 +1,62 @@
+"""
+The hot db_manager queries must be answered from an index: each function
+runs against a fresh, migrated database with a trace callback on the
+pooled connection, and every SELECT it issues is checked with EXPLAIN
+QUERY PLAN.
+"""
+import pytest
+
+from database import db_manager as db
+
+HOT_QUERIES = {
+    'get_latest_health_data': lambda: db.get_latest_health_data(1),
+    'get_health_data_range': lambda: db.get_health_data_range(1, '2026-01-01', '2026-02-01'),
+    'get_health_data_page': lambda: db.get_health_data_page(1, '2026-01-01', '2026-02-01', 100, (1768464000, 42)),
+    'get_high_blood_pressure_readings': lambda: db.get_high_blood_pressure_readings(1, '2026-01-01', '2026-01-08'),
+    'get_health_summary': lambda: db.get_health_summary(1, '2026-01-01', '2026-01-08'),
+    'get_health_rollups': lambda: db.get_health_rollups(1, 'heart_rate', 'hour', '2026-01-01', '2026-02-01'),
+    'get_health_rollup_summary': lambda: db.get_health_rollup_summary(1, '2026-01-01', '2026-02-01'),
+    'get_activity_data_range': lambda: db.get_activity_data_range(1, '2026-01-01', '2026-02-01'),
+    'get_daily_activity_summary': lambda: db.get_daily_activity_summary(1, '2026-01-15'),
+    'get_due_reminders': lambda: db.get_due_reminders(1, '08:00', 'Mon'),
+    'get_due_reminders_all': lambda: db.get_due_reminders_all('23:58', 'Mon', 5),
+    'get_active_alerts': lambda: db.get_active_alerts(1),
+    'get_all_active_alerts': lambda: db.get_all_active_alerts(20),
+    # The dedup lookup for an alert not in the in-memory cache
+    'create_alert': lambda: db.create_alert(1, 'Elevated heart rate detected: 105 BPM', 'health', 'high'),
+    'get_weekly_social_summary': lambda: db.get_weekly_social_summary(1),
+}
+
+def query_plans(func):
+    """Run func and return (sql, plan details) for each SELECT it issued"""
+    with db.db_connection() as conn:
+        statements = []
+        conn.set_trace_callback(statements.append)
+        try:
+            func()
+        finally:
+            conn.set_trace_callback(None)
+
+        plans = []
+        for sql in statements:
+            if sql.lstrip().upper().startswith('SELECT'):
+                details = [row[3] for row in conn.execute('EXPLAIN QUERY PLAN ' + sql)]
+                plans.append((sql, details))
+    return plans
+
+def uses_index(details):
+    searched = any('INDEX' in d or 'PRIMARY KEY' in d for d in details)
+    # An ordered walk of an index (e.g. a top-N over a partial index) is fine; a table scan is not
+    return searched and not any(d.startswith('SCAN ') and 'INDEX' not in d for d in details)
+
+@pytest.mark.parametrize('name', HOT_QUERIES)
+def test_hot_query_uses_index(name):
+    plans = query_plans(HOT_QUERIES[name])
+
+    assert plans, f"{name} issued no SELECT"
+    for sql, details in plans:
+        assert uses_index(details), f"{name} scans a table: {'; '.join(details)}\n{sql}"
+
+def test_uses_index_rejects_table_scan():
+    assert not uses_index(['SCAN health_data'])
+    assert uses_index(['SEARCH health_data USING INDEX idx_health_data_user_ts (user_id=? AND ts>? AND ts<?)'])
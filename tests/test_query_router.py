@@ -0,0 +1,62 @@
+import pytest
+
+from agents.agent_coordinator import AgentCoordinator
+from agents.query_router import QueryRouter, normalize_query
+
+def test_route_ranks_by_keyword_hits_then_table_order():
+    router = QueryRouter()
+
+    assert router.route(normalize_query('How was my  Blood Pressure?')) == ('health',)
+    assert router.route('call family about my walk') == ('social', 'activity')
+    assert router.route('walk then call') == ('activity', 'social')
+    assert router.route('what time is it') == ()
+
+def test_repeat_queries_are_memoized():
+    router = QueryRouter()
+    router.route('heart rate')
+    router.route('heart rate')
+
+    assert router._cached_route.cache_info().hits == 1
+
+def test_subclass_route_override_is_used():
+    class HealthOnly(QueryRouter):
+        def route(self, query):
+            return ('health',)
+
+    assert HealthOnly().route('call my family') == ('health',)
+
+@pytest.fixture
+def coordinator(monkeypatch):
+    monkeypatch.delenv('ELDERCARE_AGENT_LOG', raising=False)
+    coordinator = AgentCoordinator()
+    yield coordinator
+    coordinator.close()
+
+def test_agent_gets_the_query_as_asked(coordinator, monkeypatch):
+    asked = []
+    monkeypatch.setattr(coordinator.social_agent, 'respond_to_query', lambda query: asked.append(query) or 'ok')
+
+    assert coordinator.process_query('Call  my Family') == 'ok'
+    # Same query at the same data version: served from the cache
+    assert coordinator.process_query('Call  my Family') == 'ok'
+    assert coordinator.process_query('call my family') == 'ok'
+    assert asked == ['Call  my Family', 'call my family']
+
+def test_cached_answer_is_dropped_when_its_data_changes(coordinator, db, monkeypatch):
+    answers = iter(['first', 'second'])
+    monkeypatch.setattr(coordinator.alert_agent, 'respond_to_query', lambda query: next(answers))
+
+    assert coordinator.process_query('any alerts?') == 'first'
+    assert coordinator.process_query('any alerts?') == 'first'
+    db.create_alert(1, 'Fall detected', 'fall', 'critical')
+    assert coordinator.process_query('any alerts?') == 'second'
+
+def test_spellings_with_the_same_route_do_not_share_answers(coordinator):
+    # The health agent matches "blood pressure" in the text it is given, so
+    # a tab-separated spelling routes to it but gets a different answer
+    odd = coordinator.process_query('How is my blood\tpressure?')
+    plain = coordinator.process_query('How is my blood pressure?')
+
+    assert plain == coordinator.health_agent.respond_to_query('How is my blood pressure?')
+    assert odd == coordinator.health_agent.respond_to_query('How is my blood\tpressure?')
+    assert plain != odd
@@ -0,0 +1,82 @@
+import calendar
+from datetime import datetime, timezone
+
+from database import db_manager as db
+
+START = calendar.timegm((2026, 1, 1, 0, 0, 0))
+
+def seed():
+    """40 readings over Jan-Feb 2026, several sharing a timestamp, inserted out of order"""
+    times = [START + (i // 3) * 4 * 86400 for i in range(40)]
+    db.record_health_data_bulk([
+        {'user_id': 1, 'heart_rate': 60 + i, 'bp': '120/80', 'glucose': 100, 'timestamp': t}
+        for i, t in reversed(list(enumerate(times)))
+    ])
+    # Another resident's rows never show up in user 1's pages
+    db.record_health_data_bulk([{'user_id': 2, 'heart_rate': 50, 'bp': '120/80', 'glucose': 100, 'timestamp': START}])
+
+def walk_pages(limit):
+    rows, after = [], None
+    while True:
+        page, after = db.get_health_data_page(1, '2026-01-01', '2026-03-31', limit, after)
+        rows += page
+        if after is None:
+            return rows
+
+def keys(rows):
+    return [(row['ts'], row['id']) for row in rows]
+
+def test_pages_cover_range_once_in_keyset_order():
+    seed()
+    expected = db.get_health_data_range(1, '2026-01-01', '2026-03-31')
+
+    assert len(expected) == 40
+    assert keys(expected) == sorted(keys(expected))
+    for limit in (1, 2, 3, 7, 40, 100):
+        assert keys(walk_pages(limit)) == keys(expected)
+
+def test_pages_span_archived_months():
+    seed()
+    expected = keys(db.get_health_data_range(1, '2026-01-01', '2026-03-31'))
+    assert list(db.run_retention(retention_days=40, now=datetime(2026, 4, 1, tzinfo=timezone.utc))) == ['2026-01']
+
+    for limit in (1, 4, 7):
+        assert keys(walk_pages(limit)) == expected
+
+def test_iterator_matches_list_for_any_batch_size():
+    seed()
+    expected = keys(db.get_health_data_range(1, '2026-01-01', '2026-03-31'))
+
+    for batch_size in (1, 3, 39, 40, 41):
+        assert keys(db.iter_health_data_range(1, '2026-01-01', '2026-03-31', batch_size=batch_size)) == expected
+
+def test_iterator_resumes_after_key():
+    seed()
+    rows = db.get_health_data_range(1, '2026-01-01', '2026-03-31')
+    after = (rows[9]['ts'], rows[9]['id'])
+
+    assert keys(db.iter_health_data_range(1, '2026-01-01', '2026-03-31', after=after)) == keys(rows[10:])
+
+def test_api_cursor_pages(client):
+    seed()
+    expected = [row['id'] for row in db.get_health_data_range(1, '2026-01-01', '2026-03-31')]
+
+    ids, cursor = [], None
+    while True:
+        query = {'user_id': 1, 'start_date': '2026-01-01', 'end_date': '2026-03-31', 'limit': 6}
+        if cursor:
+            query['cursor'] = cursor
+        body = client.get('/api/health', query_string=query).json
+        ids += [row['id'] for row in body['data']]
+        cursor = body['next_cursor']
+        if cursor is None:
+            break
+    assert ids == expected
+
+def test_api_streams_ndjson_and_rejects_bad_cursor(client):
+    seed()
+    query = {'user_id': 1, 'start_date': '2026-01-01', 'end_date': '2026-03-31'}
+
+    lines = client.get('/api/health', query_string={**query, 'format': 'ndjson'}).data.decode().splitlines()
+    assert len(lines) == 40
+    assert client.get('/api/health', query_string={**query, 'cursor': 'not-a-cursor'}).status_code == 400
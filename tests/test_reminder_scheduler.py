@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from database.reminder_scheduler import ReminderScheduler, next_fire_time
+
+UTC = timezone.utc
+MONDAY = 1 << 0
+SUNDAY = 1 << 6
+EVERY_DAY = (1 << 7) - 1
+
+def epoch(*args, zone=UTC):
+    return datetime(*args, tzinfo=zone).timestamp()
+
+@pytest.mark.parametrize('reminder, after, expected', [
+    # Later the same day
+    ({'time': '08:00', 'day_mask': MONDAY}, epoch(2026, 1, 5, 7, 0), epoch(2026, 1, 5, 8, 0)),
+    # Today's slot has passed: a week later
+    ({'time': '08:00', 'day_mask': MONDAY}, epoch(2026, 1, 5, 9, 0), epoch(2026, 1, 12, 8, 0)),
+    # A slot exactly at `after` is not "after" it
+    ({'time': '08:00', 'day_mask': MONDAY}, epoch(2026, 1, 5, 8, 0), epoch(2026, 1, 12, 8, 0)),
+    # Across midnight into the next scheduled day
+    ({'time': '00:15', 'day_mask': EVERY_DAY}, epoch(2026, 1, 4, 23, 50), epoch(2026, 1, 5, 0, 15)),
+    # Across a week boundary, Sunday to Monday
+    ({'time': '06:00', 'day_mask': MONDAY | SUNDAY}, epoch(2026, 1, 4, 7, 0), epoch(2026, 1, 5, 6, 0)),
+    ({'time': '06:00', 'day_mask': 0}, epoch(2026, 1, 4, 7, 0), None),
+])
+def test_next_fire_time(reminder, after, expected):
+    assert next_fire_time(reminder, after, UTC) == expected
+
+def test_next_fire_time_uses_the_residents_day():
+    new_york = ZoneInfo('America/New_York')
+    # 02:00 UTC on Tuesday is still Monday evening in New York
+    after = epoch(2026, 1, 6, 2, 0)
+    assert next_fire_time({'time': '22:00', 'day_mask': MONDAY}, after, new_york) == epoch(2026, 1, 5, 22, 0, zone=new_york)
+    # Across the spring DST change the wall-clock time is kept
+    after = epoch(2026, 3, 7, 12, 0, zone=new_york)
+    assert next_fire_time({'time': '08:00', 'day_mask': EVERY_DAY}, after, new_york) == epoch(2026, 3, 8, 8, 0, zone=new_york)
+
+@pytest.fixture
+def scheduler(db):
+    db.set_resident_timezone(1, 'UTC')
+    scheduler = ReminderScheduler().start()
+    yield scheduler
+    scheduler.close()
+
+def test_heap_follows_reminder_changes(db, scheduler):
+    assert scheduler.next_fire_time() is None
+
+    # Two days ahead, so the timer thread never fires them during the test
+    day = (datetime.now(UTC) + timedelta(days=2)).strftime('%a')
+    late = db.add_reminder(1, 'Second dose', '08:01', [day], 'medication')
+    late_at = scheduler.next_fire_time()
+    early = db.add_reminder(1, 'First dose', '08:00', [day], 'medication')
+    assert scheduler.next_fire_time() == late_at - 60
+
+    db.update_reminder_status(early, 'completed')
+    assert scheduler.next_fire_time() == late_at
+    db.update_reminder_status(early, 'pending')
+    assert scheduler.next_fire_time() == late_at - 60
+
+    db.delete_reminder(early)
+    assert scheduler.next_fire_time() == late_at
+    db.delete_reminder(late)
+    assert scheduler.next_fire_time() is None
+
+def test_fired_reminder_is_rescheduled_for_its_next_day(db, scheduler):
+    reminder_id = db.add_reminder(1, 'Pills', '08:00', ['Mon', 'Wed'], 'medication')
+    scheduler.load(now=epoch(2026, 1, 5, 7, 0))
+
+    assert scheduler.pop_due(now=epoch(2026, 1, 5, 7, 59)) == []
+    [due] = scheduler.pop_due(now=epoch(2026, 1, 5, 8, 0))
+    assert (due['id'], due['due_at']) == (reminder_id, epoch(2026, 1, 5, 8, 0))
+    assert scheduler.next_fire_time() == epoch(2026, 1, 7, 8, 0)
+
+    fired, seq = scheduler.fired_after(0, user_id=1)
+    assert [r['id'] for r in fired] == [reminder_id]
+    assert scheduler.fired_after(seq) == ([], seq)
@@ -0,0 +1,77 @@
+import calendar
+import os
+from datetime import datetime, timezone
+
+from database import db_manager as db
+
+def ts(year, month, day, hour=0):
+    return calendar.timegm((year, month, day, hour, 0, 0))
+
+def seed(user_id=1):
+    """Readings and activity in Jan, Feb and May 2026"""
+    times = [ts(2026, 1, 10), ts(2026, 1, 20), ts(2026, 2, 5), ts(2026, 5, 1), ts(2026, 5, 2)]
+    db.record_health_data_bulk([
+        {'user_id': user_id, 'heart_rate': 60 + i, 'bp': '120/80', 'glucose': 100, 'timestamp': t}
+        for i, t in enumerate(times)
+    ])
+    db.record_activity_bulk([{'user_id': user_id, 'activity': 'Walking', 'timestamp': t} for t in times])
+    return times
+
+NOW = datetime(2026, 6, 1, tzinfo=timezone.utc)
+
+def live_count(table):
+    with db.db_connection() as conn:
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+def test_old_months_move_to_archives():
+    seed()
+
+    # 90 days before June 1st is March 3rd, so only January and February are old enough
+    assert db.run_retention(now=NOW) == {'2026-01': 4, '2026-02': 2}
+    assert db.list_archive_months() == ['2026-01', '2026-02']
+    assert all(os.path.exists(db._archive_path(month)) for month in ['2026-01', '2026-02'])
+    assert live_count('health_data') == 2
+    assert live_count('activity_log') == 2
+
+def test_rerun_moves_nothing():
+    seed()
+    db.run_retention(now=NOW)
+
+    assert db.run_retention(now=NOW) == {}
+    assert db.list_archive_months() == ['2026-01', '2026-02']
+
+def test_range_reads_span_archives_and_live():
+    times = seed()
+    db.run_retention(now=NOW)
+
+    rows = db.get_health_data_range(1, '2026-01-01', '2026-05-31')
+    assert [row['ts'] for row in rows] == times
+    assert [row['heart_rate'] for row in rows] == [60, 61, 62, 63, 64]
+    assert [row['ts'] for row in db.get_activity_data_range(1, '2026-01-15', '2026-02-28')] == times[1:3]
+
+    columns = db.get_health_data_columns(1, '2026-01-01', '2026-05-31')
+    assert columns['heart_rate'].tolist() == [60, 61, 62, 63, 64]
+
+def test_late_rows_for_archived_month_are_merged_in_order():
+    times = seed()
+    db.run_retention(now=NOW)
+    late = ts(2026, 1, 15)
+    db.record_health_data_bulk([{'user_id': 1, 'heart_rate': 99, 'bp': '120/80', 'glucose': 100, 'timestamp': late}])
+
+    rows = db.get_health_data_range(1, '2026-01-01', '2026-01-31')
+    assert [row['ts'] for row in rows] == [times[0], late, times[1]]
+
+def test_rollups_keep_archived_months():
+    seed()
+    db.run_retention(now=NOW)
+
+    rollups = db.get_health_rollups(1, 'heart_rate', 'day', '2026-01-01', '2026-02-28')
+    assert [r['count'] for r in rollups] == [1, 1, 1]
+
+def test_other_residents_are_not_returned():
+    seed(user_id=1)
+    seed(user_id=2)
+    db.run_retention(now=NOW)
+
+    assert len(db.get_health_data_range(2, '2026-01-01', '2026-05-31')) == 5
+    assert {row['user_id'] for row in db.get_health_data_range(2, '2026-01-01', '2026-05-31')} == {2}
@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from agents.vitals_state import EWMA_ALPHA, VitalsStreamState
+
+def reference_ewma(values):
+    """Bias-corrected EWMA started from zero, computed over the whole history"""
+    ewma = 0.0
+    for x in values:
+        ewma += EWMA_ALPHA * (x - ewma)
+    return ewma / (1 - (1 - EWMA_ALPHA) ** len(values))
+
+@pytest.mark.parametrize('seed', range(5))
+def test_snapshot_matches_numpy_over_the_history(seed):
+    rng = np.random.default_rng(seed)
+    # A large offset makes a naive sum-of-squares variance lose precision
+    heart_rate = 1e6 + rng.normal(75, 8, 500)
+    glucose = rng.normal(110, 20, 300)
+    state = VitalsStreamState(capacity=1)
+
+    for i, hr in enumerate(heart_rate):
+        state.update(1, heart_rate=hr, glucose=glucose[i] if i < len(glucose) else None)
+    stats = state.snapshot(1)
+
+    assert set(stats) == {'heart_rate', 'glucose'}
+    for name, values in (('heart_rate', heart_rate), ('glucose', glucose)):
+        assert stats[name]['count'] == len(values)
+        assert stats[name]['mean'] == pytest.approx(np.mean(values), rel=1e-12)
+        assert stats[name]['std'] == pytest.approx(np.std(values, ddof=1), rel=1e-6)
+        assert (stats[name]['min'], stats[name]['max']) == (np.min(values), np.max(values))
+        assert stats[name]['ewma'] == pytest.approx(reference_ewma(values), rel=1e-12)
+
+def test_single_reading_and_unknown_resident():
+    state = VitalsStreamState()
+    state.update(1, heart_rate=72)
+
+    assert state.snapshot(1)['heart_rate'] == {
+        'count': 1, 'mean': 72.0, 'std': 0.0, 'min': 72.0, 'max': 72.0, 'ewma': pytest.approx(72.0), 'trend': 'stable'
+    }
+    assert state.snapshot(2) is None
+
+def test_trend_follows_recent_readings():
+    state = VitalsStreamState()
+    for hr in [70] * 10 + [74, 78, 82, 86, 90]:
+        state.update(1, heart_rate=hr)
+    for hr in [90] * 10 + [86, 82, 78, 74, 70]:
+        state.update(2, heart_rate=hr)
+    for hr in [70, 71, 69, 70, 70, 71, 69, 70]:
+        state.update(3, heart_rate=hr)
+
+    assert [state.snapshot(user_id)['heart_rate']['trend'] for user_id in (1, 2, 3)] == ['rising', 'falling', 'stable']
+
+def test_metric_arrays_cover_every_resident():
+    state = VitalsStreamState(capacity=2)
+    for user_id in range(5):
+        state.update(user_id, heart_rate=60 + user_id, glucose=100 if user_id else None)
+    state.update(3, heart_rate=75)
+
+    arrays = state.metric_arrays('heart_rate')
+    assert arrays['user_id'].tolist() == [0, 1, 2, 3, 4]
+    assert arrays['count'].tolist() == [1, 1, 1, 2, 1]
+    assert arrays['mean'].tolist() == [60, 61, 62, 69, 64]
+    assert np.isnan(state.metric_arrays('glucose')['mean'][0])
+
+def test_saved_state_loads_back(tmp_path):
+    state = VitalsStreamState()
+    for i in range(20):
+        state.update(7, heart_rate=70 + i % 5, systolic=120 + i, diastolic=80)
+    state.update(9, glucose=140)
+    path = tmp_path / 'vitals.npz'
+    state.save(path)
+
+    loaded = VitalsStreamState.load(path)
+    assert len(loaded) == 2
+    assert loaded.snapshot(7) == state.snapshot(7)
+    assert loaded.snapshot(9) == state.snapshot(9)
+    # A loaded state keeps accepting readings, including for new residents
+    loaded.update(10, heart_rate=80)
+    assert loaded.snapshot(10)['heart_rate']['count'] == 1
@@ -0,0 +1,113 @@
+import sqlite3
+
+import pytest
+
+from database import db_manager as db
+from database.write_buffer import WriteBehindBuffer
+
+@pytest.fixture
+def buffer():
+    buffer = WriteBehindBuffer(flush_interval_ms=10)
+    yield buffer
+    buffer.close()
+
+def health_count(user_id=None):
+    with db.db_connection() as conn:
+        if user_id is None:
+            return conn.execute("SELECT COUNT(*) FROM health_data").fetchone()[0]
+        return conn.execute("SELECT COUNT(*) FROM health_data WHERE user_id = ?", (user_id,)).fetchone()[0]
+
+def reject_heart_rate(value):
+    """Make the database refuse readings with this heart rate, like a constraint would"""
+    with db.db_connection() as conn:
+        conn.execute(f"""CREATE TRIGGER reject_reading BEFORE INSERT ON health_data
+                         WHEN NEW.heart_rate = {value} BEGIN SELECT RAISE(ABORT, 'rejected reading'); END""")
+
+@pytest.mark.parametrize('bad', [
+    {'heart_rate': {'x': 1}},
+    {'user_id': 'abc'},
+    {'bp': 'high'},
+    {'glucose': float('nan')},
+])
+def test_invalid_reading_is_rejected_when_queued(buffer, bad):
+    reading = {'user_id': 1, 'heart_rate': 72, 'bp': '120/80', 'glucose': 100, **bad}
+    with pytest.raises(ValueError):
+        buffer.record_health_data(**reading)
+    assert buffer.pending() == 0
+
+def test_invalid_activity_is_rejected_when_queued(buffer):
+    with pytest.raises(ValueError):
+        buffer.record_activity(1, {'room': 'Kitchen'}, 'active')
+    with pytest.raises(ValueError):
+        buffer.record_activity('abc', 'Walking', 'active')
+    assert buffer.pending() == 0
+
+def test_commit_durability_waits_for_the_row(buffer):
+    buffer.record_health_data(1, 72, '120/80', 100, durability='commit')
+    buffer.record_activity(1, 'Walking', 'active', durability='full')
+
+    assert health_count() == 1
+    assert db.get_daily_activity_summary(1)[0]['count'] == 1
+
+def test_flush_commits_everything_queued(buffer):
+    for i in range(50):
+        buffer.record_health_data(i % 5, 60 + i, '120/80', 100)
+    buffer.flush(timeout=5)
+
+    assert buffer.pending() == 0
+    assert health_count() == 50
+
+def test_failed_row_is_dead_lettered_without_blocking_later_rows(buffer):
+    reject_heart_rate(666)
+
+    before = buffer.record_health_data(1, 70, '120/80', 100)
+    bad = buffer.record_health_data(2, 666, '120/80', 100)
+    after = buffer.record_health_data(3, 71, '120/80', 100)
+    buffer.flush(timeout=5)
+
+    with pytest.raises(sqlite3.IntegrityError):
+        buffer.wait_for(bad, timeout=1)
+    buffer.wait_for(before, timeout=1)
+    buffer.wait_for(after, timeout=1)
+    assert (health_count(1), health_count(2), health_count(3)) == (1, 0, 1)
+    assert [row['heart_rate'] for row, _ in buffer.dead_letters()] == [666]
+    assert buffer.pending() == 0
+
+    # Later writes for any resident keep committing
+    buffer.record_health_data(2, 72, '120/80', 100, durability='commit')
+    assert health_count(2) == 1
+
+def test_durable_writer_of_failed_row_gets_the_error(buffer):
+    reject_heart_rate(666)
+
+    with pytest.raises(sqlite3.IntegrityError):
+        buffer.record_health_data(1, 666, '120/80', 100, durability='commit')
+    assert buffer.pending() == 0
+
+def test_busy_database_is_retried(buffer, monkeypatch):
+    monkeypatch.setattr(db, 'BUSY_TIMEOUT_MS', 20)
+    monkeypatch.setattr(db, 'BUSY_RETRIES', 1)
+    # Reconnect so the pooled connections pick up the short busy timeout
+    db.close_pool()
+
+    locker = sqlite3.connect(db.DB_PATH)
+    locker.execute("BEGIN IMMEDIATE")
+    seq = buffer.record_health_data(1, 72, '120/80', 100)
+    with pytest.raises(TimeoutError):
+        buffer.wait_for(seq, timeout=0.3)
+    assert buffer.pending() == 1
+
+    locker.rollback()
+    locker.close()
+    buffer.wait_for(seq, timeout=5)
+    assert health_count() == 1
+    assert buffer.dead_letters() == []
+
+def test_close_flushes_queued_rows():
+    buffer = WriteBehindBuffer(flush_interval_ms=10000)
+    buffer.record_health_data(1, 72, '120/80', 100)
+    buffer.close()
+
+    assert health_count() == 1
+    with pytest.raises(RuntimeError):
+        buffer.record_health_data(1, 72, '120/80', 100)